@@ -0,0 +1,266 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    N F C   A N T E N N A   G E N E R A T O R   -   B A T C H   M O D E
+# ---------------------------------------------------------------------------
+#
+# usage: ./antBatch.py -h
+#
+# generates a whole library of antennas from a parameter table or a sweep
+# specification. every variant is written to ./nfc_ant.pretty/ (or --outdir),
+# the work is spread over a pool of worker processes. with several --format
+# options every variant is written in all formats, the coil of a variant is
+# computed only once for the design rule check and all formats.
+#
+# parameter table (.csv, .json or .yaml/.yml): one row per antenna, the columns
+# are the long argument names of antGen.py, e.g.
+#
+#   modulename,turns,antennaLength,antennaWidth,conductorWidth,conductorSpace,style
+#   ant_a,3,75.4,33.5,2.7,1.7,3
+#
+# sweep specification (.json or .yaml/.yml with a top level object): every
+# parameter is either a single value, a list of values or a range
+# {"start": .., "stop": .., "step": ..} (stop is included). all combinations
+# are generated, e.g.
+#
+#   { "turns":          {"start": 2, "stop": 6, "step": 1},
+#     "antennaLength":  [40, 60, 75.4],
+#     "antennaWidth":   33.5,
+#     "conductorWidth": [0.5, 1.0],
+#     "conductorSpace": 0.5,
+#     "style":          [1, 2, 3] }
+#
+# columns which are not given are taken from the defaults of antGen.py. if no
+# modulename is given, it is built from --name (python format string with the
+# parameter names as fields). values are converted and checked by
+# antGen.AntParams (turns and style have to be integers, 3.0 is fine, 3.9 is
+# not); rows which fail are reported, a sweep which can not be expanded is an
+# error.
+#
+# with --store the parameters and metrics of all variants (trace length, copper
+# area, inner window, pad positions, ...) are also written to a columnar store,
+# see antStore.py for the columns and queries.
+#
+# YAML files need PyYAML (pip install pyyaml).
+#
+# ---------------------------------------------------------------------------
+
+import sys, argparse, os, time, csv, json, itertools, math
+import antGen
+
+# defaults for parameters which are not in the table / sweep, same as the defaults of antGen.py's arguments
+c_defaults = { "drillSize":             -1,
+               "minimalConductorSpace": -1,
+               "silkMargin":            0,
+               "style":                 1 }
+
+c_nameTemplate = "nfc_ant_t{style}_n{turns}_{antennaLength:g}x{antennaWidth:g}_c{conductorWidth:g}_s{conductorSpace:g}"
+
+c_intParameters = [ "turns", "style" ]
+
+def loadTable(filename):
+    # returns either a list of rows (parameter table) or a dict (sweep specification)
+    ext = os.path.splitext(filename)[1].lower()
+    with open(filename) as f:
+        if ext == ".csv":
+            return [ { k.strip(): v.strip() for k, v in row.items() if v is not None and v.strip() != "" }
+                     for row in csv.DictReader(f) ]
+        if ext == ".json":
+            return json.load(f)
+        if ext in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise SystemExit("ERROR: reading %s needs PyYAML (pip install pyyaml)" % (filename))
+            return yaml.safe_load(f)
+    raise SystemExit("ERROR: unknown file type of %s, use .csv, .json, .yaml or .yml" % (filename))
+
+def sweepValues(spec, name="value"):
+    # list of values for the parameter name of a sweep specification, ValueError if spec is not usable
+    if isinstance(spec, dict):
+        unknown = [ k for k in spec if k not in ("start", "stop", "step") ]
+        missing = [ k for k in ("start", "stop") if k not in spec ]
+        if unknown or missing:
+            raise ValueError("range of %s needs start, stop and an optional step, %s" % (name,
+                             "got %s" % (", ".join(map(str, unknown))) if unknown else "%s missing" % (" and ".join(missing))))
+        start = spec["start"]
+        stop  = spec["stop"]
+        step  = spec.get("step", 1)
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (start, stop, step)):
+            raise ValueError("start, stop and step of the range of %s have to be numbers" % (name))
+        if step <= 0:
+            raise ValueError("step of the range of %s has to be > 0" % (name))
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values = [ round(start + i*step, 9) for i in range(count) ]
+    elif isinstance(spec, (list, tuple)):
+        values = list(spec)
+    else:
+        values = [spec]
+    if name in c_intParameters:
+        fractional = [ v for v in values if isinstance(v, float) and not v.is_integer() ]
+        if fractional:
+            raise ValueError("%s has to be an integer, the sweep gives %s" % (name, ", ".join("%g" % (v) for v in fractional[:3])))
+    return values
+
+def expandSweep(spec):
+    # all combinations of a sweep specification as list of rows
+    names  = list(spec.keys())
+    values = [ sweepValues(spec[n], n) for n in names ]
+    return [ dict(zip(names, combination)) for combination in itertools.product(*values) ]
+
+def makeVariant(row, nameTemplate=c_nameTemplate):
+    # complete parameter set of one row, values are converted to the types antGen.py uses
+    if not isinstance(row, dict):
+        raise ValueError("row is a %s, expected parameter names and values" % (type(row).__name__))
+    params = dict(c_defaults)
+    params.update(row)
+    missing = [ k for k in antGen.PARAMETERS if k not in params and k != "modulename" ]
+    if missing:
+        raise ValueError("missing parameter(s) %s" % (", ".join(missing)))
+    # the values are converted (and checked) by antGen.AntParams, the name template needs the converted values
+    name = params.pop("modulename", None)
+    params = antGen.AntParams.fromDict(params).asDict()
+    params["modulename"] = nameTemplate.format(**params) if name is None else name
+    return antGen.AntParams.fromDict(params).asDict()
+
+def checkedVariant(params):
+    # params (a dict) through antGen.AntParams, which converts and validates them. a failure becomes an error entry
+    if "error" in params:
+        return params
+    try:
+        return antGen.AntParams.fromDict(params).asDict()
+    except (TypeError, ValueError) as e:
+        return { "modulename": params.get("modulename", "?"), "error": "%s: %s" % (type(e).__name__, e) }
+
+def makeVariants(table, nameTemplate=c_nameTemplate):
+    # turn rows of a table (or a sweep specification) into complete parameter sets.
+    # rows which can not be converted are kept with their error, so they are reported as failed
+    if not isinstance(table, (dict, list)):
+        raise ValueError("a table is a list of rows or a sweep specification (an object), not a %s" % (type(table).__name__))
+    rows = expandSweep(table) if isinstance(table, dict) else table
+    variants = []
+    for i, row in enumerate(rows):
+        try:
+            variants.append(makeVariant(row, nameTemplate))
+        except Exception as e:
+            name = row.get("modulename", "row %d" % (i+1)) if isinstance(row, dict) else "row %d" % (i+1)
+            variants.append({ "modulename": name,
+                              "error": "%s: %s" % (type(e).__name__, e) })
+    return variants
+
+def genVariant(job):
+    # worker: generate one antenna, failures are returned instead of raised so the run goes on
+    outdir, params, deterministic, drc, drcClearance, formats, polygon = job
+    if "error" in params:
+        return (params["modulename"], params["error"])
+    try:
+        geom = antGen.checkedGeometry(params, drc, drcClearance)
+        antGen.exportAnt(outdir, formats=formats, deterministic=deterministic, geom=geom, polygon=polygon, **params)
+    except antGen.DrcError as e:
+        return (params["modulename"], "DRC: %s%s" % (e.violations[0], " (and %d more)" % (len(e.violations)-1) if len(e.violations) > 1 else ""))
+    except Exception as e:
+        return (params["modulename"], "%s: %s" % (type(e).__name__, e))
+    return (params["modulename"], None)
+
+def runBatch(variants, outdir="./nfc_ant.pretty", workers=None, chunksize=None, deterministic=False, cache=False, drc=True, drcClearance=None, formats=("kicad5",), polygon=None):
+    # generate all variants with a pool of worker processes, returns list of (modulename, error) and the number of cache hits.
+    # with cache, variants which are up to date in outdir (see antGen.py, C A C H E) are skipped and not part of the list
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    # variants from python may come as raw dicts, they get the same checks as the rows of a table
+    variants = [ checkedVariant(params) for params in variants ]
+    hits = 0
+    if cache:
+        index = antGen.loadCacheIndex(outdir)
+        options = antGen.cacheOptions(deterministic, formats, polygon, drc, drcClearance)
+        keys = {}
+        todo = []
+        for params in variants:
+            if "error" not in params:
+                key = antGen.antKey(params, options)
+                if antGen.cacheHit(outdir, index, params, key, formats):
+                    hits += 1
+                    continue
+                keys[params["modulename"]] = key
+            todo.append(params)
+        variants = todo
+    if chunksize is None:
+        chunksize = max(1, len(variants) // (workers*4))
+    jobs = [ (outdir, params, deterministic, drc, drcClearance, formats, polygon) for params in variants ]
+    if workers <= 1:
+        results = [ genVariant(job) for job in jobs ]
+    else:
+        from multiprocessing import Pool
+        with Pool(workers) as pool:
+            results = list(pool.imap_unordered(genVariant, jobs, chunksize))
+    if cache:
+        # only the parent writes the index, the workers only write footprints
+        for name, err in results:
+            if err is None:
+                index[name] = keys[name]
+            else:
+                index.pop(name, None)
+        antGen.saveCacheIndex(outdir, index)
+    return results, hits
+
+# -----------------------------------------------------------------------------
+#    M A I N
+# -----------------------------------------------------------------------------
+
+def main(args):
+    parser=argparse.ArgumentParser(description="generate a library of nfc antennas from a parameter table or sweep specification")
+    parser.add_argument("table"                ,                                                help="parameter table (.csv, .json, .yaml) or sweep specification (.json, .yaml)")
+    parser.add_argument("-o", "--outdir"       ,           default="./nfc_ant.pretty"         , help="output directory, will be set to ./nfc_ant.pretty if not provided")
+    parser.add_argument("-j", "--workers"      , type=int, default=None                       , help="number of worker processes, will be set to the number of cpus if not provided")
+    parser.add_argument("-k", "--chunksize"    , type=int, default=None                       , help="number of variants handed to a worker at once, calculated from the number of variants if not provided")
+    parser.add_argument("-D", "--deterministic",           action="store_true"                , help="output only depends on the parameters, see antGen.py -h")
+    parser.add_argument("-C", "--cache"        ,           action="store_true"                , help="skip variants whose parameters did not change since the last run, see antGen.py -h")
+    parser.add_argument("-r", "--drcClearance" , type=float, default=None                     , help="minimal clearance in mm for the design rule check before writing, see antGen.py -h")
+    parser.add_argument("-x", "--noDrc"        ,           action="store_true"                , help="skip the design rule check, write variants even if they are broken")
+    parser.add_argument("-F", "--format"       ,           action="append"                    , help="output format, can be given several times, see antGen.py -h. will be set to kicad5 if not provided", choices=["kicad5","kicad6","kicad7","kicad8","svg","dxf","gerber"])
+    parser.add_argument("-p", "--polygon"      ,           default=None                       , help="copper of each pad as one polygon with mitred or chamfered corners, see antGen.py -h", choices=["miter","chamfer"])
+    parser.add_argument("-S", "--store"        ,           default=None                       , help="also write parameters and metrics of all variants to this columnar store (directory or .npz), see antStore.py -h")
+    parser.add_argument("-N", "--name"         ,           default=c_nameTemplate             , help="template for the modulename of rows without modulename, will be set to '%s' if not provided" % (c_nameTemplate.replace("%", "%%")))
+    args=parser.parse_args(args)
+
+    try:
+        variants = makeVariants(loadTable(args.table), args.name)
+    except ValueError as e:
+        print("ERROR: %s" % (e))
+        return 1
+    names = [ v["modulename"] for v in variants ]
+    if len(set(names)) != len(names):
+        print("WARNING: modulenames are not unique, some variants will overwrite each other!")
+
+    formats = args.format or ["kicad5"]
+    try:
+        antGen.exportPaths(args.outdir, "x", formats)
+    except ValueError as e:
+        print("ERROR: %s" % (e))
+        return 1
+
+    t0 = time.perf_counter()
+    results, hits = runBatch(variants, args.outdir, args.workers, args.chunksize, args.deterministic, args.cache, not args.noDrc, args.drcClearance, formats, args.polygon)
+    dt = time.perf_counter() - t0
+
+    failed = [ (name, err) for name, err in results if err is not None ]
+    for name, err in failed:
+        print("FAILED: %s: %s" % (name, err))
+    done = len(results) - len(failed)
+    print("generated %d of %d footprints in %.3f s (%.1f footprints/s), %d failed" % (done, len(results), dt, done/dt if dt > 0 else 0, len(failed)))
+    if args.cache:
+        # variants which could not be read were not looked up
+        misses = sum(1 for v in variants if "error" not in v) - hits
+        print("cache: %d hits, %d misses" % (hits, misses))
+    if args.store:
+        import antStore
+        generated = { name: err is None for name, err in results }
+        columns = antStore.variantColumns(variants, generated)
+        antStore.saveStore(args.store, columns)
+        print("store: %d designs written to %s" % (len(columns["turns"]), args.store))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,160 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    N F C   A N T E N N A   G E N E R A T O R   -   D E S I G N   R U L E S
+# ---------------------------------------------------------------------------
+#
+# checks the geometry of antGeom.py before it is written:
+#   - every segment has to go in its nominal direction with a length > 0.
+#     when the outline is too small for the number of turns, the inner segments
+#     get a negative length and the coil crosses itself
+#   - copper which is not connected directly has to keep a minimal clearance.
+#     the copper is the chain pad 1 - spiral - stub - pad 2 (pads are circles
+#     with the conductor width as diameter); neighbours in this chain touch by
+#     design, all other pairs are checked. this catches turns which are too
+#     close (e.g. the slope of style 2/3 violating minimalConductorSpace) and
+#     pad 2 touching the spiral ("pad near pad" on the wrong trace)
+#
+# pairs are found with a sweep line over x on the bounding boxes (grown by half
+# the interaction distance). the long sides of a coil are thin in y and kept
+# sorted by y, so every item only meets its real neighbours; the sides parallel
+# to the sweep line are active only for a short time. "thin" means no higher
+# than the highest slope (about one pitch), not a multiple of the clearance,
+# so a small clearance does not make the slopes tall. only pairs whose boxes
+# overlap are measured, the check scales (nearly) linearly with the number of
+# segments.
+#
+# ---------------------------------------------------------------------------
+
+import bisect, heapq
+import numpy as np
+import antGeom
+
+# tolerance for the clearance check, the coordinates are only exact to the float rounding
+c_tolerance = 1e-6   # [mm]
+
+def defaultClearance(condSpace, condSpaceMin, style):
+    # clearance the antenna is designed for: conductorSpace, on the slope of style 2 minimalConductorSpace
+    if style == 2:
+        return condSpace/np.sqrt(2) if condSpaceMin < 0 else min(condSpace, condSpaceMin)
+    return condSpace
+
+def copperItems(geom):
+    # copper of a single antGeom.AntGeometry in the order of the current path: pad 1, spiral, stub, pad 2.
+    # pads are segments of length 0. returns start (N,2), end (N,2), width (N,) in absolute coordinates
+    start, end = antGeom.pathSegments(geom)
+    padWidth = geom.width[0]
+    start = np.concatenate([ geom.padPos[0:1], start, geom.padPos[1:2] ])
+    end = np.concatenate([ geom.padPos[0:1], end, geom.padPos[1:2] ])
+    width = np.concatenate([ [padWidth], geom.width, [padWidth] ])
+    return start, end, width
+
+def candidatePairs(start, end, reach):
+    # pairs (i, j), i < j, whose bounding boxes grown by reach/2 overlap, found with a sweep line over x
+    n = len(start)
+    lo = np.minimum(start, end) - reach[:, None]/2
+    hi = np.maximum(start, end) + reach[:, None]/2
+    height = hi[:, 1] - lo[:, 1]
+    # the slopes of style 2/3 are about one pitch (conductor width + space) high and, in style 2,
+    # stacked at the same x. as tall items they would all be active at once, so everything up to the
+    # highest slope counts as thin, independent of the clearance
+    sloped = (start[:, 0] != end[:, 0]) & (start[:, 1] != end[:, 1])
+    thin = float(max(4*reach.max(), height[sloped].max(initial=0.0)))
+    loX, loY, hiX, hiY = lo[:, 0].tolist(), lo[:, 1].tolist(), hi[:, 0].tolist(), hi[:, 1].tolist()
+    isThin = (height <= thin).tolist()
+
+    # active items (their x range contains the sweep line): items which are thin in y are kept
+    # sorted by their lower y, so only the few items near the current one are looked at. the
+    # others (in a coil: the sides parallel to the sweep line) are short in x and therefore few
+    activeThin = []         # sorted list of (loY, i)
+    activeTall = set()
+    leave = []              # heap of (hiX, i)
+    pairs = []
+    for i in sorted(range(n), key=loX.__getitem__):
+        x = loX[i]
+        while leave and leave[0][0] < x:
+            _, k = heapq.heappop(leave)
+            if isThin[k]:
+                del activeThin[bisect.bisect_left(activeThin, (loY[k], k))]
+            else:
+                activeTall.discard(k)
+        y0, y1 = loY[i], hiY[i]
+        for p in range(bisect.bisect_left(activeThin, (y0 - thin, -1)), bisect.bisect_right(activeThin, (y1, n))):
+            k = activeThin[p][1]
+            if hiY[k] >= y0:
+                pairs.append((k, i) if k < i else (i, k))
+        for k in activeTall:
+            if loY[k] <= y1 and hiY[k] >= y0:
+                pairs.append((k, i) if k < i else (i, k))
+        if isThin[i]:
+            bisect.insort(activeThin, (y0, i))
+        else:
+            activeTall.add(i)
+        heapq.heappush(leave, (hiX[i], i))
+    return np.array(pairs, dtype=np.intp).reshape(-1, 2)
+
+def _pointSegmentDistance(p, a, b):
+    ab = b - a
+    ll = (ab*ab).sum(axis=-1)
+    t = np.where(ll > 0, ((p - a)*ab).sum(axis=-1)/np.where(ll > 0, ll, 1), 0.0)
+    t = np.clip(t, 0, 1)
+    q = a + t[..., None]*ab
+    return np.hypot(p[..., 0] - q[..., 0], p[..., 1] - q[..., 1])
+
+def segmentDistance(a0, a1, b0, b1):
+    # minimal distance of the segments a0-a1 and b0-b1 (arrays (N,2)), 0 if they cross
+    def orient(p, q, r):
+        return (q[:, 0]-p[:, 0])*(r[:, 1]-p[:, 1]) - (q[:, 1]-p[:, 1])*(r[:, 0]-p[:, 0])
+    d1 = orient(a0, a1, b0)
+    d2 = orient(a0, a1, b1)
+    d3 = orient(b0, b1, a0)
+    d4 = orient(b0, b1, a1)
+    cross = (d1*d2 < 0) & (d3*d4 < 0)
+    d = np.minimum(np.minimum(_pointSegmentDistance(a0, b0, b1), _pointSegmentDistance(a1, b0, b1)),
+                   np.minimum(_pointSegmentDistance(b0, a0, a1), _pointSegmentDistance(b1, a0, a1)))
+    return np.where(cross, 0.0, d)
+
+def itemName(i, n):
+    # name of copper item i of n for messages
+    if i == 0:
+        return "pad 1"
+    if i == n-1:
+        return "pad 2"
+    if i == n-2:
+        return "stub of pad 2"
+    return "segment %d" % (i-1)
+
+def checkGeometry(geom, clearance):
+    # returns a list of violations (strings), empty if the geometry is ok
+    violations = []
+    ok = antGeom.segmentsOk(geom)
+    length = antGeom.segmentLength(geom)
+    for i in np.nonzero(~ok)[0].tolist():
+        name = "stub of pad 2" if geom.kind[i] == antGeom.KIND_STUB else "segment %d" % (i)
+        violations.append("%s has a length of %f mm against its direction, the outline is too small for the number of turns" %
+                          (name, -length[i]))
+    if violations:
+        # clearances of a crossed coil are meaningless
+        return violations
+
+    start, end, width = copperItems(geom)
+    n = len(start)
+    pairs = candidatePairs(start, end, width + clearance)
+    pairs = pairs[pairs[:, 1] - pairs[:, 0] > 1]        # neighbours in the chain touch by design
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+    i, j = pairs[:, 0], pairs[:, 1]
+    gap = segmentDistance(start[i], end[i], start[j], end[j]) - (width[i] + width[j])/2
+    bad = gap < clearance - c_tolerance
+    for a, b, g in zip(i[bad].tolist(), j[bad].tolist(), gap[bad].tolist()):
+        violations.append("clearance between %s and %s is %f mm < %f mm" % (itemName(a, n), itemName(b, n), g, clearance))
+    return violations
+
+def checkAnt(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style, clearance=None):
+    # design rule check of an antenna with the parameters of antGen.genAnt, clearance defaults to defaultClearance()
+    if clearance is None:
+        clearance = defaultClearance(condSpace, condSpaceMin, style)
+    try:
+        geom = antGeom.antGeometry(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style)
+    except ValueError as e:
+        return [ str(e) ]
+    return checkGeometry(geom, clearance)
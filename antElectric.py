@@ -0,0 +1,274 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    N F C   A N T E N N A   G E N E R A T O R   -   E L E C T R I C A L
+# ---------------------------------------------------------------------------
+#
+# usage: ./antElectric.py -h
+#
+# losses, parasitic capacitance, self resonance and quality factor of the
+# antennas generated by antGen.py, at the carrier frequency (13.56 MHz by
+# default). everything is vectorized over the designs, the trace length comes
+# from the geometry of antGeom.py, which is evaluated in blocks.
+#
+# models (all lengths in mm, results in SI units):
+#   dc resistance   rho*length/(conductorWidth*copperThickness)
+#   skin effect     the current flows in a layer of the skin depth,
+#                   R = Rdc*t/(delta*(1-exp(-t/delta))) (C. P. Yue, S. S. Wong,
+#                   "Physical Modeling of Spiral Inductors on Silicon", 2000)
+#   proximity       eddy currents in every turn induced by the field of the other
+#                   turns. the field perpendicular to turn k of a flat winding of
+#                   line currents with pitch p = w+s is H = I/(2*pi*p)*S_k,
+#                   S_k = sum_j!=k 1/(k-j); the mean of S_k^2 over the turns makes
+#                   the factor grow with the number of turns (0 for a single turn).
+#                   the loss of a thin strip of width w in a perpendicular field,
+#                   relative to its own loss, is (H*w/I)^2*phi(w/lambda) with the
+#                   screening length lambda = 2*rho/(omega*mu0*t): phi = v^2/3
+#                   below fcrit (the strip is transparent, the f^2 law of W. B. Kuhn,
+#                   N. M. Ibrahim, "Analysis of Current Crowding Effects in Multiturn
+#                   Spiral Inductors", 2001), phi = 2*ln(v) + const far above, where
+#                   the strip screens the field and the current crowds at its edges.
+#                   both limits are joined at v = sqrt(3) with the same slope.
+#                   R = Rskin*(1 + (w/p)^2*mean(S_k^2)/(4*pi^2)*phi). at 13.56 MHz
+#                   pcb coils are far above fcrit (some 100 kHz). the field of the
+#                   opposite sides of the coil is left out, the outline is much
+#                   larger than the winding
+#   capacitance     neighbouring turns are coplanar strips on a substrate of
+#                   thickness h with air above (conformal mapping, K. C. Gupta
+#                   et al., "Microstrip Lines and Slotlines"; the ratio of the
+#                   elliptic integrals after Hilberg) plus the parallel plate
+#                   between the copper side walls. with a linear voltage along
+#                   the coil the voltage between neighbouring turns is V/turns,
+#                   the gaps together act as C = C'*length*(turns-1)/turns/turns^2
+#   resonance       SRF = 1/(2*pi*sqrt(L*C))
+#   quality factor  Q = w*L/R*(1 - R^2*C/L - w^2*L*C) at the carrier, 0 above the
+#                   self resonance
+# the inductance is one of the models of antInductance.py, the closed form
+# "wheeler" by default; "segments" is exact but much slower.
+#
+# from python:
+#
+#   res = antElectric.characterize(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style,
+#                                  thickness=0.035, epsR=4.4, substrate=1.6, workers=4)
+#   res["q"], res["srf"], ...
+#
+# ---------------------------------------------------------------------------
+
+import sys, argparse, time, math
+import numpy as np
+import antGeom, antInductance
+
+MU0 = antInductance.MU0             # [H/m]
+EPS0 = 8.8541878128e-12             # [F/m]
+
+c_copperResistivity = 1.72e-8       # [Ohm*m] - resistivity of copper at 20 degC
+c_frequency = 13.56e6               # [Hz]    - carrier frequency
+c_epsR = 4.4                        # [-]     - relative permittivity of the substrate (FR4)
+c_substrateThickness = 1.6          # [mm]
+
+# designs per job of the process pool
+c_chunk = 20000
+
+# results of characterize(), name and unit
+c_results = [ ("traceLength", "mm"), ("inductance", "H"), ("rdc", "Ohm"), ("rac", "Ohm"), ("capacitance", "F"), ("srf", "Hz"), ("q", "-") ]
+
+def skinDepth(frequency, resistivity=c_copperResistivity):
+    # [m]
+    return np.sqrt(resistivity/(np.pi*np.asarray(frequency)*MU0))
+
+def resistanceDc(length, condWidth, thickness, resistivity=c_copperResistivity):
+    # dc resistance of a trace, length etc. in mm
+    return resistivity*np.asarray(length)/(np.asarray(condWidth)*np.asarray(thickness))*1e3
+
+def windingField(turns):
+    # mean of S_k^2 over the turns k of a flat winding, S_k = sum_j!=k 1/(k-j) = H(k-1) - H(turns-k) with the
+    # harmonic numbers H. the field of the other turns perpendicular to turn k is I/(2*pi*pitch)*S_k
+    turns = np.asarray(turns, dtype=np.int64)
+    values = np.zeros(turns.shape)
+    n = np.unique(turns[turns > 1])
+    if len(n):
+        harmonic = np.concatenate([ [0.0], np.cumsum(1/np.arange(1, n[-1])) ])
+        for m in n:
+            k = np.arange(1, m+1)
+            values[turns == m] = np.mean((harmonic[k-1] - harmonic[m-k])**2)
+    return values
+
+def _stripEddy(v):
+    # eddy loss of a thin strip of width w in a perpendicular field H, relative to its own loss over (H*w/I)^2.
+    # v = w/lambda, v^2/3 without screening (low frequency), 2*ln(v) + const with screening, joined at v = sqrt(3)
+    v = np.asarray(v, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(v <= math.sqrt(3), v*v/3, 1 + 2*np.log(v/math.sqrt(3)))
+
+def resistanceAc(rdc, turns, condWidth, condSpace, thickness, frequency=c_frequency, resistivity=c_copperResistivity):
+    # resistance at frequency with skin and proximity effect
+    t = np.asarray(thickness)*1e-3
+    w = np.asarray(condWidth)*1e-3
+    s = np.asarray(condSpace)*1e-3
+    delta = skinDepth(frequency, resistivity)
+    skin = t/(delta*(1 - np.exp(-t/delta)))
+    screening = 2*resistivity/(2*np.pi*frequency*MU0*t)
+    field = (w/(w + s))**2*windingField(turns)/(4*np.pi**2)
+    proximity = 1 + field*_stripEddy(w/screening)
+    return rdc*skin*proximity
+
+def _ellipticRatio(k):
+    # K(k)/K(k') with k' = sqrt(1-k^2), Hilberg's approximation (relative error < 3e-6)
+    k = np.asarray(k, dtype=float)
+    kp = np.sqrt(1 - k*k)
+    with np.errstate(divide="ignore"):
+        small = np.pi/np.log(2*(1 + np.sqrt(kp))/(1 - np.sqrt(kp)))
+        large = np.log(2*(1 + np.sqrt(k))/(1 - np.sqrt(k)))/np.pi
+    return np.where(k <= math.sqrt(0.5), small, large)
+
+def _sinhRatio(a, b):
+    # sinh(a)/sinh(b) for 0 < a < b without overflow
+    return np.exp(a - b)*(-np.expm1(-2*a))/(-np.expm1(-2*b))
+
+def capacitancePerLength(condWidth, condSpace, thickness, epsR=c_epsR, substrate=c_substrateThickness):
+    # [F/m] between two neighbouring turns: coplanar strips on the substrate plus the copper side walls
+    w = np.asarray(condWidth, dtype=float)
+    s = np.asarray(condSpace, dtype=float)
+    k = s/(s + 2*w)
+    k1 = _sinhRatio(np.pi*s/(4*substrate), np.pi*(s + 2*w)/(4*substrate))
+    epsEff = 1 + (epsR - 1)/2*_ellipticRatio(k1)/_ellipticRatio(k)
+    return EPS0*epsEff/_ellipticRatio(k) + EPS0*np.asarray(thickness)/s
+
+def interTurnCapacitance(turns, traceLength, condWidth, condSpace, thickness, epsR=c_epsR, substrate=c_substrateThickness):
+    # [F] parasitic capacitance of the coil, the turns side by side over traceLength*(turns-1)/turns
+    n = np.asarray(turns, dtype=float)
+    gaps = np.asarray(traceLength)*1e-3*(n - 1)/n
+    return capacitancePerLength(condWidth, condSpace, thickness, epsR, substrate)*gaps/(n*n)
+
+def selfResonance(inductance, capacitance):
+    # [Hz], inf without capacitance
+    with np.errstate(divide="ignore"):
+        return 1/(2*np.pi*np.sqrt(inductance*capacitance))
+
+def qualityFactor(inductance, resistance, capacitance, frequency=c_frequency):
+    # of the coil with its parasitic capacitance, 0 above the self resonance
+    w = 2*np.pi*frequency
+    q = w*inductance/resistance*(1 - resistance**2*capacitance/inductance - w*w*inductance*capacitance)
+    return np.maximum(q, 0.0)
+
+def _characterizeChunk(job):
+    return characterize(*job)
+
+def characterize( turns,                                    # [#]
+                  antLength,                                # [mm]
+                  antWidth,                                 # [mm]
+                  condWidth,                                # [mm]
+                  condSpace,                                # [mm]
+                  condSpaceMin,                             # [mm]
+                  style,                                    # [-]
+                  thickness=antInductance.c_copperThickness, # [mm]
+                  epsR=c_epsR,                              # [-]
+                  substrate=c_substrateThickness,           # [mm]
+                  frequency=c_frequency,                    # [Hz]
+                  model="wheeler",                          # [-]   - inductance model, see antInductance.c_methods
+                  workers=1 ):
+    # electrical values of many designs, all parameters are broadcast against each other.
+    # returns a dict with the arrays of c_results, designs which can not be drawn get nan.
+    # with workers > 1 the designs are split into chunks of c_chunk over a process pool
+    turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style = [ np.atleast_1d(a).ravel() for a in np.broadcast_arrays(
+        np.asarray(turns, dtype=np.int64), np.asarray(antLength, dtype=float), np.asarray(antWidth, dtype=float),
+        np.asarray(condWidth, dtype=float), np.asarray(condSpace, dtype=float), np.asarray(condSpaceMin, dtype=float),
+        np.asarray(style, dtype=np.int64)) ]
+    if model not in antInductance.c_methods:
+        raise ValueError("unknown inductance method '%s', use one of %s" % (model, ", ".join(antInductance.c_methods)))
+    n = len(turns)
+    if workers > 1 and n > c_chunk:
+        from multiprocessing import Pool
+        chunks = np.array_split(np.arange(n), -(-n//c_chunk))
+        jobs = [ (turns[c], antLength[c], antWidth[c], condWidth[c], condSpace[c], condSpaceMin[c], style[c],
+                  thickness, epsR, substrate, frequency, model) for c in chunks ]
+        with Pool(min(workers, len(jobs))) as pool:
+            results = pool.map(_characterizeChunk, jobs)
+        return { name: np.concatenate([ r[name] for r in results ]) for name, _ in c_results }
+
+    length = np.full(n, np.nan)
+    L = np.full(n, np.nan)
+    for rows, geom in antGeom.geometryBlocks(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style):
+        ok = antGeom.segmentsOk(geom).all(axis=1)
+        length[rows] = np.where(ok, np.where(geom.valid, antGeom.segmentLength(geom), 0.0).sum(axis=1), np.nan)
+        if model == "segments":
+            L[rows] = np.where(ok, antInductance.inductanceSegmentsBatch(geom, thickness), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # the closed forms are evaluated for the designs which can not be drawn as well, they are masked
+        if model == "wheeler":
+            L = np.where(np.isnan(length), np.nan, antInductance.inductanceWheeler(turns, antLength, antWidth, condWidth, condSpace))
+        elif model == "currentsheet":
+            L = np.where(np.isnan(length), np.nan, antInductance.inductanceCurrentSheet(turns, antLength, antWidth, condWidth, condSpace))
+
+    rdc = resistanceDc(length, condWidth, thickness)
+    rac = resistanceAc(rdc, turns, condWidth, condSpace, thickness, frequency)
+    C = interTurnCapacitance(turns, length, condWidth, condSpace, thickness, epsR, substrate)
+    return { "traceLength": length, "inductance": L, "rdc": rdc, "rac": rac, "capacitance": C,
+             "srf": selfResonance(L, C), "q": qualityFactor(L, rac, C, frequency) }
+
+# -----------------------------------------------------------------------------
+#    M A I N
+# -----------------------------------------------------------------------------
+
+def mainTable(args):
+    # electrical values of all designs of a parameter table / sweep specification as csv
+    import antBatch, antStore
+    table = antBatch.loadTable(args.table)
+    try:
+        params = antStore.sweepParameters(table) if isinstance(table, dict) else antStore.tableParameters(antBatch.makeVariants(table))
+    except ValueError as e:
+        print("ERROR: %s" % (e))
+        return 1
+    t0 = time.perf_counter()
+    res = characterize(params["turns"], params["antennaLength"], params["antennaWidth"], params["conductorWidth"], params["conductorSpace"],
+                       params["minimalConductorSpace"], params["style"], args.copperThickness, args.epsR, args.substrateThickness,
+                       args.frequency*1e6, args.inductance, args.workers)
+    dt = time.perf_counter() - t0
+    names = [ "turns", "antennaLength", "antennaWidth", "conductorWidth", "conductorSpace", "minimalConductorSpace", "style" ]
+    columns = [ params[k] for k in names ] + [ res[k] for k, _ in c_results ]
+    with (open(args.output, 'w') if args.output else sys.stdout) as f:
+        f.write(",".join(names + [ "%s [%s]" % (k, unit) for k, unit in c_results ]) + "\n")
+        for i in range(0, len(columns[0]), 10000):
+            text = [ [ "%g" % (v) for v in c[i:i+10000].tolist() ] for c in columns ]
+            f.writelines(",".join(values) + "\n" for values in zip(*text))
+    print("%d designs characterized in %.3f s" % (len(columns[0]), dt), file=sys.stderr)
+    return 0
+
+def main(args):
+    parser=argparse.ArgumentParser(description="resistance, parasitic capacitance, self resonance and Q of nfc antennas generated by antGen.py")
+    parser.add_argument("-n", "--turns"                , type=int  , default=3      , help="number of turns, will be set to 3 if not provided")
+    parser.add_argument("-l", "--antennaLength"        , type=float, default=75.4   , help="lenght of antenna in mm (outer copper dimension), will be set to 75.4 if not provided")
+    parser.add_argument("-w", "--antennaWidth"         , type=float, default=33.5   , help="width of antenna in mm (outer copper dimension), will be set to 33.5 if not provided")
+    parser.add_argument("-c", "--conductorWidth"       , type=float, default=2.7    , help="width of conductor in mm, will be set to 2.7 if not provided")
+    parser.add_argument("-s", "--conductorSpace"       , type=float, default=1.7    , help="space between the conductors in mm, will be set to 1.7 if not provided")
+    parser.add_argument("-a", "--minimalConductorSpace", type=float, default=-1     , help="minimal conductor space in mm (style 2), will be set to -1 (auto) if not provided")
+    parser.add_argument("-t", "--style"                , type=int  , default=1      , help="style 1, 2 or 3, will be set to 1 if not provided", choices=[1,2,3])
+    parser.add_argument("-k", "--copperThickness"      , type=float, default=antInductance.c_copperThickness, help="copper thickness in mm, will be set to %g if not provided" % (antInductance.c_copperThickness))
+    parser.add_argument("-e", "--epsR"                 , type=float, default=c_epsR , help="relative permittivity of the substrate, will be set to %g (FR4) if not provided" % (c_epsR))
+    parser.add_argument("-H", "--substrateThickness"   , type=float, default=c_substrateThickness, help="substrate thickness in mm, will be set to %g if not provided" % (c_substrateThickness))
+    parser.add_argument("-F", "--frequency"            , type=float, default=c_frequency/1e6, help="carrier frequency in MHz, will be set to %g if not provided" % (c_frequency/1e6))
+    parser.add_argument("-i", "--inductance"           ,             default="wheeler", help="inductance model, will be set to wheeler if not provided", choices=antInductance.c_methods)
+    parser.add_argument("-T", "--table"                ,                                help="parameter table or sweep specification (see antBatch.py), print the values of all designs as csv")
+    parser.add_argument("-o", "--output"               ,                                help="with --table: write the csv to this file instead of stdout")
+    parser.add_argument("-j", "--workers"              , type=int  , default=1      , help="with --table: number of worker processes for more than %d designs, will be set to 1 (in process, usually the fastest) if not provided" % (c_chunk))
+    args=parser.parse_args(args)
+
+    if args.table:
+        return mainTable(args)
+    res = characterize(args.turns, args.antennaLength, args.antennaWidth, args.conductorWidth, args.conductorSpace, args.minimalConductorSpace,
+                       args.style, args.copperThickness, args.epsR, args.substrateThickness, args.frequency*1e6, args.inductance)
+    res = { k: float(v[0]) for k, v in res.items() }
+    if math.isnan(res["traceLength"]):
+        print("ERROR: the antenna can not be drawn, the outline is too small for the number of turns")
+        return 1
+    print("trace length:          %10.2f mm" % (res["traceLength"]))
+    print("inductance (%s): %s%10.4f uH" % (args.inductance, " "*max(0, 10-len(args.inductance)), res["inductance"]*1e6))
+    print("dc resistance:         %10.4f Ohm" % (res["rdc"]))
+    print("ac resistance:         %10.4f Ohm at %g MHz, skin depth %.1f um" % (res["rac"], args.frequency, skinDepth(args.frequency*1e6)*1e6))
+    print("capacitance:           %10.4f pF" % (res["capacitance"]*1e12))
+    print("self resonance:        %10.2f MHz" % (res["srf"]/1e6))
+    print("Q:                     %10.2f at %g MHz" % (res["q"], args.frequency))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
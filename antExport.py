@@ -0,0 +1,439 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    N F C   A N T E N N A   G E N E R A T O R   -   E X P O R T E R S
+# ---------------------------------------------------------------------------
+#
+# output formats of antGen.py. a footprint is described once as a stream of
+# items (footprintItems()), built from the geometry of antGeom.py:
+#
+#   Module  name, outline and conductor width, always the first item
+#   Text    reference and value text
+#   Line    silk screen / fab lines
+#   Pad     one custom pad with its copper segments (relative to the pad), or
+#           its copper as one polygon (see antGeom.padPolygons())
+#
+# an exporter turns every item into lines of text of its format. the items are
+# produced only once, export() hands each item to all exporters at once and
+# every exporter writes straight into its own file, so several formats cost a
+# single pass over the geometry and no format is held in memory.
+#
+# formats (FORMATS, a new one is a subclass of Exporter added there):
+#   kicad5   legacy (module ...) with gr_line primitives, as antGen.py always wrote it
+#   kicad6   (footprint ...) for KiCad 6, can be read by 7 and 8 as well
+#   kicad7   (footprint ...) for KiCad 7
+#   kicad8   (footprint ...) for KiCad 8
+#   svg      preview, KiCad like colors
+#   dxf      AutoCAD R12 DXF in mm, copper as polylines with width, pads and drills as circles
+#   gerber   RS-274X (X2) top copper layer in mm, pads are flashed, traces drawn with a round aperture
+#
+# kicad coordinates have y pointing down, dxf and gerber have y pointing up,
+# they are mirrored at the x axis.
+#
+# ---------------------------------------------------------------------------
+
+import collections, itertools
+
+Module = collections.namedtuple("Module", [
+    "name",         # [-]   modulename
+    "seconds",      # [s]   time stamp (tedit)
+    "antLength",    # [mm]  outer copper dimension
+    "antWidth",     # [mm]  outer copper dimension
+    "condWidth",    # [mm]  width of conductor and pads
+    "drillSize",    # [mm]  drill of the pads, 0: smd
+    "silkMargin",   # [mm]  margin of silk outline, < 0: no outline
+    "version",      # [-]   version of the generator
+])
+
+Text = collections.namedtuple("Text", [ "kind", "text", "x", "y", "layer" ])   # kind: "reference" or "value"
+
+Line = collections.namedtuple("Line", [ "layer", "x0", "y0", "x1", "y1", "width" ])
+
+Pad = collections.namedtuple("Pad", [
+    "number",       # [-]   1 or 2
+    "x", "y",       # [mm]  absolute position
+    "size",         # [mm]  diameter
+    "drill",        # [mm]  0: smd
+    "start",        # [mm]  array (N,2) of the segment starts, relative to the pad
+    "end",          # [mm]  array (N,2)
+    "width",        # [mm]  width of the segments
+    "polygon",      # [mm]  None: copper as segments, else array (K,2) of the copper outline, relative to the pad
+])
+
+c_silkWidth = 0.15  # [mm]
+c_block     = 4096  # [-]   points converted to python floats at once, a pad is never one big python list
+
+def _points(a):
+    # (x, y) of the rows of an array (N,2) as python floats (exact, so %f formats them as before).
+    # every block is one flat list, there is no python list per row
+    def block(i):
+        xy = iter(a[i:i+c_block].ravel().tolist())
+        return zip(xy, xy)
+    return itertools.chain.from_iterable(map(block, range(0, len(a), c_block)))
+
+def _segments(p):
+    # (x0, y0, x1, y1) of the segments of a pad
+    def block(i):
+        start, end = iter(p.start[i:i+c_block].ravel().tolist()), iter(p.end[i:i+c_block].ravel().tolist())
+        return zip(start, start, end, end)
+    return itertools.chain.from_iterable(map(block, range(0, len(p.start), c_block)))
+
+def footprintItems(geom, name, seconds, antLength, antWidth, condWidth, condSpace, drillSize, silkMargin, turns, version, polygons=None):
+    # items of the footprint of an antGeom.AntGeometry, drillSize is already resolved (>= 0).
+    # polygons: copper outline of every pad (antGeom.padPolygons()), None for segments
+    yield Module(name, seconds, antLength, antWidth, condWidth, drillSize, silkMargin, version)
+    yield Text("reference", "REF**", antLength/2, antWidth/2, "F.SilkS")
+    yield Text("value", name, antLength/2, antWidth/2+2, "F.Fab")
+    if silkMargin >= 0:
+        # show outline on top silk
+        m = silkMargin
+        c = turns*(condWidth+condSpace)-condSpace+silkMargin   # length of the corner marks
+        yield Line("F.SilkS", -m, -m, antLength+m, -m, c_silkWidth)                          # t
+        yield Line("F.SilkS", antLength+m, -m, antLength+m, antWidth+m, c_silkWidth)         # r
+        yield Line("F.SilkS", antLength+m, antWidth+m, -m, antWidth+m, c_silkWidth)          # b
+        yield Line("F.SilkS", -m, antWidth+m, -m, -m, c_silkWidth)                           # l
+        # mark only corners on bottom silk
+        yield Line("B.SilkS", -m, -m, c, -m, c_silkWidth)                                    # tl -> right
+        yield Line("B.SilkS", -m, -m, -m, c, c_silkWidth)                                    # tl -> down
+        yield Line("B.SilkS", antLength+m, -m, antLength-c, -m, c_silkWidth)                 # tr -> left
+        yield Line("B.SilkS", antLength+m, -m, antLength+m, c, c_silkWidth)                  # tr -> down
+        yield Line("B.SilkS", antLength+m, antWidth+m, antLength-c, antWidth+m, c_silkWidth) # br -> left
+        yield Line("B.SilkS", antLength+m, antWidth+m, antLength+m, antWidth-c, c_silkWidth) # br -> up
+        yield Line("B.SilkS", -m, antWidth+m, c, antWidth+m, c_silkWidth)                    # bl -> right
+        yield Line("B.SilkS", -m, antWidth+m, -m, antWidth-c, c_silkWidth)                   # bl -> up
+    padPos = geom.padPos.tolist()
+    for pad in (0, 1):
+        sel = (geom.pad == pad)
+        x, y = padPos[pad]
+        yield Pad(pad+1, x, y, condWidth, drillSize, geom.start[sel], geom.end[sel], condWidth,
+                  polygons[pad] if polygons is not None else None)
+
+def _same(*values):
+    return values
+
+class Exporter:
+    # base class of the formats: one method per item type, each returns an iterable of lines.
+    # numbers are formatted through self.n(...), which is deterministic: numbers which would be written
+    # as -0.000000 (rounding noise) are written as 0.000000. user text is never changed
+    extension = None
+    digits = 6      # decimals of the numbers, see n()
+
+    def __init__(self, deterministic=False):
+        self.n = self._positiveZero if deterministic else _same
+
+    def _positiveZero(self, *values):
+        # rounded as the format does it (%f rounds the same way), + 0.0 turns -0.0 into 0.0
+        return tuple(round(v, self.digits) + 0.0 for v in values)
+
+    def module(self, item):
+        return ()
+
+    def text(self, item):
+        return ()
+
+    def line(self, item):
+        return ()
+
+    def pad(self, item):
+        return ()
+
+    def end(self):
+        return ()
+
+    def lines(self, item):
+        if isinstance(item, Pad):
+            return self.pad(item)
+        if isinstance(item, Line):
+            return self.line(item)
+        if isinstance(item, Text):
+            return self.text(item)
+        return self.module(item)
+
+def _quote(s):
+    return '"%s"' % (str(s).replace("\\", "\\\\").replace('"', '\\"'))
+
+class KiCad5Exporter(Exporter):
+    extension = ".kicad_mod"
+
+    def module(self, m):
+        yield "(module %s (layer F.Cu) (tedit %X)\n" % (m.name, m.seconds)
+
+    def text(self, t):
+        yield "  (fp_text %s %s (at %f %f) (layer %s)\n" % ((t.kind, t.text) + self.n(t.x, t.y) + (t.layer,))
+        yield "    (effects (font (size 1 1) (thickness 0.15)))\n"
+        yield "  )\n"
+
+    def line(self, l):
+        yield "  (fp_line (start %f %f) (end %f %f) (layer %s) (width %g))\n" % (self.n(l.x0, l.y0, l.x1, l.y1) + (l.layer, l.width))
+
+    def pad(self, p):
+        if p.drill > 0:
+            yield "  (pad %d thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % ((p.number,) + self.n(p.x, p.y, p.size, p.size, p.drill))
+        yield "  (pad %d smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % ((p.number,) + self.n(p.x, p.y, p.size, p.size))
+        yield "    (zone_connect 0)\n"
+        yield "    (options (clearance outline) (anchor circle))\n"
+        yield "    (primitives\n"
+        if p.polygon is not None:
+            yield "      (gr_poly (pts\n"
+            for x, y in _points(p.polygon):
+                yield "        (xy %f %f)\n" % self.n(x, y)
+            yield "      ) (width 0))\n"
+        else:
+            for x0, y0, x1, y1 in _segments(p):
+                yield "      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % self.n(x0, y0, x1, y1, p.width)
+        yield "    ))\n"
+
+    def end(self):
+        yield ")\n"
+
+class KiCad6Exporter(Exporter):
+    extension = ".kicad_mod"
+    fileVersion = 20211014
+    # KiCad 7 dropped tedit and writes the line width as stroke, KiCad 8 writes the texts as properties
+    tedit = True
+    stroke = False
+    properties = False
+
+    def module(self, m):
+        if self.properties:
+            yield "(footprint %s (version %d) (generator \"antGen\") (generator_version %s) (layer \"F.Cu\")\n" % (_quote(m.name), self.fileVersion, _quote(m.version))
+        else:
+            yield "(footprint %s (version %d) (generator antGen) (layer \"F.Cu\")\n" % (_quote(m.name), self.fileVersion)
+        if self.tedit:
+            yield "  (tedit %X)\n" % (m.seconds)
+
+    def text(self, t):
+        if self.properties:
+            yield "  (property %s %s (at %f %f 0) (layer %s)\n" % ((_quote(t.kind.capitalize()), _quote(t.text)) + self.n(t.x, t.y) + (_quote(t.layer),))
+        else:
+            yield "  (fp_text %s %s (at %f %f) (layer %s)\n" % ((t.kind, _quote(t.text)) + self.n(t.x, t.y) + (_quote(t.layer),))
+        yield "    (effects (font (size 1 1) (thickness 0.15)))\n"
+        yield "  )\n"
+
+    def line(self, l):
+        if self.stroke:
+            yield "  (fp_line (start %f %f) (end %f %f) (stroke (width %g) (type solid)) (layer %s))\n" % (self.n(l.x0, l.y0, l.x1, l.y1) + (l.width, _quote(l.layer)))
+        else:
+            yield "  (fp_line (start %f %f) (end %f %f) (layer %s) (width %g))\n" % (self.n(l.x0, l.y0, l.x1, l.y1) + (_quote(l.layer), l.width))
+
+    def pad(self, p):
+        if p.drill > 0:
+            yield "  (pad \"%d\" thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers \"*.Cu\" \"*.Mask\"))\n" % ((p.number,) + self.n(p.x, p.y, p.size, p.size, p.drill))
+        yield "  (pad \"%d\" smd custom (at %f %f) (size %f %f) (layers \"F.Cu\")\n" % ((p.number,) + self.n(p.x, p.y, p.size, p.size))
+        yield "    (zone_connect 0)\n"
+        yield "    (options (clearance outline) (anchor circle))\n"
+        yield "    (primitives\n"
+        if p.polygon is not None:
+            yield "      (gr_poly (pts\n"
+            for x, y in _points(p.polygon):
+                yield "        (xy %f %f)\n" % self.n(x, y)
+            yield "      ) (width 0) (fill yes))\n"
+        else:
+            for x0, y0, x1, y1 in _segments(p):
+                yield "      (gr_line (start %f %f) (end %f %f) (width %f))\n" % self.n(x0, y0, x1, y1, p.width)
+        yield "    ))\n"
+
+    def end(self):
+        yield ")\n"
+
+class KiCad7Exporter(KiCad6Exporter):
+    fileVersion = 20221018
+    tedit = False
+    stroke = True
+
+class KiCad8Exporter(KiCad7Exporter):
+    fileVersion = 20240108
+    properties = True
+
+class SvgExporter(Exporter):
+    extension = ".svg"
+    digits = 4
+    c_colors = { "F.Cu": "#c83434", "F.SilkS": "#f2eda1", "B.SilkS": "#e8b2a7", "F.Fab": "#afafaf" }
+    c_drill = "#ffffff"
+    c_background = "#001023"
+
+    def _class(self, layer):
+        return layer.replace(".", "_")
+
+    def module(self, m):
+        margin = max(m.silkMargin, 0) + 1
+        x0, y0 = -margin, -margin
+        w, h = m.antLength + 2*margin, m.antWidth + 2*margin + 2   # value text is below the center
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<svg xmlns="http://www.w3.org/2000/svg" viewBox="%.4f %.4f %.4f %.4f" width="%.4fmm" height="%.4fmm">\n' % self.n(x0, y0, w, h, w, h)
+        yield '<title>%s</title>\n' % (_xml(m.name))
+        yield '<style>\n'
+        for layer, color in self.c_colors.items():
+            yield '  .%s { stroke: %s; fill: none; stroke-linecap: round; stroke-linejoin: round; }\n' % (self._class(layer), color)
+        yield '  .F_Cu_pad { fill: %s; } .drill_pad { fill: %s; }\n' % (self.c_colors["F.Cu"], self.c_drill)
+        yield '  text { stroke: none; font-family: sans-serif; font-size: 1px; text-anchor: middle; dominant-baseline: middle; }\n'
+        yield '</style>\n'
+        yield '<rect x="%.4f" y="%.4f" width="%.4f" height="%.4f" fill="%s"/>\n' % (self.n(x0, y0, w, h) + (self.c_background,))
+
+    def text(self, t):
+        yield '<text class="%s" x="%.4f" y="%.4f" fill="%s">%s</text>\n' % ((self._class(t.layer),) + self.n(t.x, t.y) + (self.c_colors.get(t.layer, "#ffffff"), _xml(t.text)))
+
+    def line(self, l):
+        yield '<line class="%s" x1="%.4f" y1="%.4f" x2="%.4f" y2="%.4f" stroke-width="%g"/>\n' % ((self._class(l.layer),) + self.n(l.x0, l.y0, l.x1, l.y1) + (l.width,))
+
+    def pad(self, p):
+        yield '<circle class="F_Cu_pad" cx="%.4f" cy="%.4f" r="%.4f"/>\n' % self.n(p.x, p.y, p.size/2)
+        if p.polygon is not None:
+            yield '<polygon class="F_Cu_pad" points="'
+            for x, y in _points(p.polygon):
+                yield "%.4f,%.4f " % self.n(p.x+x, p.y+y)
+            yield '"/>\n'
+        elif len(p.start):
+            # one path per pad, a move only where the chain of segments is interrupted
+            yield '<path class="F_Cu" stroke-width="%.4f" d="' % self.n(p.width)
+            last = None
+            for x0, y0, x1, y1 in _segments(p):
+                if last != (x0, y0):
+                    yield "M%.4f %.4f" % self.n(p.x+x0, p.y+y0)
+                yield "L%.4f %.4f" % self.n(p.x+x1, p.y+y1)
+                last = (x1, y1)
+            yield '"/>\n'
+        if p.drill > 0:
+            yield '<circle class="drill_pad" cx="%.4f" cy="%.4f" r="%.4f"/>\n' % self.n(p.x, p.y, p.drill/2)
+
+    def end(self):
+        yield '</svg>\n'
+
+def _xml(s):
+    return str(s).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+class DxfExporter(Exporter):
+    extension = ".dxf"
+
+    def _layer(self, layer):
+        # R12 layer names must not contain a dot
+        return layer.replace(".", "_")
+
+    def module(self, m):
+        yield "999\nantGen.py %s\n" % (m.name)
+        yield "0\nSECTION\n2\nENTITIES\n"
+
+    def text(self, t):
+        yield "0\nTEXT\n8\n%s\n10\n%f\n20\n%f\n40\n1.0\n1\n%s\n72\n1\n73\n2\n11\n%f\n21\n%f\n" % ((self._layer(t.layer),) + self.n(t.x, -t.y) + (t.text,) + self.n(t.x, -t.y))
+
+    def line(self, l):
+        yield "0\nLINE\n8\n%s\n10\n%f\n20\n%f\n11\n%f\n21\n%f\n" % ((self._layer(l.layer),) + self.n(l.x0, -l.y0, l.x1, -l.y1))
+
+    def pad(self, p):
+        yield "0\nCIRCLE\n8\nF_Cu\n10\n%f\n20\n%f\n40\n%f\n" % self.n(p.x, -p.y, p.size/2)
+        if p.polygon is not None:
+            # closed polyline around the copper
+            yield "0\nPOLYLINE\n8\nF_Cu\n66\n1\n10\n0.0\n20\n0.0\n30\n0.0\n70\n1\n"
+            for x, y in _points(p.polygon):
+                yield "0\nVERTEX\n8\nF_Cu\n10\n%f\n20\n%f\n" % self.n(p.x+x, -(p.y+y))
+            yield "0\nSEQEND\n8\nF_Cu\n"
+        # one polyline with the conductor width per chain of segments
+        last = None
+        for x0, y0, x1, y1 in (_segments(p) if p.polygon is None else ()):
+            if last != (x0, y0):
+                if last is not None:
+                    yield "0\nSEQEND\n8\nF_Cu\n"
+                yield "0\nPOLYLINE\n8\nF_Cu\n66\n1\n10\n0.0\n20\n0.0\n30\n0.0\n40\n%f\n41\n%f\n" % self.n(p.width, p.width)
+                yield "0\nVERTEX\n8\nF_Cu\n10\n%f\n20\n%f\n" % self.n(p.x+x0, -(p.y+y0))
+            yield "0\nVERTEX\n8\nF_Cu\n10\n%f\n20\n%f\n" % self.n(p.x+x1, -(p.y+y1))
+            last = (x1, y1)
+        if last is not None:
+            yield "0\nSEQEND\n8\nF_Cu\n"
+        if p.drill > 0:
+            yield "0\nCIRCLE\n8\nDrill\n10\n%f\n20\n%f\n40\n%f\n" % self.n(p.x, -p.y, p.drill/2)
+
+    def end(self):
+        yield "0\nENDSEC\n0\nEOF\n"
+
+class GerberExporter(Exporter):
+    extension = ".gtl"
+    c_scale = 1e6   # coordinates in nm, format 4.6
+
+    def _xy(self, x, y):
+        return "X%dY%d" % (round(x*self.c_scale), round(-y*self.c_scale))
+
+    def module(self, m):
+        yield "G04 %s, generated by antGen.py*\n" % (m.name.replace("*", "_").replace("%", "_"))
+        yield "%%TF.GenerationSoftware,nfc_antenna_generator,antGen.py,%s*%%\n" % (m.version)
+        yield "%TF.FileFunction,Copper,L1,Top*%\n"
+        yield "%TF.FilePolarity,Positive*%\n"
+        yield "%FSLAX46Y46*%\n"
+        yield "%MOMM*%\n"
+        yield "%LPD*%\n"
+        yield "%%ADD10C,%f*%%\n" % self.n(m.condWidth)
+        yield "G01*\n"
+        yield "D10*\n"
+
+    def pad(self, p):
+        yield "%sD03*\n" % (self._xy(p.x, p.y))
+        if p.polygon is not None:
+            # region, the contour is closed explicitly
+            yield "G36*\n"
+            x, y = p.polygon[0].tolist()
+            yield "%sD02*\n" % (self._xy(p.x+x, p.y+y))
+            for x, y in itertools.chain(_points(p.polygon[1:]), _points(p.polygon[:1])):
+                yield "%sD01*\n" % (self._xy(p.x+x, p.y+y))
+            yield "G37*\n"
+            return
+        last = None
+        for x0, y0, x1, y1 in _segments(p):
+            if last != (x0, y0):
+                yield "%sD02*\n" % (self._xy(p.x+x0, p.y+y0))
+            yield "%sD01*\n" % (self._xy(p.x+x1, p.y+y1))
+            last = (x1, y1)
+
+    def end(self):
+        yield "M02*\n"
+
+FORMATS = { "kicad5": KiCad5Exporter,
+            "kicad6": KiCad6Exporter,
+            "kicad7": KiCad7Exporter,
+            "kicad8": KiCad8Exporter,
+            "svg":    SvgExporter,
+            "dxf":    DxfExporter,
+            "gerber": GerberExporter }
+
+def exporter(fmt, deterministic=False):
+    # new exporter of format fmt (one of FORMATS), see Exporter for deterministic
+    if fmt not in FORMATS:
+        raise ValueError("unknown format '%s', use one of %s" % (fmt, ", ".join(FORMATS)))
+    return FORMATS[fmt](deterministic)
+
+def render(exp, items):
+    # all lines of one exporter
+    for item in items:
+        yield from exp.lines(item)
+    yield from exp.end()
+
+def export(items, outputs, filter=None, phase=None):
+    # single pass over items, outputs is a list of (exporter, file). filter (line -> line) is applied to all lines.
+    # phase (see antGen.phase) splits the time into serialization and write, the lines are then written in chunks
+    if phase is not None:
+        return _exportTimed(items, outputs, filter, phase)
+    for item in items:
+        for exp, f in outputs:
+            lines = exp.lines(item)
+            f.writelines(map(filter, lines) if filter else lines)
+    for exp, f in outputs:
+        lines = exp.end()
+        f.writelines(map(filter, lines) if filter else lines)
+
+def _exportTimed(items, outputs, filter, phase):
+    # at most c_block lines of one format are held in memory, not all lines of an item (a pad is the whole coil)
+    items = iter(items)
+    while True:
+        with phase("serialization"):
+            item = next(items, None)
+        for exp, f in outputs:
+            lines = exp.end() if item is None else exp.lines(item)
+            if filter:
+                lines = map(filter, lines)
+            while True:
+                with phase("serialization"):
+                    chunk = list(itertools.islice(lines, c_block))
+                if not chunk:
+                    break
+                with phase("write"):
+                    f.writelines(chunk)
+        if item is None:
+            return
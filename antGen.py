@@ -10,7 +10,7 @@
 #
 # output will be written to ./nfc_ant.pretty/
 #
-# to calculate antenna inductance, check https://my.st.com/analogsimulator/html_app/antenna/#/
+# to calculate antenna inductance, use -i (see antInductance.py) or check https://my.st.com/analogsimulator/html_app/antenna/#/
 #
 # tested with Python 3.7.3 and kicad Version: 5.0.2+dfsg1-1, release build, Platform: Linux 4.19.0-6-amd64 x86_64
 #
@@ -34,13 +34,24 @@ c_style                   = 3         # [#]   - how should the antenna look like
                                       #           1) see doc/ant_style_1.png
                                       #           2) see doc/ant_style_2.png
                                       #           3) see doc/ant_style_3.png
+c_inductance              = None      # [-]   - if set to 'wheeler', 'currentsheet' or 'segments', the inductance is estimated with this model and printed, see antInductance.py
+c_copperThickness         = 0.035     # [mm]  - copper thickness, used by the 'segments' inductance model
+c_deterministic           = False     # [-]   - if True, the output only depends on the parameters (tedit is $SOURCE_DATE_EPOCH or 0)
+c_cache                   = False     # [-]   - if True, the module is only written when its parameters changed, see nfc_ant.pretty/.antgen_cache.json
+c_drc                     = True      # [-]   - if True, the geometry is checked before it is written (see antDrc.py), nothing is written if it fails
+c_drcClearance            = None      # [mm]  - minimal clearance for the check. if set to None, conductorSpace (style 2: minimalConductorSpace) is used
+c_formats                 = ['kicad5'] # [-]  - output formats, see antExport.py: kicad5, kicad6, kicad7, kicad8, svg, dxf, gerber
+c_polygon                 = None      # [-]   - if set to 'miter' or 'chamfer', the copper of each pad is one polygon with these corners instead of lines, see antGeom.traceOutline()
+c_profile                 = None      # [-]   - if set to a string, the time of every phase is printed (see Profile), a non empty string is the file for the cProfile stats
 # ^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^^
 
 SKRIPT_VERSION="1.1"
 
-import math
+# heavy modules (numpy via antGeom, argparse, datetime, ...) are imported where they are
+# needed, so importing antGen stays cheap
+import os, sys
 
-def genAnt( turns,          # [#]   
+def genAntLines( turns,     # [#]   
             antLength,      # [mm]  
             antWidth,       # [mm]  
             condWidth,      # [mm]  
@@ -49,198 +60,585 @@ def genAnt( turns,          # [#]
             condSpaceMin,   # [mm]
             silkMargin,     # [mm]
             name,           # [-]
-            style           # [-]
+            style,          # [-]
+            deterministic=False, # [-] if True, the output only depends on the parameters (see deterministicTimestamp())
+            fmt="kicad5",   # [-]   output format, one of antExport.FORMATS
+            polygon=None    # [-]   None: copper as lines, 'miter' or 'chamfer': copper of each pad as one polygon with these corners
       ):
+    # the footprint is emitted record by record, so the caller can stream it
+    # straight into a file instead of building the whole text in memory
+    import antExport
+    # with deterministic, rounding noise must not decide between 0.000000 and -0.000000 (see antExport.Exporter)
+    exp = antExport.exporter(fmt, deterministic)
+    items = antItems(turns, antLength, antWidth, condWidth, condSpace, drillSize, condSpaceMin, silkMargin, name, style, timestamp(deterministic), polygon=polygon)
+    return antExport.render(exp, items)
+
+def deterministicTimestamp():
+    # tedit of deterministic output: $SOURCE_DATE_EPOCH (reproducible builds) or 0
+    return int(os.environ.get("SOURCE_DATE_EPOCH", 0))
 
+def timestamp(deterministic=False):
+    # tedit of a new footprint
+    if deterministic:
+        return deterministicTimestamp()
     # https://stackoverflow.com/questions/7852855/in-python-how-do-you-convert-a-datetime-object-to-seconds#30156392
     from datetime import datetime
     dt = datetime.today()  # Get timezone naive now
-    seconds = int(dt.timestamp())
+    return int(dt.timestamp())
 
-    if drillSize < 0:
-        drillSize = math.floor(condWidth/2*10)/10
-        if drillSize == 0:
-            print("WARNING: drillSize was < 0 and is therefore autocalculated. the resulted drillSize is 0! tht pad is replaced by smd pad. select drillSize manually!")
+def resolveDrillSize(drillSize, condWidth):
+    # drill size which is actually used (see antGeom.resolveDrillSize), warns about unusable ones on stderr,
+    # stdout may be the response stream of the service
+    import antGeom
+    auto = drillSize < 0
+    drillSize = float(antGeom.resolveDrillSize(drillSize, condWidth))
+    if auto and drillSize == 0:
+        print("WARNING: drillSize was < 0 and is therefore autocalculated. the resulted drillSize is 0! tht pad is replaced by smd pad. select drillSize manually!", file=sys.stderr)
     if drillSize > condWidth:
-        print("WARNING: drillSize > conductorWidth!")
-
-    mod=""
-    mod="%s(module %s (layer F.Cu) (tedit %X)\n" % (mod, name, seconds)
-    mod="%s  (fp_text reference REF** (at %f %f) (layer F.SilkS)\n" % (mod, antLength/2, antWidth/2)
-    mod="%s    (effects (font (size 1 1) (thickness 0.15)))\n" % (mod)
-    mod="%s  )\n" % (mod)
-    mod="%s  (fp_text value %s (at %f %f) (layer F.Fab)\n" % (mod, name, antLength/2, antWidth/2+2)
-    mod="%s    (effects (font (size 1 1) (thickness 0.15)))\n" % (mod)
-    mod="%s  )\n" % (mod)
-    if silkMargin >= 0:
-        # show outline on top silk
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer F.SilkS) (width 0.15))\n" % (mod, -silkMargin, -silkMargin, antLength+silkMargin, -silkMargin)  # t
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer F.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, -silkMargin, antLength+silkMargin, antWidth+silkMargin)  # r
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer F.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, antWidth+silkMargin, -silkMargin, antWidth+silkMargin) # b
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer F.SilkS) (width 0.15))\n" % (mod, -silkMargin, antWidth+silkMargin, -silkMargin, -silkMargin) # l
-        # mark only corners on bottom silk
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, -silkMargin, -silkMargin, (turns*(condWidth+condSpace)-condSpace+silkMargin), -silkMargin) # tl -> right
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, -silkMargin, -silkMargin, -silkMargin, (turns*(condWidth+condSpace)-condSpace+silkMargin)) # tl -> down 
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, -silkMargin, antLength-(turns*(condWidth+condSpace)-condSpace+silkMargin), -silkMargin) # tr -> left
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, -silkMargin, antLength+silkMargin, (turns*(condWidth+condSpace)-condSpace+silkMargin))  # tr -> down 
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, antWidth+silkMargin, antLength-(turns*(condWidth+condSpace)-condSpace+silkMargin), antWidth+silkMargin) # br -> left
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, antWidth+silkMargin, antLength+silkMargin, antWidth-(turns*(condWidth+condSpace)-condSpace+silkMargin)) # br -> up 
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, -silkMargin, antWidth+silkMargin, (turns*(condWidth+condSpace)-condSpace+silkMargin), antWidth+silkMargin)  # bl -> right
-        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, -silkMargin, antWidth+silkMargin, -silkMargin, antWidth-(turns*(condWidth+condSpace)-condSpace+silkMargin)) # bl -> up 
-    # draw antenna
-    if style == 3: # const 45 deg slope
-        xg=((math.sqrt(2)-1)*turns+1)*(condWidth+condSpace)
-        yg=(turns-1)*(condWidth+condSpace)
-        dx1=(math.sqrt(2)-1)*(condWidth+condSpace)
-        dx2=(condWidth+condSpace)*math.sqrt(2)
-        dy=(condWidth+condSpace)
-        if drillSize > 0:
-            mod="%s  (pad 1 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, antLength/2-xg/2, antWidth-condWidth/2, condWidth, condWidth, drillSize)
-        mod="%s  (pad 1 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, antLength/2-xg/2, antWidth-condWidth/2, condWidth, condWidth)
-        mod="%s    (zone_connect 0)\n" % (mod)
-        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
-        mod="%s    (primitives\n" % (mod)
-        x0 = 0
-        y0 = 0
-        seg = 0
-        d = 0
-        for seg in range(0,turns*6-2):
-            if seg%6 == 0: # line goes left from middle
-                x1 = x0 - (antLength/2-xg/2-condWidth/2-d) - int(seg/6)*dx1
-                y1 = y0
-            elif seg%6 == 1: # line goes up
-                x1 = x0 
-                y1 = y0 - (antWidth-condWidth-2*d)
-            elif seg%6 == 2: # line right
-                x1 = x0 + (antLength-condWidth-2*d)
-                y1 = y0
-            elif seg%6 == 3: # line down
-                x1 = x0
-                y1 = y0 + (antWidth-condWidth-2*d)
-            elif seg%6 == 4: # line goes left to the middle
-                x1 = x0 - (antLength/2-xg/2-condWidth/2-d) - (turns-1-int(seg/6))*dx1
-                y1 = y0
-            elif seg%6 == 5: # line from the middle with a slope to the next level
-                x1 = x0 - dx2 + dx1
-                y1 = y0 - dy
-                d = d + condSpace + condWidth
-            mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, x0, y0, x1, y1, condWidth)
-            x0 = x1
-            y0 = y1
-        mod="%s    ))\n" % (mod)
-        if drillSize > 0:
-            mod="%s  (pad 2 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, antLength/2+xg/2, antWidth-condWidth/2-yg, condWidth, condWidth, drillSize)
-        mod="%s  (pad 2 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, antLength/2+xg/2, antWidth-condWidth/2-yg, condWidth, condWidth)
-        mod="%s    (zone_connect 0)\n" % (mod)
-        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
-        mod="%s    (primitives\n" % (mod)
-        mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, 0, 0,  (antLength/2-xg/2-condWidth/2-d) + (turns-1-int(seg/6))*dx1, 0, condWidth)
-        mod="%s    ))\n" % (mod)
-    elif style == 2: # slope always on the same x location
-        if condSpaceMin<0:
-            condSpaceMin=condSpace/math.sqrt(2)
-        alpha=math.asin((condWidth+condSpaceMin)/(condWidth+condSpace))
-        yg=condWidth+condSpace
-        xg=math.tan(alpha)*yg
-        if drillSize > 0:
-            mod="%s  (pad 1 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, antLength/2-xg/2, antWidth-condWidth/2, condWidth, condWidth, drillSize)
-        mod="%s  (pad 1 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, antLength/2-xg/2, antWidth-condWidth/2, condWidth, condWidth)
-        mod="%s    (zone_connect 0)\n" % (mod)
-        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
-        mod="%s    (primitives\n" % (mod)
-        x0 = 0
-        y0 = 0
-        seg = 0
-        d = 0
-        for seg in range(0,turns*6-2):
-            if seg%6 == 0: # line goes left from middle
-                x1 = x0 - (antLength/2-xg/2-condWidth/2-d)
-                y1 = y0
-            elif seg%6 == 1: # line goes up
-                x1 = x0 
-                y1 = y0 - (antWidth-condWidth-2*d)
-            elif seg%6 == 2: # line right
-                x1 = x0 + (antLength-condWidth-2*d)
-                y1 = y0
-            elif seg%6 == 3: # line down
-                x1 = x0
-                y1 = y0 + (antWidth-condWidth-2*d)
-            elif seg%6 == 4: # line goes left to the middle
-                x1 = x0 - (antLength/2-xg/2-condWidth/2-d)
-                y1 = y0
-            elif seg%6 == 5: # line from the middle with a slope to the next level
-                x1 = x0 - xg
-                y1 = y0 - yg
-                d = d + condSpace + condWidth
-            mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, x0, y0, x1, y1, condWidth)
-            x0 = x1
-            y0 = y1
-        mod="%s    ))\n" % (mod)
-        if drillSize > 0:
-            mod="%s  (pad 2 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, antLength/2-xg/2+xg, antWidth-condWidth/2+y0, condWidth, condWidth, drillSize)
-        mod="%s  (pad 2 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, antLength/2-xg/2+xg, antWidth-condWidth/2+y0, condWidth, condWidth)
-        mod="%s    (zone_connect 0)\n" % (mod)
-        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
-        mod="%s    (primitives\n" % (mod)
-        mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, 0, 0,  antLength/2-xg/2-condWidth/2 - (turns-1)*(condWidth+condSpace), 0, condWidth)
-        mod="%s    ))\n" % (mod)
-    else: # simple, with no slope, pads in corner
-        if drillSize > 0:
-          mod="%s  (pad 1 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, condWidth/2, antWidth-condWidth/2, condWidth, condWidth, drillSize)
-        mod="%s  (pad 1 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, condWidth/2, antWidth-condWidth/2, condWidth, condWidth)
-        mod="%s    (zone_connect 0)\n" % (mod)
-        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
-        mod="%s    (primitives\n" % (mod)
-        x0 = 0
-        y0 = 0
-        seg = 0
-        dx = antLength-condWidth
-        dy = antWidth-condWidth
-        for seg in range(0,turns*4-1):
-            if seg%4 == 0: # line goes up
-                x1 = x0
-                y1 = y0 - dy
-            elif seg%4 == 1: # line goes right
-                if int(seg/4) > 0: # not for 1st right
-                    dx = dx - condWidth-condSpace
-                x1 = x0 + dx
-                y1 = y0
-            elif seg%4 == 2: # line goes down
-                if int(seg/4) > 0: # not for 1st down
-                    dy = dy - condWidth-condSpace
-                x1 = x0
-                y1 = y0 + dy
-            elif seg%4 == 3: # line goes left
-                dx = dx - condWidth - condSpace
-                x1 = x0 - dx
-                y1 = y0
-                dy = dy - condWidth - condSpace
-            mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, x0, y0, x1, y1, condWidth)
-            x0 = x1
-            y0 = y1
-        mod="%s    ))\n" % (mod)
-        if drillSize > 0:
-            mod="%s  (pad 2 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, condWidth/2+turns*(condWidth+condSpace), antWidth-condWidth/2+y0, condWidth, condWidth, drillSize)
-        mod="%s  (pad 2 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, condWidth/2+turns*(condWidth+condSpace), antWidth-condWidth/2+y0, condWidth, condWidth)
-        mod="%s    (zone_connect 0)\n" % (mod)
-        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
-        mod="%s    (primitives\n" % (mod)
-        mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, 0, 0,  antLength + condSpace - 2*turns*(condWidth+condSpace), 0, condWidth)
-        mod="%s    ))\n" % (mod)
-        
-    mod="%s)\n" % (mod)
-    return mod
+        print("WARNING: drillSize > conductorWidth!", file=sys.stderr)
+    return drillSize
+
+def antItems(turns, antLength, antWidth, condWidth, condSpace, drillSize, condSpaceMin, silkMargin, name, style, seconds, geom=None, polygon=None):
+    # items of the footprint (see antExport.py) which all output formats are generated from.
+    # the geometry (see antGeom.py) is the same for all styles: two custom pads with line primitives,
+    # a geometry which is already there (e.g. from the design rule check) can be passed in as geom
+    import antExport
+    drillSize = resolveDrillSize(drillSize, condWidth)
+    if geom is None:
+        import antGeom
+        with phase("geometry"):
+            geom = antGeom.antGeometry(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style)
+    polygons = None
+    if polygon:
+        import antGeom
+        with phase("polygon"):
+            polygons = antGeom.padPolygons(geom, polygon)
+    return antExport.footprintItems(geom, name, seconds, antLength, antWidth, condWidth, condSpace, drillSize, silkMargin, turns, SKRIPT_VERSION, polygons)
+
+def genAnt( turns,          # [#]   
+            antLength,      # [mm]  
+            antWidth,       # [mm]  
+            condWidth,      # [mm]  
+            condSpace,      # [mm]
+            drillSize,      # [mm]
+            condSpaceMin,   # [mm]
+            silkMargin,     # [mm]
+            name,           # [-]
+            style,          # [-]
+            deterministic=False, # [-]
+            fmt="kicad5",   # [-]
+            polygon=None    # [-]
+      ):
+    # same as genAntLines(), but returns the whole footprint as one string
+    return "".join(genAntLines(turns, antLength, antWidth, condWidth, condSpace, drillSize, condSpaceMin, silkMargin, name, style, deterministic, fmt, polygon))
+
+# parameters of one antenna, as used in the header of the generated file and by antBatch.py
+PARAMETERS = [ "modulename", "turns", "antennaLength", "antennaWidth", "conductorWidth", "conductorSpace",
+               "drillSize", "minimalConductorSpace", "silkMargin", "style" ]
+
+def antHeader( modulename, turns, antennaLength, antennaWidth, conductorWidth, conductorSpace,
+               drillSize, minimalConductorSpace, silkMargin, style ):
+    # comment block with the used parameters, written in front of the module
+    yield "# ----------------------------------------------------\n"
+    yield "# autogenerated by antGen.py version %s\n" % (SKRIPT_VERSION)
+    yield "# ----------------------------------------------------\n"
+    yield "# used parameters:\n"
+    yield "#   modulename            = %s\n" % (modulename           )
+    yield "#   turns                 = %d\n" % (turns                )
+    yield "#   antennaLength         = %f\n" % (antennaLength        )
+    yield "#   antennaWidth          = %f\n" % (antennaWidth         )
+    yield "#   conductorWidth        = %f\n" % (conductorWidth       )
+    yield "#   conductorSpace        = %f\n" % (conductorSpace       )
+    yield "#   drillSize             = %f\n" % (drillSize            )
+    yield "#   minimalConductorSpace = %f\n" % (minimalConductorSpace)
+    yield "#   silkMargin            = %f\n" % (silkMargin           )
+    yield "#   style                 = %d\n" % (style                )
+    yield "# ----------------------------------------------------\n"
+
+def writeAnt( filename, modulename, turns, antennaLength, antennaWidth, conductorWidth, conductorSpace,
+              drillSize, minimalConductorSpace, silkMargin, style, deterministic=False ):
+    # write header and module (kicad5) to filename, records are written as they are produced
+    _writeFiles({ "kicad5": filename }, dict(modulename=modulename, turns=turns, antennaLength=antennaLength, antennaWidth=antennaWidth,
+                conductorWidth=conductorWidth, conductorSpace=conductorSpace, drillSize=drillSize,
+                minimalConductorSpace=minimalConductorSpace, silkMargin=silkMargin, style=style), deterministic)
+
+def exportPaths(outdir, modulename, formats):
+    # file of every format, {format: path}
+    import antExport
+    paths = {}
+    for fmt in formats:
+        path = os.path.join(outdir, modulename + antExport.exporter(fmt).extension)
+        other = [ f for f, p in paths.items() if p == path ]
+        if other:
+            raise ValueError("formats %s and %s both write %s files, choose one of them" % (other[0], fmt, os.path.splitext(path)[1]))
+        paths[fmt] = path
+    return paths
+
+def exportAnt( outdir, modulename, turns, antennaLength, antennaWidth, conductorWidth, conductorSpace,
+               drillSize, minimalConductorSpace, silkMargin, style, formats=("kicad5",), deterministic=False, geom=None, polygon=None ):
+    # write the module in all formats (see antExport.py) to outdir/<modulename>.<extension> in one pass over
+    # the geometry, returns {format: path}. geom is the antGeom.AntGeometry of the parameters if already known
+    params = AntParams.fromDict(dict(modulename=modulename, turns=turns, antennaLength=antennaLength, antennaWidth=antennaWidth,
+                                     conductorWidth=conductorWidth, conductorSpace=conductorSpace, drillSize=drillSize,
+                                     minimalConductorSpace=minimalConductorSpace, silkMargin=silkMargin, style=style)).asDict()
+    paths = exportPaths(outdir, params["modulename"], formats)
+    _writeFiles(paths, params, deterministic, geom, polygon)
+    return paths
+
+def _writeFiles(paths, params, deterministic=False, geom=None, polygon=None):
+    # every file is written under a temporary name and renamed at the end, so it is either
+    # the old or the complete new file, never a partly written one
+    import antExport
+    p = params
+    items = antItems( p["turns"], p["antennaLength"], p["antennaWidth"], p["conductorWidth"], p["conductorSpace"], p["drillSize"],
+                      p["minimalConductorSpace"], p["silkMargin"], p["modulename"], p["style"], timestamp(deterministic), geom, polygon )
+    tmps = { fmt: "%s.%d.tmp" % (path, os.getpid()) for fmt, path in paths.items() }
+    files = []
+    try:
+        outputs = []
+        with phase("write"):
+            for fmt, tmp in tmps.items():
+                f = open(tmp, 'w')
+                files.append(f)
+                if fmt == "kicad5":
+                    f.writelines(antHeader(**params))
+                outputs.append((antExport.exporter(fmt, deterministic), f))
+        antExport.export(items, outputs, phase=phase if _profile is not None else None)
+        with phase("write"):
+            for f in files:
+                f.close()
+            for fmt, tmp in tmps.items():
+                os.replace(tmp, paths[fmt])
+    finally:
+        for f in files:
+            f.close()
+        for tmp in tmps.values():
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+def drcAnt(params, clearance=None, geom=None):
+    # design rule check (see antDrc.py) of a dict with PARAMETERS, returns the list of violations.
+    # geom is the antGeom.AntGeometry of params if already known
+    import antDrc
+    with phase("drc"):
+        if geom is not None:
+            if clearance is None:
+                clearance = antDrc.defaultClearance(params["conductorSpace"], params["minimalConductorSpace"], params["style"])
+            return antDrc.checkGeometry(geom, clearance)
+        return antDrc.checkAnt( params["turns"], params["antennaLength"], params["antennaWidth"], params["conductorWidth"],
+                                params["conductorSpace"], params["minimalConductorSpace"], params["style"], clearance )
+
+# -----------------------------------------------------------------------------
+#    C A C H E
+# -----------------------------------------------------------------------------
+# the cache index (CACHE_INDEX in the .pretty directory) maps every modulename
+# to the key of the parameters it was generated with. a footprint whose key did
+# not change is not written again.
+
+CACHE_INDEX = ".antgen_cache.json"
+
+def antKey(params, options=None):
+    # hash of the normalized parameters (dict with PARAMETERS), the generator version and output options
+    import hashlib, json
+    norm = {}
+    for k in PARAMETERS:
+        v = params[k]
+        if k == "modulename":
+            norm[k] = str(v)
+        elif k in ("turns", "style"):
+            norm[k] = int(v)
+        else:
+            norm[k] = "%.9g" % (float(v) + 0.0)
+    norm["version"] = SKRIPT_VERSION
+    norm["options"] = options or {}
+    return hashlib.sha256(json.dumps(norm, sort_keys=True).encode()).hexdigest()
+
+def loadCacheIndex(outdir):
+    # cache index of outdir, empty if there is none (or it is broken)
+    import json
+    try:
+        with open(os.path.join(outdir, CACHE_INDEX)) as f:
+            index = json.load(f)
+        return index if isinstance(index, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def saveCacheIndex(outdir, index):
+    import json
+    filename = os.path.join(outdir, CACHE_INDEX)
+    tmp = "%s.%d.tmp" % (filename, os.getpid())
+    with open(tmp, 'w') as f:
+        json.dump(index, f, sort_keys=True, indent=0)
+    os.replace(tmp, filename)
+
+def cacheOptions(deterministic, formats=("kicad5",), polygon=None, drc=True, drcClearance=None):
+    # output options which change the content of the generated files. the design rule check is part of
+    # the key when it is not the default, so a hit never skips a check the files did not pass
+    options = { "deterministic": deterministic, "tedit": deterministicTimestamp() if deterministic else None }
+    if not drc:
+        options["drc"] = False
+    elif drcClearance is not None:
+        options["drcClearance"] = "%.9g" % (drcClearance)
+    if list(formats) != ["kicad5"]:
+        options["formats"] = sorted(formats)
+    if polygon:
+        options["polygon"] = polygon
+    return options
+
+def cacheHit(outdir, index, params, key, formats=("kicad5",)):
+    # True if the files of params are up to date in outdir
+    return index.get(params["modulename"]) == key and all(os.path.exists(path) for path in exportPaths(outdir, params["modulename"], formats).values())
+
+# -----------------------------------------------------------------------------
+#    P R O F I L E
+# -----------------------------------------------------------------------------
+# opt-in timing of the phases of a run (--profile, or from python):
+#
+#   with antGen.Profile(cprofile=True) as prof:
+#       antGen.generateFile(params)
+#   print(prof.summary())
+#   prof.dump("antGen.prof")        # cProfile stats, see python3 -m pstats
+#
+# the code marks its phases with phase(name); without an active Profile this
+# costs nothing but a function call.
+
+import contextlib
+
+_profile = None     # active Profile
+
+def phase(name):
+    # context manager which adds its time to phase name of the active Profile
+    return _profile.phase(name) if _profile is not None else _noPhase
+
+_noPhase = contextlib.nullcontext()
+
+class Profile:
+    # phase timings (and optional cProfile stats) of everything run while it is active
+    def __init__(self, cprofile=False):
+        self.phases = {}        # name -> [seconds, calls]
+        self.total = 0.0
+        self._cprofile = None
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    def __enter__(self):
+        import time
+        global _profile
+        self._outer = _profile
+        _profile = self
+        self._t0 = time.perf_counter()
+        if self._cprofile:
+            self._cprofile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        import time
+        global _profile
+        if self._cprofile:
+            self._cprofile.disable()
+        self.total += time.perf_counter() - self._t0
+        _profile = self._outer
+        return False
+
+    def add(self, name, seconds, calls=1):
+        entry = self.phases.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        import time
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t0)
+
+    def asDict(self):
+        return { "total": self.total, "phases": { k: { "seconds": v[0], "calls": v[1] } for k, v in self.phases.items() } }
+
+    def summary(self):
+        total = self.total
+        lines = [ "phase                time [ms]    calls      share" ]
+        for name, (seconds, calls) in self.phases.items():
+            lines.append("%-16s %13.3f %8d %9.1f %%" % (name, seconds*1e3, calls, seconds/total*100 if total > 0 else 0))
+        other = total - sum(v[0] for v in self.phases.values())
+        lines.append("%-16s %13.3f %8s %9.1f %%" % ("other", other*1e3, "", other/total*100 if total > 0 else 0))
+        lines.append("%-16s %13.3f" % ("total", total*1e3))
+        return "\n".join(lines)
+
+    def dump(self, filename):
+        # write the cProfile stats (needs cprofile=True)
+        if self._cprofile is None:
+            raise ValueError("profile was created without cprofile=True")
+        self._cprofile.dump_stats(filename)
+
+# -----------------------------------------------------------------------------
+#    A P I
+# -----------------------------------------------------------------------------
+# for use from python without starting a process per footprint:
+#
+#   import antGen
+#   p = antGen.AntParams(turns=3, antennaLength=75.4, antennaWidth=33.5, conductorWidth=2.7, conductorSpace=1.7, style=3)
+#   text = antGen.generate(p)                          # bytes of the .kicad_mod
+#   path = antGen.generateFile(p, outdir="./my.pretty") # path of the written .kicad_mod
+
+from dataclasses import dataclass, asdict, fields
+
+@dataclass
+class AntParams:
+    turns:                  int             # [#]
+    antennaLength:          float           # [mm]
+    antennaWidth:           float           # [mm]
+    conductorWidth:         float           # [mm]
+    conductorSpace:         float           # [mm]
+    modulename:             str   = "nfc_ant"
+    drillSize:              float = -1      # [mm]  - < 0: floor(conductorWidth/2*10)/10, 0: smd pads
+    minimalConductorSpace:  float = -1      # [mm]  - < 0: conductorSpace/sqrt(2), style 2 only
+    silkMargin:             float = 0       # [mm]  - < 0: no outline
+    style:                  int   = 1       # [-]   - 1, 2 or 3
+
+    @classmethod
+    def fromDict(cls, d):
+        # parameters from a dict with (some of) PARAMETERS, values are converted. unknown keys raise ValueError
+        unknown = [ k for k in d if k not in PARAMETERS ]
+        if unknown:
+            raise ValueError("unknown parameter(s) %s" % (", ".join(unknown)))
+        types = { f.name: f.type for f in fields(cls) }
+        conv = { "int": _integer, "float": float, "str": str, int: _integer, float: float, str: str }
+        what = { _integer: "an integer", float: "a number", str: "a string" }
+        values = {}
+        for k, v in d.items():
+            try:
+                values[k] = conv[types[k]](v)
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError("%s has to be %s, got %r" % (k, what[conv[types[k]]], v))
+        return cls(**values)
+
+    def __post_init__(self):
+        # the checks genAnt can not do itself: a style out of range draws style 1, a fractional number of turns
+        # is truncated and the modulename becomes part of a path
+        if isinstance(self.turns, bool) or not isinstance(self.turns, int) or self.turns < 1:
+            raise ValueError("turns has to be a positive integer, got %r" % (self.turns,))
+        if isinstance(self.style, bool) or self.style not in (1, 2, 3):
+            raise ValueError("style has to be 1, 2 or 3, got %r" % (self.style,))
+        name = self.modulename
+        if not isinstance(name, str) or not name or "/" in name or "\\" in name or os.sep in name or (os.altsep and os.altsep in name) \
+           or ".." in name or os.path.isabs(name):
+            raise ValueError("modulename has to be a file name without path separators or '..', got %r" % (name,))
+
+    def asDict(self):
+        return asdict(self)
+
+def _integer(v):
+    # int() which does not truncate: 3, 3.0 and "3" are fine, 3.9 and "3.9" are not
+    if isinstance(v, bool):
+        raise ValueError("not an integer")
+    f = float(v)
+    if f != int(f):
+        raise ValueError("not an integer")
+    return int(f)
+
+class DrcError(ValueError):
+    # raised by generate() and generateFile() when the design rule check fails, .violations holds the messages
+    def __init__(self, violations):
+        ValueError.__init__(self, "design rule check failed: %s%s" % (violations[0], " (and %d more)" % (len(violations)-1) if len(violations) > 1 else ""))
+        self.violations = violations
+
+def _params(params):
+    with phase("parameters"):
+        return params.asDict() if isinstance(params, AntParams) else AntParams.fromDict(params).asDict()
+
+def checkedGeometry(p, drc=True, drcClearance=None):
+    # geometry of a dict with PARAMETERS, checked if drc. it is computed once and shared by the check and all formats
+    import antGeom
+    try:
+        with phase("geometry"):
+            geom = antGeom.antGeometry( p["turns"], p["antennaLength"], p["antennaWidth"], p["conductorWidth"], p["conductorSpace"],
+                                        p["minimalConductorSpace"], p["style"] )
+    except ValueError as e:
+        if drc:
+            raise DrcError([ str(e) ])
+        raise
+    if drc:
+        violations = drcAnt(p, drcClearance, geom)
+        if violations:
+            raise DrcError(violations)
+    return geom
+
+def generate(params, deterministic=False, drc=True, drcClearance=None, fmt="kicad5", polygon=None):
+    # file content of params (AntParams or dict) in format fmt (see antExport.py) as bytes, kicad5 with header
+    import antExport
+    p = _params(params)
+    geom = checkedGeometry(p, drc, drcClearance)
+    lines = list(antHeader(**p)) if fmt == "kicad5" else []
+    items = antItems( p["turns"], p["antennaLength"], p["antennaWidth"], p["conductorWidth"], p["conductorSpace"], p["drillSize"],
+                      p["minimalConductorSpace"], p["silkMargin"], p["modulename"], p["style"], timestamp(deterministic), geom, polygon )
+    with phase("serialization"):
+        lines.extend(antExport.render(antExport.exporter(fmt, deterministic), items))
+        return "".join(lines).encode()
+
+def _generateFiles(params, outdir, formats, deterministic, cache, drc, drcClearance, polygon=None):
+    # returns ({format: path}, written), written is False for a cache hit
+    p = _params(params)
+    paths = exportPaths(outdir, p["modulename"], formats)
+    if cache:
+        # a hit needs neither geometry nor design rule check, the files passed the same check when they were written
+        with phase("cache"):
+            index = loadCacheIndex(outdir)
+            key = antKey(p, cacheOptions(deterministic, formats, polygon, drc, drcClearance))
+            if cacheHit(outdir, index, p, key, formats):
+                return paths, False
+    geom = checkedGeometry(p, drc, drcClearance)
+    if not os.path.exists(outdir):
+        os.makedirs(outdir)
+    _writeFiles(paths, p, deterministic, geom, polygon)
+    if cache:
+        with phase("cache"):
+            # read again, another process may have updated the index in the meantime
+            index = loadCacheIndex(outdir)
+            index[p["modulename"]] = key
+            saveCacheIndex(outdir, index)
+    return paths, True
+
+def generateFiles(params, outdir="./nfc_ant.pretty", formats=("kicad5",), deterministic=False, cache=False, drc=True, drcClearance=None, polygon=None):
+    # write params (AntParams or dict) in all formats to <outdir>/<modulename>.<extension>, returns {format: path}.
+    # the coil is computed once for all formats. with cache, up to date files are not written again
+    return _generateFiles(params, outdir, formats, deterministic, cache, drc, drcClearance, polygon)[0]
+
+def generateFile(params, outdir="./nfc_ant.pretty", deterministic=False, cache=False, drc=True, drcClearance=None, fmt="kicad5", polygon=None):
+    # write params (AntParams or dict) to <outdir>/<modulename>.kicad_mod (or the extension of fmt) and return the path
+    return generateFiles(params, outdir, [fmt], deterministic, cache, drc, drcClearance, polygon)[fmt]
+
+# -----------------------------------------------------------------------------
+#    S E R V I C E
+# -----------------------------------------------------------------------------
+# antGen.py --serve keeps one warm process for many footprints. requests are JSON
+# objects, one per line, on stdin (or on every connection of --socket PATH);
+# every request gets one JSON line as response, in the same order:
+#
+#   request:  { "id": 1, "modulename": "a", "turns": 3, "antennaLength": 75.4, "antennaWidth": 33.5,
+#               "conductorWidth": 2.7, "conductorSpace": 1.7, "style": 3,
+#               "outdir": "./nfc_ant.pretty", "deterministic": true, "cache": true, "drc": true,
+#               "drcClearance": null, "formats": ["kicad5"], "polygon": null, "return": "path" }
+#   response: { "id": 1, "ok": true, "path": "./nfc_ant.pretty/a.kicad_mod",
+#               "paths": { "kicad5": "./nfc_ant.pretty/a.kicad_mod" }, "written": true, "ms": 1.2 }
+#
+# all keys except the parameters without default are optional. the output formats are
+# either "formats", a list of format names, or "format", one name (the same as a list with
+# this name), not both; the default is kicad5. "path" is the file of the first format.
+# with "return": "content" nothing is written and exactly one format is allowed, the
+# response has its file in "content" instead of "path".
+# failed requests get { "id": .., "ok": false, "error": "..." }.
+
+c_serveOptions = { "id": None, "outdir": "./nfc_ant.pretty", "deterministic": False, "cache": False, "drc": True,
+                   "drcClearance": None, "formats": None, "format": None, "polygon": None, "return": "path" }
+
+def requestFormats(fmt, formats):
+    # list of output formats of a request with the keys "format" and "formats"
+    if fmt is not None and formats is not None:
+        raise ValueError("give either format (one name) or formats (a list of names), not both")
+    if fmt is not None:
+        if not isinstance(fmt, str):
+            raise ValueError("format has to be one format name, got %r (use formats for a list)" % (fmt,))
+        return [ fmt ]
+    if formats is None:
+        return [ "kicad5" ]
+    if not isinstance(formats, list) or not formats or not all(isinstance(f, str) for f in formats):
+        raise ValueError("formats has to be a non empty list of format names, got %r" % (formats,))
+    return formats
+
+def handleRequest(line):
+    # one JSON request line -> one JSON response line
+    import json, time
+    t0 = time.perf_counter()
+    rid = None
+    try:
+        req = json.loads(line)
+        if not isinstance(req, dict):
+            raise ValueError("request has to be a JSON object")
+        options = { k: req.pop(k, v) for k, v in c_serveOptions.items() }
+        rid = options["id"]
+        params = AntParams.fromDict(req)
+        formats = requestFormats(options["format"], options["formats"])
+        if options["return"] == "content":
+            if len(formats) != 1:
+                raise ValueError("return content needs exactly one format, got %s" % (", ".join(formats)))
+            res = { "content": generate(params, options["deterministic"], options["drc"], options["drcClearance"], formats[0],
+                                             options["polygon"]).decode() }
+        else:
+            paths, written = _generateFiles(params, options["outdir"], formats, options["deterministic"], options["cache"],
+                                            options["drc"], options["drcClearance"], options["polygon"])
+            res = { "path": paths[formats[0]], "paths": paths, "written": written }
+        res = dict(id=rid, ok=True, **res)
+    except Exception as e:
+        res = { "id": rid, "ok": False, "error": "%s: %s" % (type(e).__name__, e) }
+    res["ms"] = round((time.perf_counter() - t0)*1e3, 3)
+    return json.dumps(res) + "\n"
+
+def serve(fin, fout):
+    # answer requests from fin (lines) on fout until fin is closed
+    for line in fin:
+        if line.strip():
+            fout.write(handleRequest(line))
+            fout.flush()
+
+def serveSocket(path):
+    # answer requests on the unix socket path, one connection after the other
+    import socketserver, io
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            serve(io.TextIOWrapper(self.rfile, encoding="utf-8"), io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True))
+    if os.path.lexists(path):
+        # a stale socket of an earlier run is replaced, anything else at path is left alone
+        import stat
+        if not stat.S_ISSOCK(os.lstat(path).st_mode):
+            raise ValueError("%s exists and is not a socket" % (path))
+        os.remove(path)
+    with socketserver.UnixStreamServer(path, Handler) as server:
+        try:
+            server.serve_forever()
+        finally:
+            os.remove(path)
 
 # -----------------------------------------------------------------------------
 #    M A I N
 # -----------------------------------------------------------------------------
 
-import sys, argparse, os
+c_outdir = './nfc_ant.pretty'
+
+def mainServe(args):
+    import argparse
+    parser=argparse.ArgumentParser(description="generator service: one JSON request per line on stdin, one JSON response per line on stdout, see S E R V I C E in antGen.py")
+    parser.add_argument("--serve"                      , action="store_true",    help="run as service", required=True)
+    parser.add_argument("--socket"                     ,                         help="listen on this unix socket instead of stdin/stdout", required=False)
+    parser.add_argument("-o", "--outdir"               , default=c_outdir,       help="default output directory of requests without outdir, will be set to %s if not provided" % (c_outdir), required=False)
+    args=parser.parse_args(args)
+    c_serveOptions["outdir"] = args.outdir
+
+    # load everything a request needs before the first one arrives
+    import antGeom, antDrc, antExport, json, time
+    if args.socket:
+        try:
+            serveSocket(args.socket)
+        except ValueError as e:
+            print("ERROR: %s" % (e), file=sys.stderr)
+            return 1
+    else:
+        serve(sys.stdin, sys.stdout)
+    return 0
 
 def main(args):
-   
+    import time
+    t0 = time.perf_counter()
+
+    if "--serve" in args:
+        return mainServe(args)
+
     # called with arguments?
     if len(args) > 0:
+        import argparse
         parser=argparse.ArgumentParser()
         parser.add_argument("-f", "--modulename"           ,                         help="generated module will be saved under nfc_ant.pretty/<modulename>.kicad_mod", required=True)
         parser.add_argument("-n", "--turns"                , type=int,               help="number of windigs, see doc/st.png", required=True)
@@ -248,12 +646,23 @@ def main(args):
         parser.add_argument("-w", "--antennaWidth"         , type=float,             help="width of antenna in mm (outer copper dimension), compare with doc/st.png", required=True)
         parser.add_argument("-c", "--conductorWidth"       , type=float,             help="width of conductor in mm, compare with doc/st.png", required=True)
         parser.add_argument("-s", "--conductorSpace"       , type=float,             help="width of space between conductors in mm, compare with doc/st.png", required=True)
-        parser.add_argument("-d", "--drillSize"            , type=float,             help="drill size for pad holes in mm (diameter). if set to 0, pads will be smd, not tht. if set to value < 0, drillSize is set to floor(conductorWidth/2*10)/10", required=False)
+        parser.add_argument("-d", "--drillSize"            , type=float, default=-1, help="drill size for pad holes in mm (diameter). if set to 0, pads will be smd, not tht. if set to value < 0 or not provided, drillSize is set to floor(conductorWidth/2*10)/10", required=False)
         parser.add_argument("-e", "--minimalConductorSpace", type=float, default=-1, help="used only when style=2, describes space between conductors on slope in mm. will be set to -1 if not provided. when set to a negative value, minimalConductorSpace will be set to conductorSpace/sqrt(2)", required=False)
         parser.add_argument("-m", "--silkMargin"           , type=float, default=0 , help="margin of silkscreen outline to outer copper in mm, will be set to 0 if not provided. if set to value < 0, no outline will be drawn", required=False)
         parser.add_argument("-t", "--style"                , type=int  , default=1 , help="how should the antenna look like, will be set to 1 if not provided. 1: see doc/st.png or doc/ant_style_1.png | 2: see doc/ant_style_2.png | 3: see doc/ant_style_3.png", required=False, choices=[1,2,3])
+        parser.add_argument("-i", "--inductance"           ,                         help="estimate the inductance with the given model and print it. wheeler, currentsheet: closed form, fast | segments: partial inductance of the generated segments, accurate", required=False, choices=["wheeler","currentsheet","segments"])
+        parser.add_argument("-k", "--copperThickness"      , type=float, default=0.035, help="copper thickness in mm, used by the segments inductance model, will be set to 0.035 if not provided", required=False)
+        parser.add_argument("-D", "--deterministic"        , action="store_true",    help="output only depends on the parameters: tedit is $SOURCE_DATE_EPOCH or 0, no -0.000000", required=False)
+        parser.add_argument("-C", "--cache"                , action="store_true",    help="write the module only when its parameters (or the generator version) changed since the last run, see nfc_ant.pretty/.antgen_cache.json", required=False)
+        parser.add_argument("-r", "--drcClearance"         , type=float,             help="minimal clearance in mm for the design rule check before writing, will be set to conductorSpace (style 2: minimalConductorSpace) if not provided", required=False)
+        parser.add_argument("-x", "--noDrc"                , action="store_true",    help="skip the design rule check, write the module even if it is broken", required=False)
+        parser.add_argument("-o", "--outdir"               , default=c_outdir,       help="output directory, will be set to %s if not provided" % (c_outdir), required=False)
+        parser.add_argument("-F", "--format"               , action="append",        help="output format, can be given several times to write all of them in one pass: kicad5 (default), kicad6, kicad7, kicad8 (.kicad_mod), svg, dxf, gerber (.gtl, top copper)", required=False, choices=["kicad5","kicad6","kicad7","kicad8","svg","dxf","gerber"])
+        parser.add_argument("-p", "--polygon"              ,                         help="copper of each pad as one polygon (gr_poly) with mitred or chamfered corners instead of one line per segment, loads and checks much faster in pcbnew", required=False, choices=["miter","chamfer"])
+        parser.add_argument("--serve"                      , action="store_true",    help="run as generator service for many footprints, see antGen.py --serve -h", required=False)
+        parser.add_argument("--profile"                    , nargs="?", const="",    help="print the time of every phase (parameters, geometry, drc, serialization, write, ...). with a filename, the cProfile stats are written to it as well", metavar="FILE", required=False)
 
-        args=parser.parse_args()
+        args=parser.parse_args(args)
 
         # overwrite constants from above
         modulename            = args.modulename          
@@ -266,6 +675,16 @@ def main(args):
         minimalConductorSpace = args.minimalConductorSpace
         silkMargin            = args.silkMargin           
         style                 = args.style              
+        inductance            = args.inductance
+        copperThickness       = args.copperThickness
+        deterministic         = args.deterministic
+        cache                 = args.cache
+        drc                   = not args.noDrc
+        drcClearance          = args.drcClearance
+        outdir                = args.outdir
+        formats               = args.format or ["kicad5"]
+        profile               = args.profile
+        polygon               = args.polygon
     else:        
         # take constants from top when script is called without any arguments
         modulename              = c_modulename           
@@ -278,39 +697,83 @@ def main(args):
         minimalConductorSpace   = c_minimalConductorSpace
         silkMargin              = c_silkMargin             
         style                   = c_style                
+        inductance              = c_inductance
+        copperThickness         = c_copperThickness
+        deterministic           = c_deterministic
+        cache                   = c_cache
+        drc                     = c_drc
+        drcClearance            = c_drcClearance
+        outdir                  = c_outdir
+        formats                 = c_formats
+        profile                 = c_profile
+        polygon                 = c_polygon
     
-    # generate antenna
-    ant=genAnt( turns=turns,                        # [#]   
-                antLength=antennaLength,            # [mm]  
-                antWidth=antennaWidth,              # [mm]  
-                condWidth=conductorWidth,           # [mm]  
-                condSpace=conductorSpace,           # [mm]
-                drillSize=drillSize,                # [mm]
-                condSpaceMin=minimalConductorSpace, # [mm]
-                silkMargin=silkMargin,              # [mm]
-                name=modulename,                    # [-]
-                style=style)                        # [-]
-
-    # write result to file
-    if not os.path.exists('./nfc_ant.pretty'):
-        os.makedirs('./nfc_ant.pretty')
-    with open("./nfc_ant.pretty/%s.kicad_mod" % (modulename), 'w') as f:
-        f.write("# ----------------------------------------------------\n")
-        f.write("# autogenerated by antGen.py version %s\n" % (SKRIPT_VERSION))
-        f.write("# ----------------------------------------------------\n")
-        f.write("# used parameters:\n")
-        f.write("#   modulename            = %s\n" % (modulename           )) 
-        f.write("#   turns                 = %d\n" % (turns                ))
-        f.write("#   antennaLength         = %f\n" % (antennaLength        ))
-        f.write("#   antennaWidth          = %f\n" % (antennaWidth         ))
-        f.write("#   conductorWidth        = %f\n" % (conductorWidth       ))
-        f.write("#   conductorSpace        = %f\n" % (conductorSpace       ))
-        f.write("#   drillSize             = %f\n" % (drillSize            ))
-        f.write("#   minimalConductorSpace = %f\n" % (minimalConductorSpace))
-        f.write("#   silkMargin            = %f\n" % (silkMargin           ))
-        f.write("#   style                 = %d\n" % (style                ))
-        f.write("# ----------------------------------------------------\n")
-        f.write(ant)
+    params = { "modulename":            modulename,
+               "turns":                 turns,
+               "antennaLength":         antennaLength,
+               "antennaWidth":          antennaWidth,
+               "conductorWidth":        conductorWidth,
+               "conductorSpace":        conductorSpace,
+               "drillSize":             drillSize,
+               "minimalConductorSpace": minimalConductorSpace,
+               "silkMargin":            silkMargin,
+               "style":                 style }
+
+    if profile is None:
+        return runMain(params, outdir, formats, deterministic, cache, drc, drcClearance, inductance, copperThickness, polygon)
+    prof = Profile(cprofile=bool(profile))
+    # argument parsing happened before the profile could start
+    prof.add("parameters", time.perf_counter() - t0)
+    prof.total += time.perf_counter() - t0
+    with prof:
+        ret = runMain(params, outdir, formats, deterministic, cache, drc, drcClearance, inductance, copperThickness, polygon)
+    print(prof.summary())
+    if profile:
+        prof.dump(profile)
+        print("cProfile stats written to %s, see python3 -m pstats %s" % (profile, profile))
+    return ret
+
+def runMain(params, outdir, formats, deterministic, cache, drc, drcClearance, inductance, copperThickness, polygon=None):
+    # everything main() does after the parameters are known
+    modulename = params["modulename"]
+    with phase("imports"):
+        import antGeom, antExport
+        if drc:
+            import antDrc
+
+    # generate antenna and write result to file, the geometry is checked before anything is written
+    try:
+        AntParams.fromDict(params)
+        exportPaths(outdir, modulename, formats)
+    except ValueError as e:
+        print("ERROR: %s" % (e))
+        return 1
+    try:
+        paths, written = _generateFiles(params, outdir, formats, deterministic, cache, drc, drcClearance, polygon)
+    except DrcError as e:
+        for v in e.violations[:20]:
+            print("DRC: %s" % (v))
+        if len(e.violations) > 20:
+            print("DRC: ... and %d more" % (len(e.violations)-20))
+        print("ERROR: design rule check failed, nothing written. use --noDrc to write it anyway")
+        return 1
+    if cache:
+        if written:
+            print("cache: 0 hit, 1 miss")
+        else:
+            print("cache: 1 hit, 0 miss (%s is up to date)" % (", ".join(paths.values())))
+    if polygon:
+        lines = int(antGeom.segmentCount(params["turns"], params["style"])) + 1     # spiral and stub
+        print("copper primitives: %d lines -> 2 polygons (%.1fx fewer)" % (lines, lines/2))
+
+    if inductance:
+        import antInductance
+        p = params
+        with phase("inductance"):
+            L = antInductance.inductance( inductance, p["turns"], p["antennaLength"], p["antennaWidth"], p["conductorWidth"], p["conductorSpace"],
+                                          p["minimalConductorSpace"], p["style"], copperThickness )
+        print("inductance (%s): %.4f uH" % (inductance, L*1e6))
+    return 0
 
 
 
@@ -319,7 +782,7 @@ def main(args):
 
 
 if __name__ == "__main__":
-    main(sys.argv[1:])
+    sys.exit(main(sys.argv[1:]))
 
 
 
@@ -0,0 +1,343 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    N F C   A N T E N N A   G E N E R A T O R   -   G E O M E T R Y
+# ---------------------------------------------------------------------------
+#
+# coil geometry of the antennas generated by antGen.py, as numpy arrays.
+# no kicad syntax in here, the serializers (antGen.genAntLines, ...) consume
+# these arrays.
+#
+# every antenna consists of two custom pads:
+#   pad 1 (index 0) carries the spiral, a chain of segments starting in the pad
+#   pad 2 (index 1) carries a single straight segment (stub) which connects
+#         pad 2 with the inner end of the spiral
+# segment coordinates are relative to the pad they belong to (as in the kicad
+# primitives), pad positions are absolute. use absolute() to get absolute
+# segment coordinates.
+#
+# antGeometryBatch() evaluates many designs in one call, all parameters are
+# broadcast against each other. the segments of all designs are padded to the
+# longest design, valid segments are marked in .valid. designs which can not
+# be drawn (style 2 with minimalConductorSpace > conductorSpace) get nan
+# coordinates. antGeometry() is the same for a single design with the padding
+# removed, it raises ValueError instead.
+#
+# ---------------------------------------------------------------------------
+
+import collections, math
+import numpy as np
+
+# kind of a segment, i.e. its nominal direction. the slope goes up and left,
+# the stub goes right
+KIND_UP    = 0
+KIND_RIGHT = 1
+KIND_DOWN  = 2
+KIND_LEFT  = 3
+KIND_SLOPE = 4
+KIND_STUB  = 5
+
+AntGeometry = collections.namedtuple("AntGeometry", [
+    "start",    # [mm]  (N,2) start of segments, relative to their pad
+    "end",      # [mm]  (N,2) end of segments, relative to their pad
+    "width",    # [mm]  (N,)  width of segments
+    "pad",      # [-]   (N,)  index of the pad the segment belongs to (0: pad 1, 1: pad 2)
+    "kind",     # [-]   (N,)  KIND_* of segment
+    "padPos",   # [mm]  (2,2) absolute position of pad 1 and pad 2
+])
+
+AntGeometryBatch = collections.namedtuple("AntGeometryBatch", [
+    "start",    # [mm]  (B,S,2) start of segments, relative to their pad
+    "end",      # [mm]  (B,S,2) end of segments, relative to their pad
+    "width",    # [mm]  (B,S)   width of segments
+    "pad",      # [-]   (B,S)   index of the pad the segment belongs to
+    "kind",     # [-]   (B,S)   KIND_* of segment
+    "padPos",   # [mm]  (B,2,2) absolute position of pad 1 and pad 2
+    "count",    # [#]   (B,)    number of valid segments (spiral + stub)
+    "valid",    # [-]   (B,S)   True for valid segments, padding is False
+])
+
+def segmentCount(turns, style):
+    # number of segments of the spiral (without stub)
+    turns = np.asarray(turns)
+    return np.where((np.asarray(style) == 2) | (np.asarray(style) == 3), turns*6-2, turns*4-1)
+
+def resolveDrillSize(drillSize, condWidth):
+    # drill size which is actually used, < 0 is calculated from the conductor width: floor(conductorWidth/2*10)/10
+    drillSize = np.asarray(drillSize, dtype=float)
+    return np.where(drillSize < 0, np.floor(np.asarray(condWidth)/2*10)/10, drillSize)
+
+def innerWindow(turns, antLength, antWidth, condWidth, condSpace):
+    # length and width of the window inside the innermost turn
+    copper = turns*condWidth + (turns-1)*condSpace
+    return antLength - 2*copper, antWidth - 2*copper
+
+def antGeometryBatch( turns,          # [#]
+                      antLength,      # [mm]
+                      antWidth,       # [mm]
+                      condWidth,      # [mm]
+                      condSpace,      # [mm]
+                      condSpaceMin,   # [mm]
+                      style           # [-]
+                    ):
+    turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style = np.broadcast_arrays(
+        np.asarray(turns, dtype=np.int64), np.asarray(antLength, dtype=float), np.asarray(antWidth, dtype=float),
+        np.asarray(condWidth, dtype=float), np.asarray(condSpace, dtype=float), np.asarray(condSpaceMin, dtype=float),
+        np.asarray(style, dtype=np.int64))
+    turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style = [ np.atleast_1d(a).ravel() for a in
+        (turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style) ]
+    if np.any(turns < 1):
+        raise ValueError("turns has to be >= 1")
+
+    s2 = (style == 2)
+    s3 = (style == 3)
+    s1 = ~(s2 | s3)         # everything else is drawn as style 1, like genAnt always did
+    p = condWidth + condSpace
+    nChain = segmentCount(turns, style)
+    count = nChain + 1
+    S = int(count.max())
+
+    # per design constants of style 2 and 3, see doc/ant_style_2.png and doc/ant_style_3.png
+    with np.errstate(invalid="ignore", divide="ignore"):
+        csm = np.where(condSpaceMin < 0, condSpace/math.sqrt(2), condSpaceMin)
+        ratio = (condWidth+csm)/p
+    # sin(alpha) = ratio; math instead of numpy, which may round the last bit differently than version 1.1
+    tanAlpha = np.full(len(turns), np.nan)
+    tanAlpha[s2] = [ math.tan(math.asin(r)) if -1 <= r <= 1 else math.nan for r in ratio[s2].tolist() ]
+    xg = np.where(s3, ((math.sqrt(2)-1)*turns+1)*p, tanAlpha*p)
+    dx1 = (math.sqrt(2)-1)*p
+    dx2 = p*math.sqrt(2)
+
+    # the coordinates are running sums of the segment vectors. they are summed in the same order, with the
+    # same intermediate rounding, as the loops of antGen.py version 1.1 did, so the output stays byte identical.
+    # -0.0 is the neutral element of the sums (x + -0.0 == x, also for x == -0.0)
+    B = len(turns)
+    T = int(turns.max())
+    def running(first, steps):
+        # first, first+steps[0], first+steps[0]+steps[1], ... of steps (B,K), as (B,K+1)
+        return np.cumsum(np.concatenate([ first[:, None], steps ], axis=1), axis=1)
+    def alternating(a, b, count):
+        # a, b, a, b, ... (count pairs) per design
+        steps = np.empty((B, 2*count))
+        steps[:, 0::2] = a[:, None]
+        steps[:, 1::2] = b[:, None]
+        return steps
+
+    # segment index grid, k: turn, m: segment within the turn
+    j = np.arange(S)[None, :]
+    P = np.where(s1, 4, 6)[:, None]
+    k = j // P
+    m = j % P
+    # distance of turn k to the outline, d = d + conductorSpace + conductorWidth per turn
+    dTurn = running(np.zeros(B), alternating(condSpace, condWidth, T-1))[:, 0::2]
+    d = np.take_along_axis(dTurn, np.minimum(k, T-1).astype(np.intp), axis=1)
+
+    L = antLength[:, None]
+    W = antWidth[:, None]
+    w = condWidth[:, None]
+    pp = p[:, None]
+    xgc = xg[:, None]
+    t = turns[:, None]
+
+    # style 1: pads in corner, no slope. the length of the sides shrinks by conductorWidth and
+    # conductorSpace with every right/left (dx) and down/left (dy) side, except the first ones
+    kind1 = m                                       # up, right, down, left
+    shrink = alternating(-condWidth, -condSpace, 2*T)
+    dxSide = running(antLength - condWidth, shrink)[:, 0::2]
+    dySide = running(antWidth - condWidth, shrink)[:, 0::2]
+    side = lambda a, i: np.take_along_axis(a, np.minimum(i, 2*T).astype(np.intp), axis=1)
+    up1    = -side(dySide, np.maximum(0, 2*k-1))
+    right1 = side(dxSide, 2*k)
+    down1  = side(dySide, 2*k)
+    left1  = -side(dxSide, 2*k+1)
+    dx1s = np.where(m == 1, right1, np.where(m == 3, left1, -0.0))
+    dy1s = np.where(m == 0, up1, np.where(m == 2, down1, -0.0))
+
+    # style 2/3: pads in the middle of the bottom line, slope to the next turn. the horizontal sides of
+    # style 3 and its slope are drawn in two steps (a, then b)
+    half = L/2 - xgc/2 - w/2 - d
+    off0 = np.where(s3[:, None], -(k*dx1[:, None]), -0.0)
+    off4 = np.where(s3[:, None], -((t-1-k)*dx1[:, None]), -0.0)
+    slopeA = np.where(s3[:, None], -dx2[:, None], -xgc)
+    slopeB = np.where(s3[:, None], dx1[:, None], -0.0)
+    dx23a = np.select([m == 0, m == 2, m == 4, m == 5], [-half, L - w - 2*d, -half, slopeA], -0.0)
+    dx23b = np.select([m == 0, m == 4, m == 5], [off0, off4, slopeB], -0.0)
+    dy23 = np.select([m == 1, m == 3, m == 5], [-(W - w - 2*d), W - w - 2*d, -pp], -0.0)
+    kind23 = np.select([m == 0, m == 1, m == 2, m == 3, m == 4], [KIND_LEFT, KIND_UP, KIND_RIGHT, KIND_DOWN, KIND_LEFT], KIND_SLOPE)
+
+    chain = j < nChain[:, None]
+    dx = np.empty((B, 2*S))
+    dx[:, 0::2] = np.where(chain, np.where(s1[:, None], dx1s, dx23a), 0.0)
+    dx[:, 1::2] = np.where(chain & ~s1[:, None], dx23b, -0.0)
+    dy = np.empty((B, 2*S))
+    dy[:, 0::2] = np.where(chain, np.where(s1[:, None], dy1s, dy23), 0.0)
+    dy[:, 1::2] = -0.0
+    kind = np.where(s1[:, None], kind1, kind23)
+
+    # walk along the spiral, starting in pad 1
+    pathX = running(np.zeros(B), dx)[:, 0::2]
+    pathY = running(np.zeros(B), dy)[:, 0::2]
+    start = np.empty((B, S, 2))
+    end = np.empty((B, S, 2))
+    start[:, :, 0] = pathX[:, :-1]
+    start[:, :, 1] = pathY[:, :-1]
+    end[:, :, 0] = pathX[:, 1:]
+    end[:, :, 1] = pathY[:, 1:]
+    endY = pathY[:, 1:]
+    rows = np.arange(len(turns))
+    yEnd = endY[rows, nChain-1]
+
+    # pads
+    padPos = np.empty((len(turns), 2, 2))
+    padPos[:, 0, 0] = np.where(s1, condWidth/2, antLength/2-xg/2)
+    padPos[:, 0, 1] = antWidth-condWidth/2
+    padPos[:, 1, 0] = np.where(s1, condWidth/2+turns*p, np.where(s3, antLength/2+xg/2, antLength/2-xg/2+xg))
+    padPos[:, 1, 1] = np.where(s3, antWidth-condWidth/2-(turns-1)*p, antWidth-condWidth/2+yEnd)
+
+    # stub of pad 2, goes right from pad 2 to the inner end of the spiral
+    dLast = dTurn[rows, turns-1]
+    stubLength = np.select([ s1, s3 ], [ antLength + condSpace - 2*turns*p, (antLength/2-xg/2-condWidth/2-dLast) + 0.0 ],
+                           antLength/2-xg/2-condWidth/2-(turns-1)*p)
+    start[rows, nChain] = 0.0
+    end[rows, nChain, 0] = stubLength
+    end[rows, nChain, 1] = 0.0
+    pad = (j == nChain[:, None]).astype(np.int8)
+    pad = np.broadcast_to(pad, (len(turns), S)).copy()
+    kind = kind.astype(np.int8)
+    kind[rows, nChain] = KIND_STUB
+
+    valid = j < count[:, None]
+    start[~valid] = 0.0
+    end[~valid] = 0.0
+    width = np.where(valid, condWidth[:, None], 0.0)
+
+    return AntGeometryBatch(start, end, width, pad, kind, padPos, count, valid)
+
+def antGeometry( turns,          # [#]
+                 antLength,      # [mm]
+                 antWidth,       # [mm]
+                 condWidth,      # [mm]
+                 condSpace,      # [mm]
+                 condSpaceMin,   # [mm]
+                 style           # [-]
+               ):
+    b = antGeometryBatch(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style)
+    if np.isnan(b.padPos).any():
+        raise ValueError("minimalConductorSpace has to be <= conductorSpace")
+    n = int(b.count[0])
+    return AntGeometry(b.start[0, :n], b.end[0, :n], b.width[0, :n], b.pad[0, :n], b.kind[0, :n], b.padPos[0])
+
+# segments of one geometry batch of geometryBlocks(), small blocks stay in the cpu cache
+c_segmentBlock = 1 << 16
+
+def geometryBlocks(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style, block=c_segmentBlock):
+    # antGeometryBatch() of many designs (arrays of the same length) in blocks of about block segments.
+    # the designs are sorted by their number of segments, so the padding stays small. yields
+    # (rows, geom): the indices of the designs and their AntGeometryBatch. designs with turns < 1 are left out
+    turns = np.asarray(turns, dtype=np.int64)
+    ok = turns >= 1
+    segments = np.where(ok, segmentCount(np.maximum(turns, 1), style) + 1, 0)
+    order = np.nonzero(ok)[0]
+    order = order[np.argsort(segments[order], kind="stable")]
+    i = 0
+    while i < len(order):
+        j = min(len(order), i + max(1, block // segments[order[i]]))
+        while j - i > 1 and (j - i)*segments[order[j-1]] > block:
+            j = i + max(1, block // segments[order[j-1]])
+        rows = order[i:j]
+        yield rows, antGeometryBatch(turns[rows], antLength[rows], antWidth[rows], condWidth[rows], condSpace[rows], condSpaceMin[rows], style[rows])
+        i = j
+
+def absolute(geom):
+    # absolute start and end of the segments of an AntGeometry or AntGeometryBatch
+    if geom.start.ndim == 2:
+        offset = geom.padPos[geom.pad]
+    else:
+        offset = np.take_along_axis(geom.padPos, geom.pad[:, :, None].astype(np.intp), axis=1)
+    return geom.start + offset, geom.end + offset
+
+def pathSegments(geom):
+    # absolute start and end of the segments in the direction of the current, from pad 1 along
+    # the spiral to its inner end and back over the stub to pad 2 (the stub is drawn from pad 2)
+    start, end = absolute(geom)
+    stub = (geom.kind == KIND_STUB)[..., None]
+    return np.where(stub, end, start), np.where(stub, start, end)
+
+def segmentsOk(geom):
+    # True for segments which go in their nominal direction with a length > 0. when the outline is
+    # too small for the number of turns, segments of the inner turns get a negative length and
+    # go backwards. padding is always ok
+    dx = geom.end[..., 0] - geom.start[..., 0]
+    dy = geom.end[..., 1] - geom.start[..., 1]
+    kind = geom.kind
+    ok = np.select([ kind == KIND_UP, kind == KIND_DOWN, (kind == KIND_RIGHT) | (kind == KIND_STUB), kind == KIND_LEFT, kind == KIND_SLOPE ],
+                   [ dy < 0, dy > 0, dx > 0, dx < 0, (dx < 0) & (dy < 0) ], True)
+    if hasattr(geom, "valid"):
+        ok = ok | ~geom.valid
+    return ok
+
+def segmentLength(geom):
+    # length of the segments, padding has length 0
+    return np.hypot(geom.end[..., 0] - geom.start[..., 0], geom.end[..., 1] - geom.start[..., 1])
+
+c_miterLimit = 2.0     # [-]   longest miter, in half conductor widths, before a corner is chamfered anyway
+
+def traceOutline(points, width, join="miter", endCap=True):
+    # outline of a chain of segments through points (N,2) with the given width, as polygon (K,2).
+    # the chain must not cross itself, then the outline is the union of the segments. the start is cut
+    # square (it lies in the pad), the end gets a square cap of half the width when endCap, so it covers
+    # the corner where another chain meets it. outer corners are mitred or, with join="chamfer", cut by
+    # a chamfer at half the width from the corner (45 degrees for right angles), which still covers the
+    # round end of the segments. inner corners are always mitred.
+    points = np.asarray(points, dtype=float)
+    d = np.diff(points, axis=0)
+    length = np.hypot(d[:, 0], d[:, 1])
+    keep = np.concatenate([ [True], length > 0 ])   # drop segments of length 0, their direction is undefined
+    points = points[keep]
+    d = d[length > 0]
+    length = length[length > 0]
+    if len(d) == 0:
+        raise ValueError("chain without length")
+    h = width/2
+    u = d/length[:, None]
+    n = np.stack([ -u[:, 1], u[:, 0] ], axis=1)     # left normal of every segment
+    if endCap:
+        points = points.copy()
+        points[-1] += u[-1]*h
+
+    # interior corners, between segment i and i+1
+    n1, n2 = n[:-1], n[1:]
+    cosine = (n1*n2).sum(axis=1)
+    miter = (n1 + n2)*(h/np.maximum(1 + cosine, 1e-12))[:, None]
+    turn = u[:-1, 0]*u[1:, 1] - u[:-1, 1]*u[1:, 0]  # > 0: turns to the left, the right side is outer
+    long = (miter*miter).sum(axis=1) > (c_miterLimit*h)**2
+    chamfer = (join == "chamfer") | long
+    P = points[1:-1]
+    u1, u2 = u[:-1], u[1:]
+    # the chamfer touches the circle of radius h around the corner, it starts h*tan(angle/4) behind the miter line
+    angle = np.arctan2(np.abs(turn), (u1*u2).sum(axis=1))
+    t = (h*np.tan(angle/4))[:, None]
+    # two points per corner and side, equal where the corner is mitred
+    leftOuter = (turn < 0) & chamfer
+    rightOuter = (turn > 0) & chamfer
+    left = np.stack([ np.where(leftOuter[:, None], P + n1*h + u1*t, P + miter), np.where(leftOuter[:, None], P + n2*h - u2*t, P + miter) ], axis=1)
+    right = np.stack([ np.where(rightOuter[:, None], P - n1*h + u1*t, P - miter), np.where(rightOuter[:, None], P - n2*h - u2*t, P - miter) ], axis=1)
+    twice = np.stack([ leftOuter, leftOuter ], axis=1)
+    twice[:, 0] = True
+    left = left[twice]
+    twice = np.stack([ rightOuter, rightOuter ], axis=1)
+    twice[:, 0] = True
+    right = right[twice]
+
+    # left side forward, right side backward
+    return np.concatenate([ [ points[0] + n[0]*h ], left, [ points[-1] + n[-1]*h, points[-1] - n[-1]*h ], right[::-1], [ points[0] - n[0]*h ] ])
+
+def padPolygons(geom, join="miter"):
+    # copper of every pad of an AntGeometry as one polygon, relative to the pad: [ (K1,2), (K2,2) ].
+    # the segments of a pad form one chain, the spiral of pad 1 and the stub of pad 2 overlap at the inner end
+    polygons = []
+    for pad in (0, 1):
+        sel = (geom.pad == pad)
+        start, end = geom.start[sel], geom.end[sel]
+        polygons.append(traceOutline(np.concatenate([ start[:1], end ]), float(geom.width[sel][0]), join))
+    return polygons
@@ -0,0 +1,219 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    N F C   A N T E N N A   G E N E R A T O R   -   I N D U C T A N C E
+# ---------------------------------------------------------------------------
+#
+# inductance of the antennas generated by antGen.py, without the round trip to
+# https://my.st.com/analogsimulator/html_app/antenna/#/
+#
+# two kinds of models:
+#   inductanceWheeler(), inductanceCurrentSheet()
+#       closed form expressions for planar square spirals (S. S. Mohan et al.,
+#       "Simple Accurate Expressions for Planar Spiral Inductances", 1999). the
+#       rectangular outline is replaced by a square with the same perimeter.
+#       good for quick screening, vectorized over all parameters.
+#   inductanceSegments(), inductanceSegmentsBatch()
+#       partial inductance of the exact geometry of antGeom.py (H. M. Greenhouse,
+#       "Design of Planar Rectangular Microelectronic Inductors", 1974): self
+#       inductance of every segment plus the mutual inductance (Grover) of all
+#       pairs of segments which are not perpendicular: the pairs within a direction
+#       class (horizontal, vertical, slope; parallel filaments) and the pairs of a
+#       slope of style 2 and 3 with a horizontal or vertical segment (inclined
+#       filaments in one plane). perpendicular pairs have no mutual inductance and
+#       are not evaluated, every pair is evaluated only once.
+#
+# all lengths in mm, results in H.
+#
+# ---------------------------------------------------------------------------
+
+import numpy as np
+import antGeom
+
+MU0 = 4e-7*np.pi    # [H/m]
+
+c_copperThickness = 0.035  # [mm]  - default copper thickness (1 oz)
+
+# coefficients for square spirals from Mohan et al.
+c_wheelerK1 = 2.34
+c_wheelerK2 = 2.75
+c_currentSheetC = (1.27, 2.07, 0.18, 0.13)
+
+# number of segment pairs evaluated at once, bounds the memory of the segment model
+c_pairBlock = 1 << 22
+
+def _squareSpiral(turns, antLength, antWidth, condWidth, condSpace):
+    # outer and inner diameter and fill ratio of the equivalent square spiral
+    turns = np.asarray(turns, dtype=float)
+    dout = (np.asarray(antLength, dtype=float) + np.asarray(antWidth, dtype=float))/2
+    din = dout - 2*(turns*condWidth + (turns-1)*condSpace)
+    davg = (dout + din)/2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rho = (dout - din)/(dout + din)
+    return turns, davg*1e-3, rho
+
+def inductanceWheeler(turns, antLength, antWidth, condWidth, condSpace):
+    # modified Wheeler formula
+    n, davg, rho = _squareSpiral(turns, antLength, antWidth, condWidth, condSpace)
+    return c_wheelerK1*MU0*n**2*davg/(1 + c_wheelerK2*rho)
+
+def inductanceCurrentSheet(turns, antLength, antWidth, condWidth, condSpace):
+    # current sheet approximation
+    n, davg, rho = _squareSpiral(turns, antLength, antWidth, condWidth, condSpace)
+    c1, c2, c3, c4 = c_currentSheetC
+    return MU0*n**2*davg*c1/2*(np.log(c2/rho) + c3*rho + c4*rho**2)
+
+def _selfInductance(length, width, thickness):
+    # self inductance of a straight rectangular bar (Grover / Greenhouse), length etc. in m
+    with np.errstate(invalid="ignore", divide="ignore"):
+        wt = width + thickness
+        L = MU0/(2*np.pi)*length*(np.log(2*length/wt) + 0.50049 + wt/(3*length))
+    return np.where(length > 0, L, 0.0)
+
+def _F(u, d):
+    # antiderivative of the Neumann integral of two parallel filaments with distance d
+    return u*np.arcsinh(u/d) - np.sqrt(u*u + d*d)
+
+def _mutualParallel(a1, a2, b1, b2, d):
+    # mutual inductance of parallel filaments [a1,a2] and [b1,b2] (positions along their common direction) in distance d.
+    # b1 > b2 means the current of the second filament flows against the first one, the result is negative then
+    return MU0/(4*np.pi)*(_F(a2-b1, d) - _F(a1-b1, d) - _F(a2-b2, d) + _F(a1-b2, d))
+
+def _classMutual(start, end, valid):
+    # twice the sum of the mutual inductances of all pairs i<j of one direction class, per design.
+    # start, end: (B,S,2) in m, all valid segments of a design are parallel
+    B, S = valid.shape
+    total = np.zeros(B)
+    if S < 2:
+        return total
+    # common direction of the class: direction of the first valid segment of each design
+    vec = end - start
+    first = np.argmax(valid, axis=1)
+    u = vec[np.arange(B), first]
+    u = u/np.maximum(np.hypot(u[:, 0], u[:, 1]), 1e-300)[:, None]
+    ux = u[:, 0:1]
+    uy = u[:, 1:2]
+    a = start[..., 0]*ux + start[..., 1]*uy           # position along u
+    b = end[..., 0]*ux + end[..., 1]*uy
+    n = start[..., 1]*ux - start[..., 0]*uy            # position perpendicular to u
+
+    # blocks of rows, so that B*rows*S stays below c_pairBlock
+    rows = max(1, c_pairBlock // max(1, B*S))
+    eps = 1e-12                                         # collinear segments, the log terms cancel for disjoint segments
+    for i0 in range(0, S-1, rows):
+        i1 = min(S-1, i0+rows)
+        ai, bi, ni, vi = a[:, i0:i1, None], b[:, i0:i1, None], n[:, i0:i1, None], valid[:, i0:i1, None]
+        aj, bj, nj, vj = a[:, None, i0+1:], b[:, None, i0+1:], n[:, None, i0+1:], valid[:, None, i0+1:]
+        # upper triangle only: j > i
+        upper = (np.arange(i0+1, S)[None, None, :] > np.arange(i0, i1)[None, :, None])
+        mask = vi & vj & upper
+        # the first segment of a pair is oriented along u, so a1 < a2
+        flip = bi < ai
+        a1 = np.where(flip, -ai, ai)
+        a2 = np.where(flip, -bi, bi)
+        b1 = np.where(flip, -aj, aj)
+        b2 = np.where(flip, -bj, bj)
+        d = np.maximum(np.abs(nj - ni), eps)
+        M = _mutualParallel(a1, a2, b1, b2, d)
+        total += 2*np.where(mask, M, 0.0).sum(axis=(1, 2))
+    return total
+
+def _G(s, t, c, sin):
+    # antiderivative of the Neumann integral of two filaments in one plane with the angle acos(c) between them,
+    # s and t are the positions along them from the intersection of their lines. terms which only depend on
+    # s or t are left out, they cancel in _mutualInclined()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        gs = np.where(s == 0, 0.0, s*np.arcsinh((t - s*c)/(np.abs(s)*sin)))
+        gt = np.where(t == 0, 0.0, t*np.arcsinh((s - t*c)/(np.abs(t)*sin)))
+    return gs + gt
+
+def _mutualInclined(s1, s2, t1, t2, c, sin):
+    # mutual inductance of the filaments [s1,s2] and [t1,t2] (Grover, chapter 11: filaments in one plane which are
+    # inclined to each other), both oriented from 1 to 2 and c = cos of the angle between these orientations
+    return MU0/(4*np.pi)*c*(_G(s2, t2, c, sin) - _G(s1, t2, c, sin) - _G(s2, t1, c, sin) + _G(s1, t1, c, sin))
+
+def _crossMutual(start1, end1, valid1, start2, end2, valid2):
+    # twice the sum of the mutual inductances of all pairs of a segment of the first and one of the second set, per
+    # design. start, end: (B,S1,2) and (B,S2,2) in m, a segment of the first set is parallel to none of the second
+    B, S1 = valid1.shape
+    total = np.zeros(B)
+    if S1 == 0 or valid2.shape[1] == 0:
+        return total
+    v1 = end1 - start1
+    v2 = end2 - start2
+    u1 = v1/np.maximum(np.hypot(v1[..., 0], v1[..., 1]), 1e-300)[..., None]
+    u2 = v2/np.maximum(np.hypot(v2[..., 0], v2[..., 1]), 1e-300)[..., None]
+    rows = max(1, c_pairBlock // max(1, B*valid2.shape[1]))
+    for i0 in range(0, S1, rows):
+        i1 = min(S1, i0+rows)
+        p, ui, vi = start1[:, i0:i1, None], u1[:, i0:i1, None], valid1[:, i0:i1, None]
+        q, uj, vj = start2[:, None], u2[:, None], valid2[:, None]
+        c = ui[..., 0]*uj[..., 0] + ui[..., 1]*uj[..., 1]
+        cross = ui[..., 0]*uj[..., 1] - ui[..., 1]*uj[..., 0]
+        mask = vi & vj & (np.abs(cross) > 1e-9)
+        cross = np.where(mask, cross, 1.0)
+        # positions along both segments from the intersection o = p + s0*ui = q + t0*uj of their lines
+        dx = q[..., 0] - p[..., 0]
+        dy = q[..., 1] - p[..., 1]
+        s0 = (dx*uj[..., 1] - dy*uj[..., 0])/cross
+        t0 = (dx*ui[..., 1] - dy*ui[..., 0])/cross
+        s1 = -s0
+        s2 = s1 + np.hypot(v1[:, i0:i1, None, 0], v1[:, i0:i1, None, 1])
+        t1 = -t0
+        t2 = t1 + np.hypot(v2[:, None, :, 0], v2[:, None, :, 1])
+        M = _mutualInclined(s1, s2, t1, t2, c, np.abs(cross))
+        total += 2*np.where(mask, M, 0.0).sum(axis=(1, 2))
+    return total
+
+def _directionClass(kind):
+    # 0: horizontal, 1: vertical, 2: slope
+    return np.select([ (kind == antGeom.KIND_UP) | (kind == antGeom.KIND_DOWN), kind == antGeom.KIND_SLOPE ], [1, 2], 0)
+
+def inductanceSegmentsBatch(geom, thickness=c_copperThickness):
+    # segment model for an antGeom.AntGeometryBatch, returns (B,) inductances
+    start, end = antGeom.pathSegments(geom)
+    start = start*1e-3
+    end = end*1e-3
+    width = geom.width*1e-3
+    valid = geom.valid
+    length = np.hypot(end[..., 0]-start[..., 0], end[..., 1]-start[..., 1])
+    L = np.where(valid, _selfInductance(length, width, thickness*1e-3), 0.0).sum(axis=1)
+
+    cls = _directionClass(geom.kind)
+    for c in (0, 1, 2):
+        s, e, v = _members(start, end, valid & (cls == c) & (length > 0))
+        if v.shape[1] >= 2:
+            L += _classMutual(s, e, v)
+    # slopes against horizontal and vertical segments, the pairs of these two classes are perpendicular
+    # only designs with slopes (style 2 and 3)
+    slope = valid & (cls == 2) & (length > 0)
+    has = slope.any(axis=1)
+    if has.any():
+        L[has] += _crossMutual(*(_members(start[has], end[has], slope[has]) + _members(start[has], end[has], (valid & (cls != 2) & (length > 0))[has])))
+    return L
+
+def _members(start, end, member):
+    # start, end and valid of the members, moved to the front of each design
+    Sc = int(member.sum(axis=1).max()) if member.size else 0
+    order = np.argsort(~member, axis=1, kind="stable")[:, :Sc]
+    return (np.take_along_axis(start, order[..., None], axis=1), np.take_along_axis(end, order[..., None], axis=1),
+            np.take_along_axis(member, order, axis=1))
+
+def inductanceSegments(geom, thickness=c_copperThickness):
+    # segment model for a single antGeom.AntGeometry
+    n = len(geom.start)
+    batch = antGeom.AntGeometryBatch(geom.start[None], geom.end[None], geom.width[None], geom.pad[None],
+                                     geom.kind[None], geom.padPos[None], np.array([n]), np.ones((1, n), dtype=bool))
+    return float(inductanceSegmentsBatch(batch, thickness)[0])
+
+c_methods = [ "wheeler", "currentsheet", "segments" ]
+
+def inductance( method, turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style, thickness=c_copperThickness ):
+    # inductance of an antenna with the parameters of antGen.genAnt, method is one of c_methods
+    if method == "wheeler":
+        return float(inductanceWheeler(turns, antLength, antWidth, condWidth, condSpace))
+    if method == "currentsheet":
+        return float(inductanceCurrentSheet(turns, antLength, antWidth, condWidth, condSpace))
+    if method == "segments":
+        return inductanceSegments(antGeom.antGeometry(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style), thickness)
+    raise ValueError("unknown inductance method '%s', use one of %s" % (method, ", ".join(c_methods)))
@@ -0,0 +1,301 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    N F C   A N T E N N A   G E N E R A T O R   -   I N V E R S E   D E S I G N
+# ---------------------------------------------------------------------------
+#
+# usage: ./antOptimize.py -h
+#
+# searches turns, conductorWidth, conductorSpace and style of an antenna with
+# a given outline (antennaLength x antennaWidth) for a target inductance, e.g.
+#
+#   ./antOptimize.py -L 1.2 -l 75.4 -w 33.5
+#
+# every candidate has to respect the manufacturing minimums (conductor width,
+# conductor space, also on the slope of style 2) and must be drawable: all
+# segments go in their nominal direction and the inner window keeps at least
+# --minWindow in both directions.
+#
+# the candidates within --tolerance of the target have to pass the design rule
+# check which antGen.py runs before writing (see antDrc.py, --drcClearance,
+# --noDrc), e.g. turns of style 3 whose slopes come too close are dropped.
+# the remaining candidates are ranked by pareto fronts
+# over (inductance error, dc resistance, copper area), inside a front by the
+# inductance error. --emit writes the best candidates with antGen.py.
+#
+# search:
+#   - the whole grid turns x conductorWidth x conductorSpace x style is set up
+#     as arrays. infeasible regions (inner window too small, space on the slope
+#     of style 2 too small) and candidates whose (fast) wheeler estimate is far
+#     away from the target are pruned vectorized, before any geometry is built
+#   - the remaining candidates are evaluated with the exact geometry in chunks,
+#     which are split over a pool of worker processes
+#   - evaluations are memoized, repeated searches (other target, other
+#     tolerance) with the same outline do not evaluate a candidate twice
+#
+# ---------------------------------------------------------------------------
+
+import sys, argparse, os, time, math, bisect
+import numpy as np
+import antGen, antGeom, antInductance, antDrc
+
+c_copperResistivity = 1.72e-8   # [Ohm*m] - resistivity of copper at 20 degC
+
+# the wheeler estimate has to be within this factor of the target before the segment model is evaluated
+c_wheelerBand = 2.0
+
+def frange(start, stop, step):
+    # values from start to stop (included) with step, rounded to avoid 0.30000000000000004
+    count = int(math.floor((stop - start)/step + 1e-9)) + 1
+    return [ round(start + i*step, 6) for i in range(max(0, count)) ]
+
+# number of candidates evaluated with one geometry batch
+c_chunk = 2000
+
+# memoized results of evaluate(), key: (style, turns, antLength, antWidth, conductorWidth, conductorSpace, thickness, model)
+_cache = {}
+
+def evaluateChunk(job):
+    # worker: evaluate a chunk of candidates with the exact geometry, returns arrays
+    # (inductance [H], dc resistance [Ohm], copper area [mm^2], trace length [mm], drawable)
+    style, turns, antLength, antWidth, condWidth, condSpace, thickness, model = job
+    geom = antGeom.antGeometryBatch(turns, antLength, antWidth, condWidth, condSpace, -1, style)
+    ok = antGeom.segmentsOk(geom).all(axis=1)
+    length = antGeom.segmentLength(geom).sum(axis=1)
+    if model == "segments":
+        L = antInductance.inductanceSegmentsBatch(geom, thickness)
+    else:
+        L = antInductance.inductanceWheeler(turns, antLength, antWidth, condWidth, condSpace)
+    R = c_copperResistivity*length*1e-3/(condWidth*1e-3*thickness*1e-3)
+    area = length*condWidth
+    return L, R, area, length, ok
+
+def evaluate(style, turns, antLength, antWidth, condWidth, condSpace, thickness, model, workers=1):
+    # evaluate candidates (arrays), returns a list of tuples like evaluateChunk() for every candidate.
+    # only candidates which are not in the cache yet are evaluated
+    n = len(turns)
+    keys = list(zip(style.tolist(), turns.tolist(), [antLength]*n, [antWidth]*n, condWidth.tolist(), condSpace.tolist(), [thickness]*n, [model]*n))
+    missing = np.array([ i for i, k in enumerate(keys) if k not in _cache ], dtype=np.intp)
+    chunks = np.array_split(missing, -(-len(missing)//c_chunk)) if len(missing) else []
+    jobs = [ (style[c], turns[c], antLength, antWidth, condWidth[c], condSpace[c], thickness, model) for c in chunks ]
+    if workers <= 1 or len(jobs) <= 1:
+        results = list(map(evaluateChunk, jobs))
+    else:
+        from multiprocessing import Pool
+        with Pool(min(workers, len(jobs))) as pool:
+            results = pool.map(evaluateChunk, jobs)
+    for c, (L, R, area, length, ok) in zip(chunks, results):
+        for i, values in zip(c.tolist(), zip(L.tolist(), R.tolist(), area.tolist(), length.tolist(), ok.tolist())):
+            _cache[keys[i]] = values
+    return [ _cache[k] for k in keys ]
+
+# memoized results of drcOk(), key: (style, turns, antLength, antWidth, conductorWidth, conductorSpace, drcClearance)
+_drcCache = {}
+
+def drcChunk(job):
+    # worker: design rule check of candidates (style, turns, conductorWidth, conductorSpace), the same as
+    # antGen.checkedGeometry() before writing. returns a list of bools, True if the candidate passes
+    antLength, antWidth, drcClearance, candidates = job
+    return [ not antDrc.checkAnt(turns, antLength, antWidth, condWidth, condSpace, -1, style, drcClearance)
+             for style, turns, condWidth, condSpace in candidates ]
+
+def drcOk(candidates, antLength, antWidth, drcClearance=None, workers=1):
+    # design rule check of a list of candidates (style, turns, conductorWidth, conductorSpace), returns a list of bools.
+    # only candidates which are not in the cache yet are checked
+    keys = [ (style, turns, antLength, antWidth, condWidth, condSpace, drcClearance) for style, turns, condWidth, condSpace in candidates ]
+    missing = [ c for c, k in zip(candidates, keys) if k not in _drcCache ]
+    chunks = [ missing[i:i+c_chunk//10] for i in range(0, len(missing), c_chunk//10) ]
+    jobs = [ (antLength, antWidth, drcClearance, chunk) for chunk in chunks ]
+    if workers <= 1 or len(jobs) <= 1:
+        results = list(map(drcChunk, jobs))
+    else:
+        from multiprocessing import Pool
+        with Pool(min(workers, len(jobs))) as pool:
+            results = pool.map(drcChunk, jobs)
+    for chunk, ok in zip(chunks, results):
+        for (style, turns, condWidth, condSpace), passed in zip(chunk, ok):
+            _drcCache[(style, turns, antLength, antWidth, condWidth, condSpace, drcClearance)] = passed
+    return [ _drcCache[k] for k in keys ]
+
+def paretoRank(objectives):
+    # rank of non dominated sorting (0: pareto front), objectives (N,3) are minimized.
+    # in lexicographic order a point can only be dominated by points before it. every front keeps the
+    # staircase of its points in objectives 2 and 3 (2 ascending, 3 descending), a point is dominated by
+    # a front if the staircase reaches below it. as a point dominated by front k is dominated by all fronts
+    # before k as well, its front is found with a binary search: time O(N log N log fronts), memory O(N)
+    objectives = np.asarray(objectives, dtype=float)
+    if objectives.ndim != 2 or objectives.shape[1] != 3:
+        raise ValueError("paretoRank needs 3 objectives per candidate, got shape %s" % (objectives.shape,))
+    # equal points do not dominate each other, they share a rank
+    points, inverse = np.unique(objectives, axis=0, return_inverse=True)
+    fronts = []     # (objective 2, objective 3) of the staircase of every front
+    rank = np.empty(len(points), dtype=int)
+    for i, (_, b, c) in enumerate(points.tolist()):
+        lo, hi = 0, len(fronts)
+        while lo < hi:
+            mid = (lo + hi)//2
+            bs, cs = fronts[mid]
+            j = bisect.bisect_right(bs, b)
+            if j and cs[j-1] <= c:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == len(fronts):
+            fronts.append(([], []))
+        bs, cs = fronts[lo]
+        j = k = bisect.bisect_left(bs, b)
+        while k < len(bs) and cs[k] >= c:
+            k += 1
+        bs[j:k] = [b]
+        cs[j:k] = [c]
+        rank[i] = lo
+    return rank[inverse.ravel()]
+
+def optimize( target,                   # [H]   - target inductance
+              antLength,                # [mm]
+              antWidth,                 # [mm]
+              minConductorWidth=0.15,   # [mm]
+              maxConductorWidth=3.0,    # [mm]
+              minConductorSpace=0.15,   # [mm]
+              maxConductorSpace=2.0,    # [mm]
+              step=0.05,                # [mm]  - grid step of conductorWidth and conductorSpace
+              maxTurns=20,              # [#]
+              styles=(1, 2, 3),
+              minWindow=0.0,            # [mm]  - minimal length and width of the inner window
+              tolerance=0.05,           # [-]   - allowed relative inductance error
+              thickness=antInductance.c_copperThickness, # [mm]
+              model="segments",         # [-]   - inductance model, "segments" or "wheeler"
+              workers=None,
+              drc=True,                 # [-]   - drop candidates which fail the design rule check (see antDrc.py)
+              drcClearance=None ):      # [mm]  - clearance of the check, None: conductorSpace (style 2: conductorSpace/sqrt(2))
+    # returns the candidates within tolerance as list of dicts, best first
+    grid = np.array([ (style, turns, condWidth, condSpace)
+                      for style in styles
+                      for condSpace in frange(minConductorSpace, maxConductorSpace, step)
+                      for condWidth in frange(minConductorWidth, maxConductorWidth, step)
+                      for turns in range(1, maxTurns+1) ])
+    if len(grid) == 0:
+        return []
+    style = grid[:, 0].astype(int)
+    turns = grid[:, 1].astype(int)
+    condWidth = grid[:, 2]
+    condSpace = grid[:, 3]
+
+    # pruning, no geometry needed for this
+    windowLength, windowWidth = antGeom.innerWindow(turns, antLength, antWidth, condWidth, condSpace)
+    keep = (windowLength >= minWindow) & (windowWidth >= minWindow)
+    keep &= (style != 2) | (condSpace/math.sqrt(2) >= minConductorSpace - 1e-9)   # space on the slope of style 2 is conductorSpace/sqrt(2)
+    Lw = antInductance.inductanceWheeler(turns, antLength, antWidth, condWidth, condSpace)
+    keep &= (Lw >= target/c_wheelerBand) & (Lw <= target*c_wheelerBand)
+    style, turns, condWidth, condSpace = style[keep], turns[keep], condWidth[keep], condSpace[keep]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    results = evaluate(style, turns, antLength, antWidth, condWidth, condSpace, thickness, model, workers)
+    found = [ (int(style[i]), int(turns[i]), float(condWidth[i]), float(condSpace[i])) + r[:4]
+              for i, r in enumerate(results) if r[4] ]
+
+    candidates = [ c for c in found if abs(c[4]-target) <= tolerance*target ]
+    if drc:
+        ok = drcOk([ c[:4] for c in candidates ], antLength, antWidth, drcClearance, workers)
+        candidates = [ c for c, passed in zip(candidates, ok) if passed ]
+    if not candidates:
+        return []
+    objectives = np.array([ (abs(c[4]-target)/target, c[5], c[6]) for c in candidates ])
+    rank = paretoRank(objectives)
+    order = sorted(range(len(candidates)), key=lambda i: (rank[i], objectives[i, 0]))
+    return [ { "rank": int(rank[i]), "style": candidates[i][0], "turns": candidates[i][1], "conductorWidth": candidates[i][2],
+               "conductorSpace": candidates[i][3], "inductance": candidates[i][4], "error": objectives[i, 0],
+               "resistance": candidates[i][5], "copperArea": candidates[i][6], "traceLength": candidates[i][7] }
+             for i in order ]
+
+# -----------------------------------------------------------------------------
+#    M A I N
+# -----------------------------------------------------------------------------
+
+def main(args):
+    parser=argparse.ArgumentParser(description="search antennas with a target inductance inside a given outline")
+    parser.add_argument("-L", "--targetInductance"    , type=float, required=True ,  help="target inductance in uH")
+    parser.add_argument("-l", "--antennaLength"       , type=float, required=True ,  help="lenght of antenna in mm (outer copper dimension)")
+    parser.add_argument("-w", "--antennaWidth"        , type=float, required=True ,  help="width of antenna in mm (outer copper dimension)")
+    parser.add_argument("-c", "--minConductorWidth"   , type=float, default=0.15  ,  help="minimal width of conductor in mm, will be set to 0.15 if not provided")
+    parser.add_argument("-C", "--maxConductorWidth"   , type=float, default=3.0   ,  help="maximal width of conductor in mm, will be set to 3.0 if not provided")
+    parser.add_argument("-s", "--minConductorSpace"   , type=float, default=0.15  ,  help="minimal space between conductors in mm (also on the slope of style 2), will be set to 0.15 if not provided")
+    parser.add_argument("-S", "--maxConductorSpace"   , type=float, default=2.0   ,  help="maximal space between conductors in mm, will be set to 2.0 if not provided")
+    parser.add_argument("-g", "--step"                , type=float, default=0.05  ,  help="grid step of conductor width and space in mm, will be set to 0.05 if not provided")
+    parser.add_argument("-n", "--maxTurns"            , type=int  , default=20    ,  help="maximal number of turns, will be set to 20 if not provided")
+    parser.add_argument("-t", "--styles"              ,             default="1,2,3", help="comma separated list of styles to search, will be set to 1,2,3 if not provided")
+    parser.add_argument("-W", "--minWindow"           , type=float, default=0.0   ,  help="minimal length and width of the window inside the coil in mm, will be set to 0 if not provided")
+    parser.add_argument("-r", "--tolerance"           , type=float, default=5.0   ,  help="allowed inductance error in percent, will be set to 5 if not provided")
+    parser.add_argument("-k", "--copperThickness"     , type=float, default=0.035 ,  help="copper thickness in mm, will be set to 0.035 if not provided")
+    parser.add_argument("-i", "--inductance"          ,             default="segments", choices=["segments","wheeler"], help="inductance model, will be set to segments if not provided")
+    parser.add_argument("-j", "--workers"             , type=int  , default=None  ,  help="number of worker processes, will be set to the number of cpus if not provided")
+    parser.add_argument("--drcClearance"              , type=float, default=None  ,  help="minimal clearance in mm for the design rule check of the candidates, will be set to conductorSpace (style 2: conductorSpace/sqrt(2)) if not provided")
+    parser.add_argument("-x", "--noDrc"               , action="store_true"        ,  help="do not drop candidates which fail the design rule check")
+    parser.add_argument("-p", "--top"                 , type=int  , default=20    ,  help="number of candidates to print, will be set to 20 if not provided")
+    parser.add_argument("-o", "--outdir"              ,             default="./nfc_ant.pretty", help="output directory of emitted candidates, will be set to ./nfc_ant.pretty if not provided")
+    parser.add_argument("-F", "--format"              , action="append"            ,  help="output format of emitted candidates, can be given several times, see antGen.py -h. will be set to kicad5 if not provided", choices=["kicad5","kicad6","kicad7","kicad8","svg","dxf","gerber"])
+    parser.add_argument("-e", "--emit"                , type=int  , default=0     ,  help="write the best EMIT candidates to <outdir>/<modulename>_<i>.kicad_mod (and the other formats)")
+    parser.add_argument("-f", "--modulename"          ,             default="nfc_ant_opt", help="modulename prefix of emitted candidates, will be set to nfc_ant_opt if not provided")
+    parser.add_argument("-m", "--silkMargin"          , type=float, default=0     ,  help="silkMargin of emitted candidates in mm, will be set to 0 if not provided")
+    parser.add_argument("-d", "--drillSize"           , type=float, default=-1    ,  help="drillSize of emitted candidates in mm, will be set to -1 (auto) if not provided")
+    args=parser.parse_args(args)
+
+    formats = args.format or ["kicad5"]
+    try:
+        antGen.exportPaths(args.outdir, "x", formats)
+    except ValueError as e:
+        print("ERROR: %s" % (e))
+        return 1
+
+    t0 = time.perf_counter()
+    ranked = optimize( target=args.targetInductance*1e-6,
+                       antLength=args.antennaLength,
+                       antWidth=args.antennaWidth,
+                       minConductorWidth=args.minConductorWidth,
+                       maxConductorWidth=args.maxConductorWidth,
+                       minConductorSpace=args.minConductorSpace,
+                       maxConductorSpace=args.maxConductorSpace,
+                       step=args.step,
+                       maxTurns=args.maxTurns,
+                       styles=[ int(s) for s in args.styles.split(",") ],
+                       minWindow=args.minWindow,
+                       tolerance=args.tolerance/100,
+                       thickness=args.copperThickness,
+                       model=args.inductance,
+                       workers=args.workers,
+                       drc=not args.noDrc,
+                       drcClearance=args.drcClearance )
+    dt = time.perf_counter() - t0
+
+    print("found %d candidates within %.1f%% in %.3f s, %d on the pareto front" % (len(ranked), args.tolerance, dt, sum(1 for c in ranked if c["rank"] == 0)))
+    if ranked:
+        print(" rank style turns  width  space  L [uH]  err [%]  R [Ohm]  area [mm^2]  length [mm]")
+    for c in ranked[:args.top]:
+        print("%5d %5d %5d %6.2f %6.2f %7.4f %8.2f %8.4f %12.1f %12.1f" % (c["rank"], c["style"], c["turns"], c["conductorWidth"], c["conductorSpace"],
+              c["inductance"]*1e6, c["error"]*100, c["resistance"], c["copperArea"], c["traceLength"]))
+
+    if args.emit > 0 and ranked:
+        # the same path as every other writer: geometry, design rule check, all formats in one pass
+        if not os.path.exists(args.outdir):
+            os.makedirs(args.outdir)
+        for i, c in enumerate(ranked[:args.emit]):
+            name = "%s_%d" % (args.modulename, i+1)
+            try:
+                params = antGen.AntParams.fromDict(dict(modulename=name, turns=c["turns"], antennaLength=args.antennaLength,
+                                                        antennaWidth=args.antennaWidth, conductorWidth=c["conductorWidth"],
+                                                        conductorSpace=c["conductorSpace"], drillSize=args.drillSize,
+                                                        minimalConductorSpace=-1, silkMargin=args.silkMargin, style=c["style"])).asDict()
+                geom = antGen.checkedGeometry(params, not args.noDrc, args.drcClearance)
+            except antGen.DrcError as e:
+                print("FAILED: %s: DRC: %s" % (name, e.violations[0]))
+                continue
+            except ValueError as e:
+                print("FAILED: %s: %s" % (name, e))
+                continue
+            paths = antGen.exportAnt(args.outdir, formats=formats, geom=geom, **params)
+            print("written %s" % (", ".join(paths.values())))
+    return 0 if ranked else 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,330 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    N F C   A N T E N N A   G E N E R A T O R   -   R E S U L T S   S T O R E
+# ---------------------------------------------------------------------------
+#
+# usage: ./antStore.py -h
+#
+# columnar store of the designs of a sweep: one numpy array per column, one
+# row per design. the columns are the parameters of antGen.py (drillSize
+# after the auto calculation) and metrics derived from the geometry, see
+# c_columns. the batch mode writes a store with --store, ./antStore.py build
+# computes one from a parameter table / sweep specification without writing
+# any footprints.
+#
+# a store is either a directory with one .npy file per column and store.json
+# (the columns are memory mapped when read, a query only touches the columns
+# it filters on) or a single .npz file (columns are loaded on first use).
+#
+# queries are conditions 'column op value' (op: < <= > >= == !=), all of
+# them have to be true. they are evaluated block by block over the columns,
+# no python object per row is built, e.g.
+#
+#   ./antStore.py query sweep.store "turns==3" "style==3" "antennaLength<40" "antennaWidth<30" "traceLength<500"
+#
+# from python:
+#
+#   store = antStore.loadStore("sweep.store")
+#   rows = antStore.query(store, ["turns==3", "traceLength<500"])
+#   data = antStore.select(store, rows, ["modulename", "traceLength"])
+#
+# ---------------------------------------------------------------------------
+
+import sys, os, re, json, argparse, operator
+import numpy as np
+
+STORE_VERSION = 1
+
+# name, dtype and description of the columns, in this order
+c_columns = [
+    ( "modulename",            "U",  "name of the module" ),
+    ( "turns",                 "i4", "[#]" ),
+    ( "antennaLength",         "f8", "[mm]" ),
+    ( "antennaWidth",          "f8", "[mm]" ),
+    ( "conductorWidth",        "f8", "[mm]" ),
+    ( "conductorSpace",        "f8", "[mm]" ),
+    ( "drillSize",             "f8", "[mm]  after the auto calculation" ),
+    ( "minimalConductorSpace", "f8", "[mm]" ),
+    ( "silkMargin",            "f8", "[mm]" ),
+    ( "style",                 "i1", "[-]" ),
+    ( "segments",              "i4", "[#]   segments of spiral and stub" ),
+    ( "traceLength",           "f8", "[mm]  length of spiral and stub" ),
+    ( "copperArea",            "f8", "[mm^2] traceLength * conductorWidth" ),
+    ( "windowLength",          "f8", "[mm]  length of the window inside the innermost turn" ),
+    ( "windowWidth",           "f8", "[mm]  width of the window inside the innermost turn" ),
+    ( "pad1X",                 "f8", "[mm]  position of pad 1" ),
+    ( "pad1Y",                 "f8", "[mm]" ),
+    ( "pad2X",                 "f8", "[mm]  position of pad 2" ),
+    ( "pad2Y",                 "f8", "[mm]" ),
+    ( "drawable",              "?",  "all segments go in their nominal direction" ),
+    ( "generated",             "?",  "footprint was written (batch mode, false for failed variants)" ),
+]
+
+c_names = [ c[0] for c in c_columns ]
+
+# parameters in the columns, without modulename
+c_parameters = c_names[1:10]
+
+# rows evaluated at once by query()
+c_queryBlock = 1 << 20
+
+c_operators = { "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq, "=": operator.eq, "!=": operator.ne }
+
+def designMetrics(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style):
+    # derived columns (dict of arrays) of many designs, parameters are arrays of the same length.
+    # the geometry is evaluated in blocks (antGeom.geometryBlocks), designs which can not be drawn get nan
+    import antGeom
+    turns = np.asarray(turns, dtype=np.int64)
+    n = len(turns)
+    out = { k: np.full(n, np.nan) for k in ("traceLength", "windowLength", "windowWidth", "pad1X", "pad1Y", "pad2X", "pad2Y") }
+    out["segments"] = np.zeros(n, dtype=np.int32)
+    out["drawable"] = np.zeros(n, dtype=bool)
+    ok = turns >= 1
+    out["segments"][ok] = antGeom.segmentCount(turns[ok], style[ok]) + 1
+    for rows, geom in antGeom.geometryBlocks(turns, antLength, antWidth, condWidth, condSpace, condSpaceMin, style):
+        out["traceLength"][rows] = np.where(geom.valid, antGeom.segmentLength(geom), 0.0).sum(axis=1)
+        out["drawable"][rows] = antGeom.segmentsOk(geom).all(axis=1) & np.isfinite(geom.padPos).all(axis=(1, 2))
+        out["pad1X"][rows], out["pad1Y"][rows] = geom.padPos[:, 0, 0], geom.padPos[:, 0, 1]
+        out["pad2X"][rows], out["pad2Y"][rows] = geom.padPos[:, 1, 0], geom.padPos[:, 1, 1]
+    out["windowLength"][ok], out["windowWidth"][ok] = antGeom.innerWindow(turns[ok], antLength[ok], antWidth[ok], condWidth[ok], condSpace[ok])
+    out["copperArea"] = out["traceLength"]*condWidth
+    return out
+
+def storeColumns(params, names=None, generated=None):
+    # all columns of a store from the parameter columns (dict of arrays with the names of c_parameters),
+    # names: modulenames (list or array), generated: bool array, both default to empty names and True
+    import antGeom
+    n = len(params["turns"])
+    cols = {}
+    for name, dtype, _ in c_columns[1:10]:
+        cols[name] = np.asarray(params[name]).astype(dtype)
+    cols["drillSize"] = antGeom.resolveDrillSize(cols["drillSize"], cols["conductorWidth"])
+    cols.update(designMetrics(cols["turns"], cols["antennaLength"], cols["antennaWidth"], cols["conductorWidth"],
+                              cols["conductorSpace"], cols["minimalConductorSpace"], cols["style"]))
+    cols["modulename"] = np.asarray(names if names is not None else [""]*n, dtype=str)
+    cols["generated"] = np.ones(n, dtype=bool) if generated is None else np.asarray(generated, dtype=bool)
+    return { name: cols[name] for name in c_names }
+
+def variantColumns(variants, generated=None):
+    # columns of a list of parameter sets (e.g. antBatch.makeVariants()), rows with an error are left out.
+    # generated: dict modulename -> bool
+    params = tableParameters(variants)
+    names = [ v["modulename"] for v in variants if "error" not in v ]
+    done = None if generated is None else [ generated.get(name, True) for name in names ]
+    return storeColumns(params, names, done)
+
+def sweepParameters(spec):
+    # parameter columns (dict of arrays with the names of c_parameters) of a sweep specification (see
+    # antBatch.py), the combinations are built as arrays with numpy instead of one dict per row
+    import antBatch
+    unknown = [ k for k in spec if k not in c_parameters and k != "modulename" ]
+    if unknown:
+        raise ValueError("unknown parameter(s) %s" % (", ".join(unknown)))
+    missing = [ k for k in c_parameters if k not in spec and k not in antBatch.c_defaults ]
+    if missing:
+        raise ValueError("missing parameter(s) %s" % (", ".join(missing)))
+    values = [ np.asarray(antBatch.sweepValues(spec[k], k) if k in spec else [antBatch.c_defaults[k]]) for k in c_parameters ]
+    grid = np.meshgrid(*values, indexing="ij")
+    return { k: g.ravel() for k, g in zip(c_parameters, grid) }
+
+def tableParameters(variants):
+    # parameter columns of a list of parameter sets (e.g. antBatch.makeVariants()), rows with an error are left out
+    variants = [ v for v in variants if "error" not in v ]
+    return { k: np.array([ v[k] for v in variants ]) for k in c_parameters }
+
+def sweepColumns(spec, nameTemplate=None):
+    # columns of a sweep specification, modulenames are only built with a nameTemplate
+    params = sweepParameters(spec)
+    names = None
+    if nameTemplate:
+        fields = [ params[k].tolist() for k in c_parameters ]
+        names = [ nameTemplate.format(**dict(zip(c_parameters, row))) for row in zip(*fields) ]
+    return storeColumns(params, names)
+
+def saveStore(path, columns):
+    # write columns (dict of arrays) as .npz file or as directory of .npy files. files are written under a
+    # temporary name and renamed, store.json is written last
+    if path.endswith(".npz"):
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **columns)
+        os.replace(tmp, path)
+        return
+    if not os.path.exists(path):
+        os.makedirs(path)
+    for name, a in columns.items():
+        tmp = os.path.join(path, ".%s.tmp.npy" % (name))
+        np.save(tmp, a)
+        os.replace(tmp, os.path.join(path, name + ".npy"))
+    meta = { "version": STORE_VERSION, "rows": len(next(iter(columns.values()))) if columns else 0, "columns": list(columns.keys()) }
+    tmp = os.path.join(path, ".store.json.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=1)
+    os.replace(tmp, os.path.join(path, "store.json"))
+
+class Store:
+    # columns of a store, opened on first use: memory mapped (directory) or loaded (.npz)
+
+    def __init__(self, path):
+        self.path = path
+        self._open = {}
+        if path.endswith(".npz"):
+            self._npz = np.load(path)
+            self.columns = list(self._npz.files)
+        else:
+            self._npz = None
+            with open(os.path.join(path, "store.json")) as f:
+                meta = json.load(f)
+            if meta.get("version") != STORE_VERSION:
+                raise ValueError("%s has store version %s, expected %d" % (path, meta.get("version"), STORE_VERSION))
+            self.columns = meta["columns"]
+        self.rows = len(self[self.columns[0]]) if self.columns else 0
+
+    def __getitem__(self, name):
+        if name not in self._open:
+            if name not in self.columns:
+                raise KeyError("unknown column '%s', the store has %s" % (name, ", ".join(self.columns)))
+            if self._npz is not None:
+                self._open[name] = self._npz[name]
+            else:
+                self._open[name] = np.load(os.path.join(self.path, name + ".npy"), mmap_mode="r")
+        return self._open[name]
+
+    def __len__(self):
+        return self.rows
+
+def loadStore(path):
+    return Store(path)
+
+def parseCondition(condition):
+    # 'column op value' -> (column, op, value), value stays text, query() converts it to the type of the column
+    m = re.match(r"^\s*(\w+)\s*(<=|>=|==|!=|<|>|=)\s*(.*?)\s*$", condition)
+    if not m:
+        raise ValueError("condition '%s' is not of the form 'column op value'" % (condition))
+    return m.groups()
+
+def _value(name, column, text):
+    # text of a condition as value of the column: string, bool (true/false, 1/0) or number
+    kind = column.dtype.kind
+    if kind == "U":
+        return text.strip("'\"")
+    if kind == "b" and text.lower() in ("true", "false"):
+        return text.lower() == "true"
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError("column '%s' can not be compared with '%s'" % (name, text))
+
+def query(store, conditions, limit=None):
+    # indices of the rows which fulfil all conditions (strings or (column, op, value)), in store order.
+    # the columns are compared block by block, at most limit rows are returned
+    tests = []
+    for c in conditions:
+        if isinstance(c, str):
+            name, op, text = parseCondition(c)
+            value = _value(name, store[name], text)
+        else:
+            name, op, value = c
+        tests.append((store[name], c_operators[op], value))
+    found = []
+    total = 0
+    for i in range(0, store.rows, c_queryBlock):
+        mask = np.ones(min(c_queryBlock, store.rows - i), dtype=bool)
+        for column, op, value in tests:
+            mask &= op(column[i:i+c_queryBlock], value)
+        rows = np.flatnonzero(mask) + i
+        found.append(rows)
+        total += len(rows)
+        if limit is not None and total >= limit:
+            break
+    rows = np.concatenate(found) if found else np.zeros(0, dtype=np.intp)
+    return rows if limit is None else rows[:limit]
+
+def select(store, rows, columns=None):
+    # values of the given rows (index array from query()) as dict column -> array
+    return { name: np.asarray(store[name][rows]) for name in (columns or store.columns) }
+
+# -----------------------------------------------------------------------------
+#    M A I N
+# -----------------------------------------------------------------------------
+
+def _format(a):
+    if a.dtype.kind == "f":
+        return [ "%g" % (v) for v in a.tolist() ]
+    return [ str(v) for v in a.tolist() ]
+
+def mainBuild(args):
+    import time, antBatch
+    t0 = time.perf_counter()
+    table = antBatch.loadTable(args.table)
+    try:
+        if isinstance(table, dict):
+            columns = sweepColumns(table, args.name if not args.noNames else None)
+        else:
+            columns = variantColumns(antBatch.makeVariants(table, args.name))
+    except ValueError as e:
+        print("ERROR: %s" % (e))
+        return 1
+    saveStore(args.store, columns)
+    n = len(columns["turns"])
+    print("%d designs written to %s in %.3f s, %d drawable" % (n, args.store, time.perf_counter() - t0, int(columns["drawable"].sum())))
+    return 0
+
+def mainQuery(args):
+    store = loadStore(args.store)
+    try:
+        rows = query(store, args.conditions, None if args.count else args.limit)
+    except (ValueError, KeyError) as e:
+        print("ERROR: %s" % (e.args[0]))
+        return 1
+    if args.count:
+        print(len(rows))
+        return 0
+    columns = args.columns.split(",") if args.columns else store.columns
+    data = select(store, rows, columns)
+    out = sys.stdout
+    out.write(",".join(columns) + "\n")
+    for i in range(0, len(rows), 10000):
+        text = [ _format(data[name][i:i+10000]) for name in columns ]
+        out.writelines(",".join(values) + "\n" for values in zip(*text))
+    return 0
+
+def mainInfo(args):
+    store = loadStore(args.store)
+    print("%s: %d rows" % (args.store, store.rows))
+    for name in store.columns:
+        a = store[name]
+        if a.dtype.kind in "fiu" and store.rows:
+            print("  %-22s %-5s %12g .. %-12g" % (name, a.dtype.str[1:], np.nanmin(a), np.nanmax(a)))
+        elif a.dtype.kind == "b":
+            print("  %-22s %-5s %d true" % (name, "bool", int(np.count_nonzero(a))))
+        else:
+            print("  %-22s %-5s" % (name, a.dtype.str[1:]))
+    return 0
+
+def main(args):
+    import antBatch
+    parser=argparse.ArgumentParser(description="columnar store of the designs of a sweep, build and query it")
+    sub = parser.add_subparsers(dest="command")
+    sub.required = True
+    p = sub.add_parser("build", help="compute the store of a parameter table or sweep specification (see antBatch.py), no footprints are written")
+    p.add_argument("table"                ,                                            help="parameter table (.csv, .json, .yaml) or sweep specification (.json, .yaml)")
+    p.add_argument("store"                ,                                            help="store to write: directory (memory mapped columns) or .npz file")
+    p.add_argument("-N", "--name"         , default=antBatch.c_nameTemplate          , help="template for the modulename of rows without modulename, see antBatch.py -h")
+    p.add_argument("--noNames"            , action="store_true"                      , help="sweeps: no modulenames, faster for millions of designs")
+    p.set_defaults(func=mainBuild)
+    p = sub.add_parser("query", help="print the rows which fulfil all conditions as csv")
+    p.add_argument("store"                ,                                            help="store directory or .npz file")
+    p.add_argument("conditions"           , nargs="*"                                , help="conditions 'column op value', op is one of < <= > >= == !=")
+    p.add_argument("-c", "--columns"      ,                                            help="comma separated columns to print, all if not provided")
+    p.add_argument("-n", "--limit"        , type=int, default=None                   , help="print at most this many rows")
+    p.add_argument("--count"              , action="store_true"                      , help="only print the number of rows")
+    p.set_defaults(func=mainQuery)
+    p = sub.add_parser("info", help="print the number of rows and the range of every column")
+    p.add_argument("store"                ,                                            help="store directory or .npz file")
+    p.set_defaults(func=mainInfo)
+    args=parser.parse_args(args)
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
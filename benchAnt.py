@@ -0,0 +1,208 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    B E N C H M A R K   F O R   A N T G E N
+# ---------------------------------------------------------------------------
+#
+# usage: ./benchAnt.py -h
+#        ./benchAnt.py latency [count]
+#
+# suite: generates coils of style 1, 2 and 3 with 1 to 10000 turns in several
+# outline sizes and measures for every case
+#   gen     genAntLines() streamed into /dev/null (best of some runs)
+#   main    antGen.main() writing the file, incl. design rule check, with the
+#           time of every phase (see antGen.Profile)
+#   peak    peak python memory of main (tracemalloc, separate run)
+#   bytes   size of the written file
+#   seg/s   segments per second of main
+# the outline grows with the number of turns: its width is --fill times the
+# width the coil needs, the length is --aspect times the width. the results are
+# saved as JSON (-o); --compare prints the change against an older result file.
+#
+# with the streaming writer and the vectorized geometry the time per segment
+# stays (nearly) constant, i.e. the cost grows linearly with the number of turns.
+#
+# latency: time per footprint as seen by a caller, once cold (a new antGen.py
+# process per footprint) and once warm (requests to one antGen.py --serve).
+#
+# ---------------------------------------------------------------------------
+
+import os, sys, time, json, subprocess, tempfile, argparse, platform, tracemalloc
+import antGen, antGeom
+
+c_turns   = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+c_styles  = [1, 2, 3]
+c_fills   = [1.5, 3.0]      # outline width / width needed by the coil
+c_aspects = [1.0, 2.25]     # outline length / outline width
+c_condWidth = 0.2           # [mm]
+c_condSpace = 0.2           # [mm]
+c_minTime = 0.2             # [s]   gen is repeated until it took this long (at most c_repeat times)
+c_repeat  = 5
+c_regression = 0.10         # relative change which is marked in --compare ...
+c_regressionMin = { "genTime": 1e-3, "mainTime": 1e-3, "peakMemory": 2**16 }    # ... if the absolute change is larger than this
+
+def benchParams(style, turns, fill, aspect):
+    # parameters of one case, the coil needs about 2*turns*(condWidth+condSpace) plus a small window
+    need = 2*turns*(c_condWidth+c_condSpace) + 5
+    antWidth = round(fill*need, 3)
+    return { "modulename": "bench_t%d_n%d" % (style, turns), "turns": turns, "antennaLength": round(aspect*antWidth, 3),
+             "antennaWidth": antWidth, "conductorWidth": c_condWidth, "conductorSpace": c_condSpace, "drillSize": 0,
+             "minimalConductorSpace": -1, "silkMargin": 1.0, "style": style }
+
+def _mainArgs(p, outdir):
+    return [ "-f", p["modulename"], "-n", str(p["turns"]), "-l", repr(p["antennaLength"]), "-w", repr(p["antennaWidth"]),
+             "-c", repr(p["conductorWidth"]), "-s", repr(p["conductorSpace"]), "-d", repr(p["drillSize"]),
+             "-m", repr(p["silkMargin"]), "-t", str(p["style"]), "-o", outdir, "-D" ]
+
+def benchCase(p, outdir):
+    # measurements of one case as dict
+    import io, contextlib
+    args = ( p["turns"], p["antennaLength"], p["antennaWidth"], p["conductorWidth"], p["conductorSpace"], p["drillSize"],
+             p["minimalConductorSpace"], p["silkMargin"], p["modulename"], p["style"] )
+    res = dict(p)
+    res["segments"] = int(antGeom.segmentCount(p["turns"], p["style"])) + 1   # spiral and stub
+
+    # gen: serialization only, into /dev/null
+    times = []
+    while len(times) < c_repeat and (not times or sum(times) < c_minTime):
+        t0 = time.perf_counter()
+        with open(os.devnull, 'w') as f:
+            f.writelines(antGen.genAntLines(*args, deterministic=True))
+        times.append(time.perf_counter() - t0)
+    res["genTime"] = min(times)
+
+    # main: the whole script, with phases, the fastest run counts
+    best = None
+    total = 0
+    while best is None or (total < c_minTime and total < c_repeat*best.total):
+        out = io.StringIO()
+        with antGen.Profile() as prof, contextlib.redirect_stdout(out):
+            ret = antGen.runMain(p, outdir, ["kicad5"], True, False, True, None, None, 0)
+        total += prof.total
+        if best is None or prof.total < best.total:
+            best = prof
+    res["mainTime"] = best.total
+    res["phases"] = { k: v["seconds"] for k, v in best.asDict()["phases"].items() }
+    res["ok"] = (ret == 0)
+    if ret != 0:
+        res["error"] = out.getvalue().strip().splitlines()[-1]
+    path = os.path.join(outdir, "%s.kicad_mod" % (p["modulename"]))
+    res["bytes"] = os.path.getsize(path) if os.path.exists(path) else 0
+    res["segmentsPerSecond"] = res["segments"]/res["mainTime"] if res["mainTime"] > 0 else 0
+
+    # peak memory of main, tracemalloc slows everything down, so in a run of its own
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        antGen.runMain(p, outdir, ["kicad5"], True, False, True, None, None, 0)
+    res["peakMemory"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if os.path.exists(path):
+        os.remove(path)
+    return res
+
+def runSuite(styles=c_styles, turns=c_turns, fills=c_fills, aspects=c_aspects, report=print):
+    # all cases, report (a print like function) gets one line per case
+    import numpy
+    results = []
+    report("style    turns   outline [mm]      segments   gen [ms]  main [ms]  peak [MB]   bytes [kB]      seg/s")
+    with tempfile.TemporaryDirectory() as outdir:
+        # load everything once, so the first case does not pay the imports
+        antGen.runMain(benchParams(1, 1, 2, 1), outdir, ["kicad5"], True, False, True, None, None, 0)
+        for style in styles:
+            for n in turns:
+                for fill in fills:
+                    for aspect in aspects:
+                        r = benchCase(benchParams(style, n, fill, aspect), outdir)
+                        results.append(r)
+                        report("%5d %8d %7.0fx%-7.0f %10d %10.3f %10.3f %10.2f %12.1f %10.0f  %s" % (
+                               style, n, r["antennaLength"], r["antennaWidth"], r["segments"], r["genTime"]*1e3, r["mainTime"]*1e3,
+                               r["peakMemory"]/2**20, r["bytes"]/1e3, r["segmentsPerSecond"], "" if r["ok"] else "FAILED: " + r["error"]))
+    return { "version": antGen.SKRIPT_VERSION, "python": platform.python_version(), "numpy": numpy.__version__,
+             "platform": platform.platform(), "machine": platform.machine(), "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+             "results": results }
+
+def _caseKey(r):
+    return (r["style"], r["turns"], r["antennaLength"], r["antennaWidth"])
+
+def compare(old, new, report=print):
+    # change of gen, main and peak of every case which is in both result sets, returns the number of regressions
+    oldCases = { _caseKey(r): r for r in old["results"] }
+    regressions = 0
+    report("compare %s (%s) -> %s (%s)" % (old["version"], old["date"], new["version"], new["date"]))
+    report("style    turns   outline [mm]        gen       main       peak")
+    for r in new["results"]:
+        o = oldCases.get(_caseKey(r))
+        if o is None:
+            continue
+        changes = []
+        bad = []
+        for k in ("genTime", "mainTime", "peakMemory"):
+            c = r[k]/o[k] - 1 if o[k] > 0 else 0.0
+            changes.append(c)
+            bad.append(c > c_regression and r[k] - o[k] > c_regressionMin[k])
+        regressions += any(bad)
+        report("%5d %8d %7.0fx%-7.0f %s  %s" % (r["style"], r["turns"], r["antennaLength"], r["antennaWidth"],
+               " ".join("%+9.1f%%" % (c*100) for c in changes), "REGRESSION" if any(bad) else ""))
+    return regressions
+
+c_latencyParams = { "turns": 3, "antennaLength": 75.4, "antennaWidth": 33.5, "conductorWidth": 2.7, "conductorSpace": 1.7, "style": 3 }
+
+def benchLatency(count=50):
+    # returns the median latency in s of a cold call and of a warm request
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "antGen.py")
+    p = c_latencyParams
+    with tempfile.TemporaryDirectory() as outdir:
+        cold = []
+        for i in range(count):
+            t0 = time.perf_counter()
+            subprocess.run([ sys.executable, script, "-f", "cold%d" % (i), "-n", str(p["turns"]), "-l", str(p["antennaLength"]),
+                             "-w", str(p["antennaWidth"]), "-c", str(p["conductorWidth"]), "-s", str(p["conductorSpace"]),
+                             "-t", str(p["style"]), "-o", outdir ], check=True, stdout=subprocess.DEVNULL)
+            cold.append(time.perf_counter() - t0)
+        warm = []
+        with subprocess.Popen([ sys.executable, script, "--serve", "-o", outdir ], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                              universal_newlines=True) as server:
+            for i in range(count):
+                t0 = time.perf_counter()
+                server.stdin.write(json.dumps(dict(p, modulename="warm%d" % (i), id=i)) + "\n")
+                server.stdin.flush()
+                if not json.loads(server.stdout.readline())["ok"]:
+                    raise RuntimeError("request %d failed" % (i))
+                warm.append(time.perf_counter() - t0)
+            server.stdin.close()
+    return sorted(cold)[count//2], sorted(warm)[count//2]
+
+def main(args):
+    if args and args[0] == "latency":
+        count = int(args[1]) if len(args) > 1 else 50
+        cold, warm = benchLatency(count)
+        print("latency per footprint (median of %d)" % (count))
+        print("  cold, one process per call:   %8.3f ms" % (cold*1e3))
+        print("  warm, antGen.py --serve:      %8.3f ms" % (warm*1e3))
+        print("  speedup:                      %8.1f x" % (cold/warm))
+        return 0
+
+    parser=argparse.ArgumentParser(description="benchmark suite for antGen.py, see ./benchAnt.py latency for the service latency")
+    parser.add_argument("-o", "--output" ,                                   help="save the results as JSON to this file")
+    parser.add_argument("--compare"      ,                                   help="JSON results of an older run, print the change of the common cases against them")
+    parser.add_argument("-t", "--styles" , type=int  , nargs="+", default=c_styles , help="styles, will be set to %s if not provided" % (c_styles))
+    parser.add_argument("-n", "--turns"  , type=int  , nargs="+", default=c_turns  , help="numbers of turns, will be set to %s if not provided" % (c_turns))
+    parser.add_argument("--fill"         , type=float, nargs="+", default=c_fills  , help="outline width / width needed by the coil, will be set to %s if not provided" % (c_fills))
+    parser.add_argument("--aspect"       , type=float, nargs="+", default=c_aspects, help="outline length / outline width, will be set to %s if not provided" % (c_aspects))
+    parser.add_argument("-q", "--quick"  , action="store_true",              help="only up to 1000 turns")
+    args=parser.parse_args(args)
+
+    turns = [ n for n in args.turns if n <= 1000 ] if args.quick else args.turns
+    new = runSuite(args.styles, turns, args.fill, args.aspect)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(new, f, indent=1)
+        print("results written to %s" % (args.output))
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        return 1 if compare(old, new) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
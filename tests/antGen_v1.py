@@ -0,0 +1,206 @@
+#!/bin/env python3
+#
+# ---------------------------------------------------------------------------
+#    R E F E R E N C E   G E N E R A T O R   ( V E R S I O N   1 . 1 )
+# ---------------------------------------------------------------------------
+#
+# genAnt() of antGen.py version 1.1, before the geometry was moved to
+# antGeom.py, unchanged. tests/test_output.py compares the current output
+# against it.
+#
+# ---------------------------------------------------------------------------
+
+SKRIPT_VERSION="1.1"
+
+import math
+
+def genAnt( turns,          # [#]   
+            antLength,      # [mm]  
+            antWidth,       # [mm]  
+            condWidth,      # [mm]  
+            condSpace,      # [mm]
+            drillSize,      # [mm]
+            condSpaceMin,   # [mm]
+            silkMargin,     # [mm]
+            name,           # [-]
+            style           # [-]
+      ):
+
+    # https://stackoverflow.com/questions/7852855/in-python-how-do-you-convert-a-datetime-object-to-seconds#30156392
+    from datetime import datetime
+    dt = datetime.today()  # Get timezone naive now
+    seconds = int(dt.timestamp())
+
+    if drillSize < 0:
+        drillSize = math.floor(condWidth/2*10)/10
+        if drillSize == 0:
+            print("WARNING: drillSize was < 0 and is therefore autocalculated. the resulted drillSize is 0! tht pad is replaced by smd pad. select drillSize manually!")
+    if drillSize > condWidth:
+        print("WARNING: drillSize > conductorWidth!")
+
+    mod=""
+    mod="%s(module %s (layer F.Cu) (tedit %X)\n" % (mod, name, seconds)
+    mod="%s  (fp_text reference REF** (at %f %f) (layer F.SilkS)\n" % (mod, antLength/2, antWidth/2)
+    mod="%s    (effects (font (size 1 1) (thickness 0.15)))\n" % (mod)
+    mod="%s  )\n" % (mod)
+    mod="%s  (fp_text value %s (at %f %f) (layer F.Fab)\n" % (mod, name, antLength/2, antWidth/2+2)
+    mod="%s    (effects (font (size 1 1) (thickness 0.15)))\n" % (mod)
+    mod="%s  )\n" % (mod)
+    if silkMargin >= 0:
+        # show outline on top silk
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer F.SilkS) (width 0.15))\n" % (mod, -silkMargin, -silkMargin, antLength+silkMargin, -silkMargin)  # t
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer F.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, -silkMargin, antLength+silkMargin, antWidth+silkMargin)  # r
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer F.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, antWidth+silkMargin, -silkMargin, antWidth+silkMargin) # b
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer F.SilkS) (width 0.15))\n" % (mod, -silkMargin, antWidth+silkMargin, -silkMargin, -silkMargin) # l
+        # mark only corners on bottom silk
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, -silkMargin, -silkMargin, (turns*(condWidth+condSpace)-condSpace+silkMargin), -silkMargin) # tl -> right
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, -silkMargin, -silkMargin, -silkMargin, (turns*(condWidth+condSpace)-condSpace+silkMargin)) # tl -> down 
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, -silkMargin, antLength-(turns*(condWidth+condSpace)-condSpace+silkMargin), -silkMargin) # tr -> left
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, -silkMargin, antLength+silkMargin, (turns*(condWidth+condSpace)-condSpace+silkMargin))  # tr -> down 
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, antWidth+silkMargin, antLength-(turns*(condWidth+condSpace)-condSpace+silkMargin), antWidth+silkMargin) # br -> left
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, antLength+silkMargin, antWidth+silkMargin, antLength+silkMargin, antWidth-(turns*(condWidth+condSpace)-condSpace+silkMargin)) # br -> up 
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, -silkMargin, antWidth+silkMargin, (turns*(condWidth+condSpace)-condSpace+silkMargin), antWidth+silkMargin)  # bl -> right
+        mod="%s  (fp_line (start %f %f) (end %f %f) (layer B.SilkS) (width 0.15))\n" % (mod, -silkMargin, antWidth+silkMargin, -silkMargin, antWidth-(turns*(condWidth+condSpace)-condSpace+silkMargin)) # bl -> up 
+    # draw antenna
+    if style == 3: # const 45 deg slope
+        xg=((math.sqrt(2)-1)*turns+1)*(condWidth+condSpace)
+        yg=(turns-1)*(condWidth+condSpace)
+        dx1=(math.sqrt(2)-1)*(condWidth+condSpace)
+        dx2=(condWidth+condSpace)*math.sqrt(2)
+        dy=(condWidth+condSpace)
+        if drillSize > 0:
+            mod="%s  (pad 1 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, antLength/2-xg/2, antWidth-condWidth/2, condWidth, condWidth, drillSize)
+        mod="%s  (pad 1 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, antLength/2-xg/2, antWidth-condWidth/2, condWidth, condWidth)
+        mod="%s    (zone_connect 0)\n" % (mod)
+        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
+        mod="%s    (primitives\n" % (mod)
+        x0 = 0
+        y0 = 0
+        seg = 0
+        d = 0
+        for seg in range(0,turns*6-2):
+            if seg%6 == 0: # line goes left from middle
+                x1 = x0 - (antLength/2-xg/2-condWidth/2-d) - int(seg/6)*dx1
+                y1 = y0
+            elif seg%6 == 1: # line goes up
+                x1 = x0 
+                y1 = y0 - (antWidth-condWidth-2*d)
+            elif seg%6 == 2: # line right
+                x1 = x0 + (antLength-condWidth-2*d)
+                y1 = y0
+            elif seg%6 == 3: # line down
+                x1 = x0
+                y1 = y0 + (antWidth-condWidth-2*d)
+            elif seg%6 == 4: # line goes left to the middle
+                x1 = x0 - (antLength/2-xg/2-condWidth/2-d) - (turns-1-int(seg/6))*dx1
+                y1 = y0
+            elif seg%6 == 5: # line from the middle with a slope to the next level
+                x1 = x0 - dx2 + dx1
+                y1 = y0 - dy
+                d = d + condSpace + condWidth
+            mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, x0, y0, x1, y1, condWidth)
+            x0 = x1
+            y0 = y1
+        mod="%s    ))\n" % (mod)
+        if drillSize > 0:
+            mod="%s  (pad 2 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, antLength/2+xg/2, antWidth-condWidth/2-yg, condWidth, condWidth, drillSize)
+        mod="%s  (pad 2 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, antLength/2+xg/2, antWidth-condWidth/2-yg, condWidth, condWidth)
+        mod="%s    (zone_connect 0)\n" % (mod)
+        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
+        mod="%s    (primitives\n" % (mod)
+        mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, 0, 0,  (antLength/2-xg/2-condWidth/2-d) + (turns-1-int(seg/6))*dx1, 0, condWidth)
+        mod="%s    ))\n" % (mod)
+    elif style == 2: # slope always on the same x location
+        if condSpaceMin<0:
+            condSpaceMin=condSpace/math.sqrt(2)
+        alpha=math.asin((condWidth+condSpaceMin)/(condWidth+condSpace))
+        yg=condWidth+condSpace
+        xg=math.tan(alpha)*yg
+        if drillSize > 0:
+            mod="%s  (pad 1 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, antLength/2-xg/2, antWidth-condWidth/2, condWidth, condWidth, drillSize)
+        mod="%s  (pad 1 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, antLength/2-xg/2, antWidth-condWidth/2, condWidth, condWidth)
+        mod="%s    (zone_connect 0)\n" % (mod)
+        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
+        mod="%s    (primitives\n" % (mod)
+        x0 = 0
+        y0 = 0
+        seg = 0
+        d = 0
+        for seg in range(0,turns*6-2):
+            if seg%6 == 0: # line goes left from middle
+                x1 = x0 - (antLength/2-xg/2-condWidth/2-d)
+                y1 = y0
+            elif seg%6 == 1: # line goes up
+                x1 = x0 
+                y1 = y0 - (antWidth-condWidth-2*d)
+            elif seg%6 == 2: # line right
+                x1 = x0 + (antLength-condWidth-2*d)
+                y1 = y0
+            elif seg%6 == 3: # line down
+                x1 = x0
+                y1 = y0 + (antWidth-condWidth-2*d)
+            elif seg%6 == 4: # line goes left to the middle
+                x1 = x0 - (antLength/2-xg/2-condWidth/2-d)
+                y1 = y0
+            elif seg%6 == 5: # line from the middle with a slope to the next level
+                x1 = x0 - xg
+                y1 = y0 - yg
+                d = d + condSpace + condWidth
+            mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, x0, y0, x1, y1, condWidth)
+            x0 = x1
+            y0 = y1
+        mod="%s    ))\n" % (mod)
+        if drillSize > 0:
+            mod="%s  (pad 2 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, antLength/2-xg/2+xg, antWidth-condWidth/2+y0, condWidth, condWidth, drillSize)
+        mod="%s  (pad 2 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, antLength/2-xg/2+xg, antWidth-condWidth/2+y0, condWidth, condWidth)
+        mod="%s    (zone_connect 0)\n" % (mod)
+        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
+        mod="%s    (primitives\n" % (mod)
+        mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, 0, 0,  antLength/2-xg/2-condWidth/2 - (turns-1)*(condWidth+condSpace), 0, condWidth)
+        mod="%s    ))\n" % (mod)
+    else: # simple, with no slope, pads in corner
+        if drillSize > 0:
+          mod="%s  (pad 1 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, condWidth/2, antWidth-condWidth/2, condWidth, condWidth, drillSize)
+        mod="%s  (pad 1 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, condWidth/2, antWidth-condWidth/2, condWidth, condWidth)
+        mod="%s    (zone_connect 0)\n" % (mod)
+        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
+        mod="%s    (primitives\n" % (mod)
+        x0 = 0
+        y0 = 0
+        seg = 0
+        dx = antLength-condWidth
+        dy = antWidth-condWidth
+        for seg in range(0,turns*4-1):
+            if seg%4 == 0: # line goes up
+                x1 = x0
+                y1 = y0 - dy
+            elif seg%4 == 1: # line goes right
+                if int(seg/4) > 0: # not for 1st right
+                    dx = dx - condWidth-condSpace
+                x1 = x0 + dx
+                y1 = y0
+            elif seg%4 == 2: # line goes down
+                if int(seg/4) > 0: # not for 1st down
+                    dy = dy - condWidth-condSpace
+                x1 = x0
+                y1 = y0 + dy
+            elif seg%4 == 3: # line goes left
+                dx = dx - condWidth - condSpace
+                x1 = x0 - dx
+                y1 = y0
+                dy = dy - condWidth - condSpace
+            mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, x0, y0, x1, y1, condWidth)
+            x0 = x1
+            y0 = y1
+        mod="%s    ))\n" % (mod)
+        if drillSize > 0:
+            mod="%s  (pad 2 thru_hole circle (at %f %f) (size %f %f) (drill %f) (layers *.Cu *.Mask))\n" % (mod, condWidth/2+turns*(condWidth+condSpace), antWidth-condWidth/2+y0, condWidth, condWidth, drillSize)
+        mod="%s  (pad 2 smd custom (at %f %f) (size %f %f) (layers F.Cu)\n" % (mod, condWidth/2+turns*(condWidth+condSpace), antWidth-condWidth/2+y0, condWidth, condWidth)
+        mod="%s    (zone_connect 0)\n" % (mod)
+        mod="%s    (options (clearance outline) (anchor circle))\n" % (mod)
+        mod="%s    (primitives\n" % (mod)
+        mod="%s      (gr_line (start %f   %f) (end %f %f) (width %f))\n" % (mod, 0, 0,  antLength + condSpace - 2*turns*(condWidth+condSpace), 0, condWidth)
+        mod="%s    ))\n" % (mod)
+        
+    mod="%s)\n" % (mod)
+    return mod
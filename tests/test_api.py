@@ -0,0 +1,102 @@
+# parameters and requests of the API and the generator service. run with: python3 -m pytest tests
+
+import json, os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import antGen
+
+c_params = { "turns": 3, "antennaLength": 40, "antennaWidth": 30, "conductorWidth": 0.5, "conductorSpace": 0.3 }
+
+def _request(tmpdir, **kw):
+    req = dict(c_params, outdir=str(tmpdir), **kw)
+    return json.loads(antGen.handleRequest(json.dumps(req)))
+
+def test_params_are_converted():
+    p = antGen.AntParams.fromDict(dict(c_params, turns="3", style=2.0, antennaLength="40"))
+    assert (p.turns, p.style, p.antennaLength) == (3, 2, 40.0)
+
+def test_invalid_params():
+    for bad in ({ "style": 7 }, { "style": 0 }, { "style": True }, { "turns": 3.9 }, { "turns": "3.9" }, { "turns": 0 },
+                { "modulename": "../ant" }, { "modulename": "a/b" }, { "modulename": "a\\b" }, { "modulename": "/tmp/ant" },
+                { "modulename": "" }, { "antennaLength": "long" }):
+        with pytest.raises(ValueError):
+            antGen.AntParams.fromDict(dict(c_params, **bad))
+
+def test_service_rejects_invalid_params(tmpdir):
+    for bad in ({ "style": 7 }, { "turns": 3.9 }, { "modulename": "../ant" }):
+        res = _request(tmpdir, **bad)
+        assert res["ok"] is False and "ValueError" in res["error"]
+    assert os.listdir(str(tmpdir)) == []
+    assert _request(tmpdir)["ok"] is True
+
+def test_service_formats(tmpdir):
+    res = _request(tmpdir, format="svg")
+    assert res["ok"] is True and list(res["paths"]) == ["svg"] and res["path"].endswith(".svg")
+    res = _request(tmpdir, formats=["kicad6", "dxf"], modulename="two")
+    assert res["ok"] is True and sorted(res["paths"]) == ["dxf", "kicad6"] and res["path"].endswith(".kicad_mod")
+    assert _request(tmpdir, modulename="plain")["paths"] == { "kicad5": os.path.join(str(tmpdir), "plain.kicad_mod") }
+    assert _request(tmpdir, format="svg", **{ "return": "content" })["content"].startswith("<?xml")
+    assert _request(tmpdir, formats=["dxf"], **{ "return": "content" })["content"].endswith("EOF\n")
+
+def test_service_rejects_invalid_formats(tmpdir):
+    for bad in ({ "formats": "svg" }, { "formats": [] }, { "formats": [1] }, { "format": ["svg"] },
+                { "format": "svg", "formats": ["svg"] }, { "formats": ["svg", "dxf"], "return": "content" }):
+        res = _request(tmpdir, modulename="bad", **bad)
+        assert res["ok"] is False and "format" in res["error"]
+    assert os.listdir(str(tmpdir)) == []
+
+def test_batch_rejects_invalid_params(tmpdir):
+    import antBatch
+    table = tmpdir.join("table.csv")
+    table.write("modulename,turns,antennaLength,antennaWidth,conductorWidth,conductorSpace,style\n"
+                "good,3,40,30,0.5,0.3,1\n"
+                "bad_style,3,40,30,0.5,0.3,7\n"
+                "bad_turns,3.9,40,30,0.5,0.3,1\n"
+                "../escape,3,40,30,0.5,0.3,1\n")
+    out = tmpdir.join("out")
+    assert antBatch.main([ str(table), "-o", str(out), "-j", "1" ]) == 1
+    assert sorted(os.listdir(str(out))) == ["good.kicad_mod"]
+    assert not tmpdir.join("escape.kicad_mod").exists()
+    # raw dicts from python get the same checks
+    results, _ = antBatch.runBatch([ dict(c_params, modulename="py_bad", style=7) ], str(out), workers=1)
+    assert results[0][0] == "py_bad" and "style" in results[0][1]
+    assert sorted(os.listdir(str(out))) == ["good.kicad_mod"]
+
+def test_service_output_is_json_lines(tmpdir, capfd):
+    # warnings go to stderr, stdout carries only the responses
+    import io
+    requests = [ dict(c_params, outdir=str(tmpdir), drillSize=0.8), dict(c_params, outdir=str(tmpdir), conductorWidth=0.1, modulename="thin") ]
+    fout = io.StringIO()
+    antGen.serve(io.StringIO("".join(json.dumps(r) + "\n" for r in requests)), fout)
+    lines = fout.getvalue().splitlines()
+    assert [ json.loads(line)["ok"] for line in lines ] == [ True, True ]
+    out, err = capfd.readouterr()
+    assert out == "" and "drillSize > conductorWidth" in err and "drillSize is 0" in err
+
+def test_socket_does_not_remove_other_files(tmpdir):
+    path = tmpdir.join("antGen.py")
+    path.write("keep me")
+    assert antGen.main([ "--serve", "--socket", str(path) ]) == 1
+    assert path.read() == "keep me"
+
+def test_socket_replaces_a_stale_socket(tmpdir):
+    import socket, threading
+    path = str(tmpdir.join("s"))
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    server = threading.Thread(target=antGen.serveSocket, args=(path,), daemon=True)
+    server.start()
+    for i in range(100):
+        try:
+            client = socket.socket(socket.AF_UNIX)
+            client.connect(path)
+            break
+        except OSError:
+            client.close()
+            server.join(0.05)
+    with client, client.makefile("rw") as f:
+        f.write(json.dumps(dict(c_params, outdir=str(tmpdir))) + "\n")
+        f.flush()
+        assert json.loads(f.readline())["ok"] is True
@@ -0,0 +1,70 @@
+# batch / sweep mode of antBatch.py. run with: python3 -m pytest tests
+
+import json, os, re, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import antBatch
+
+c_header = "modulename,turns,antennaLength,antennaWidth,conductorWidth,conductorSpace,style\n"
+
+def _summary(out):
+    m = re.search(r"generated (\d+) of (\d+) footprints in [0-9.]+ s \(([0-9.]+) footprints/s\), (\d+) failed", out)
+    assert m, out
+    return int(m.group(1)), int(m.group(2)), float(m.group(3)), int(m.group(4))
+
+def test_table_rows_are_converted(tmpdir):
+    table = tmpdir.join("table.csv")
+    table.write(c_header + "a,3.0,40,30,0.5,0.3,2\n" + ",2,40,30,0.5,0.3,1\n")
+    a, b = antBatch.makeVariants(antBatch.loadTable(str(table)))
+    assert a == { "modulename": "a", "turns": 3, "antennaLength": 40.0, "antennaWidth": 30.0, "conductorWidth": 0.5, "conductorSpace": 0.3,
+                  "drillSize": -1.0, "minimalConductorSpace": -1.0, "silkMargin": 0.0, "style": 2 }
+    assert type(a["turns"]) is int and type(a["antennaLength"]) is float
+    assert b["modulename"] == "nfc_ant_t1_n2_40x30_c0.5_s0.3"
+
+def test_invalid_rows_fail():
+    rows = [ { "turns": 3.9, "antennaLength": 40, "antennaWidth": 30, "conductorWidth": 0.5, "conductorSpace": 0.3 },
+             { "turns": 3, "antennaLength": 40, "antennaWidth": 30, "conductorWidth": 0.5 },
+             { "turns": 3, "antennaLength": 40, "antennaWidth": 30, "conductorWidth": 0.5, "conductorSpace": 0.3, "colour": 1 },
+             [ 3, 40, 30 ] ]
+    errors = [ v.get("error") for v in antBatch.makeVariants(rows) ]
+    assert all(errors), errors
+    assert "turns" in errors[0] and "conductorSpace" in errors[1] and "colour" in errors[2]
+
+def test_sweep():
+    spec = { "turns": { "start": 1, "stop": 3 }, "antennaLength": [40, 60], "antennaWidth": 30,
+             "conductorWidth": { "start": 0.5, "stop": 1.0, "step": 0.25 }, "conductorSpace": 0.3, "style": [1, 3] }
+    variants = antBatch.makeVariants(spec)
+    assert len(variants) == 3*2*3*2 and not any("error" in v for v in variants)
+    assert sorted(set(v["conductorWidth"] for v in variants)) == [0.5, 0.75, 1.0]
+    assert len(set(v["modulename"] for v in variants)) == len(variants)
+
+def test_invalid_sweeps(tmpdir, capsys):
+    base = { "antennaLength": 40, "antennaWidth": 30, "conductorWidth": 0.5, "conductorSpace": 0.3 }
+    for turns, message in (({ "stop": 3 }, "start missing"), ({ "start": 1, "stop": 3, "step": 0.5 }, "has to be an integer"),
+                           ({ "start": 1, "stop": 3, "step": 0 }, "> 0"), ({ "start": "1", "stop": 3 }, "numbers")):
+        spec = tmpdir.join("sweep.json")
+        spec.write(json.dumps(dict(base, turns=turns)))
+        assert antBatch.main([ str(spec), "-o", str(tmpdir.join("out")) ]) == 1
+        out = capsys.readouterr().out
+        assert out.startswith("ERROR: ") and message in out, out
+    assert not tmpdir.join("out").exists()
+
+def test_failed_variants_are_reported(tmpdir, capsys):
+    table = tmpdir.join("table.csv")
+    table.write(c_header + "ok,3,40,30,0.5,0.3,1\n" + "crossed,30,12,10,0.5,0.3,1\n" + "broken,x,40,30,0.5,0.3,1\n")
+    assert antBatch.main([ str(table), "-o", str(tmpdir.join("out")), "-j", "1" ]) == 1
+    out = capsys.readouterr().out
+    assert re.search(r"^FAILED: crossed: DRC: ", out, re.M) and re.search(r"^FAILED: broken: ValueError: turns", out, re.M)
+    done, total, rate, failed = _summary(out)
+    assert (done, total, failed) == (1, 3, 2) and rate > 0
+    assert os.listdir(str(tmpdir.join("out"))) == ["ok.kicad_mod"]
+
+def test_throughput_with_workers(tmpdir, capsys):
+    spec = tmpdir.join("sweep.json")
+    spec.write(json.dumps({ "turns": { "start": 1, "stop": 4 }, "antennaLength": [40, 50], "antennaWidth": 30,
+                            "conductorWidth": 0.5, "conductorSpace": 0.3, "style": [1, 2, 3] }))
+    out = tmpdir.join("out")
+    assert antBatch.main([ str(spec), "-o", str(out), "-j", "2", "-F", "kicad8", "-F", "svg" ]) == 0
+    done, total, rate, failed = _summary(capsys.readouterr().out)
+    assert (done, total, failed) == (24, 24, 0) and rate > 0
+    assert len(os.listdir(str(out))) == 2*24
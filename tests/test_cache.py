@@ -0,0 +1,74 @@
+# deterministic output (-D) and the cache (-C) of antGen.py and antBatch.py. run with: python3 -m pytest tests
+
+import json, os, re, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import antGen
+import antBatch
+
+c_args = [ "-f", "coil", "-n", "4", "-l", "40", "-w", "30", "-c", "0.5", "-s", "0.3", "-t", "2" ]
+
+def _run(capsys, outdir, *args):
+    # antGen.py with c_args, returns the cache line of its output
+    assert antGen.main(c_args + [ "-o", outdir ] + list(args)) == 0
+    out = capsys.readouterr().out
+    m = re.search(r"^cache: (\d) hit, (\d) miss", out, re.M)
+    return (int(m.group(1)), int(m.group(2))) if m else out
+
+def test_deterministic_runs_give_the_same_bytes(tmpdir, capsys, monkeypatch):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    data = []
+    for run in ("a", "b"):
+        outdir = str(tmpdir.join(run))
+        _run(capsys, outdir, "-D", "-F", "kicad5", "-F", "svg", "-F", "dxf")
+        data.append({ name: open(os.path.join(outdir, name), "rb").read() for name in sorted(os.listdir(outdir)) })
+    assert data[0] == data[1] and len(data[0]) == 3
+    assert b"(tedit 0)" in data[0]["coil.kicad_mod"]
+
+def test_source_date_epoch_sets_tedit(tmpdir, capsys, monkeypatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    outdir = str(tmpdir)
+    _run(capsys, outdir, "-D")
+    assert "(tedit %X)" % (1700000000) in open(os.path.join(outdir, "coil.kicad_mod")).read()
+    # a new time stamp is a new file content
+    assert _run(capsys, outdir, "-D", "-C") == (0, 1)
+    assert _run(capsys, outdir, "-D", "-C") == (1, 0)
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000001")
+    assert _run(capsys, outdir, "-D", "-C") == (0, 1)
+
+def test_cache_hit_and_miss(tmpdir, capsys):
+    outdir = str(tmpdir)
+    assert _run(capsys, outdir, "-D", "-C") == (0, 1)
+    assert _run(capsys, outdir, "-D", "-C") == (1, 0)
+    # every change of a parameter or an option which changes the files is a miss, the same again a hit
+    for args in ([ "-D", "-C", "-s", "0.35" ], [ "-D", "-C", "-F", "kicad8" ], [ "-D", "-C", "-F", "kicad8", "-p", "miter" ],
+                 [ "-D", "-C", "-F", "kicad8", "-p", "miter", "--noDrc" ], [ "-D", "-C", "-F", "kicad8", "-p", "miter", "-r", "0.2" ],
+                 [ "-C" ]):
+        assert _run(capsys, outdir, *args) == (0, 1), args
+        if "-D" in args:
+            assert _run(capsys, outdir, *args) == (1, 0), args
+
+def test_missing_file_is_written_again(tmpdir, capsys):
+    outdir = str(tmpdir)
+    assert _run(capsys, outdir, "-D", "-C", "-F", "kicad5", "-F", "svg") == (0, 1)
+    os.remove(os.path.join(outdir, "coil.svg"))
+    assert _run(capsys, outdir, "-D", "-C", "-F", "kicad5", "-F", "svg") == (0, 1)
+    assert os.path.exists(os.path.join(outdir, "coil.svg"))
+    assert _run(capsys, outdir, "-D", "-C", "-F", "kicad5", "-F", "svg") == (1, 0)
+
+def test_batch_hits_and_misses(tmpdir, capsys):
+    spec = tmpdir.join("sweep.json")
+    spec.write(json.dumps({ "turns": { "start": 1, "stop": 3 }, "antennaLength": 40, "antennaWidth": 30,
+                            "conductorWidth": 0.5, "conductorSpace": 0.3, "style": [1, 2] }))
+    outdir = str(tmpdir.join("out"))
+    def batch():
+        assert antBatch.main([ str(spec), "-o", outdir, "-D", "-C", "-j", "1" ]) == 0
+        m = re.search(r"^cache: (\d+) hits, (\d+) misses", capsys.readouterr().out, re.M)
+        return int(m.group(1)), int(m.group(2))
+    assert batch() == (0, 6)
+    assert batch() == (6, 0)
+    os.remove(os.path.join(outdir, "nfc_ant_t2_n3_40x30_c0.5_s0.3.kicad_mod"))
+    assert batch() == (5, 1)
+    spec.write(json.dumps({ "turns": { "start": 1, "stop": 4 }, "antennaLength": 40, "antennaWidth": 30,
+                            "conductorWidth": 0.5, "conductorSpace": 0.3, "style": [1, 2] }))
+    assert batch() == (6, 2)
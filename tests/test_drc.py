@@ -0,0 +1,94 @@
+# antDrc.candidatePairs() and antDrc.checkGeometry() against a plain O(n^2) reference on small designs,
+# including designs which fail. run with: python3 -m pytest tests
+
+import itertools, math, os, sys, time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import antDrc
+import antGeom
+
+def _designs():
+    for style in (1, 2, 3):
+        for turns in (1, 2, 4, 7):
+            yield (turns, 40, 30, 0.5, 0.3, -1, style)
+            yield (turns, 75.4, 33.5, 2.7, 1.7, -1, style)
+    # style 2 slope closer than the clearance asked for
+    yield (4, 40, 30, 0.5, 0.3, 0.29, 2)
+    # pad 2 on the spiral, and an outline too small for the turns
+    yield (3, 12, 10, 1.5, 0.2, -1, 1)
+    yield (6, 12, 10, 1.5, 0.5, -1, 3)
+
+def _pairsReference(start, end, reach):
+    lo = np.minimum(start, end) - reach[:, None]/2
+    hi = np.maximum(start, end) + reach[:, None]/2
+    return set((i, j) for i, j in itertools.combinations(range(len(start)), 2)
+               if lo[i, 0] <= hi[j, 0] and lo[j, 0] <= hi[i, 0] and lo[i, 1] <= hi[j, 1] and lo[j, 1] <= hi[i, 1])
+
+def _pointDistance(p, a, b):
+    dx, dy = b[0]-a[0], b[1]-a[1]
+    ll = dx*dx + dy*dy
+    t = 0.0 if ll == 0 else min(1.0, max(0.0, ((p[0]-a[0])*dx + (p[1]-a[1])*dy)/ll))
+    return math.hypot(p[0] - a[0] - t*dx, p[1] - a[1] - t*dy)
+
+def _distance(a0, a1, b0, b1):
+    def orient(p, q, r):
+        return (q[0]-p[0])*(r[1]-p[1]) - (q[1]-p[1])*(r[0]-p[0])
+    if orient(a0, a1, b0)*orient(a0, a1, b1) < 0 and orient(b0, b1, a0)*orient(b0, b1, a1) < 0:
+        return 0.0
+    return min(_pointDistance(a0, b0, b1), _pointDistance(a1, b0, b1), _pointDistance(b0, a0, a1), _pointDistance(b1, a0, a1))
+
+def _violationsReference(geom, clearance):
+    start, end, width = antDrc.copperItems(geom)
+    start, end, width = start.tolist(), end.tolist(), width.tolist()
+    bad = []
+    for i, j in itertools.combinations(range(len(start)), 2):
+        if j - i > 1 and _distance(start[i], end[i], start[j], end[j]) - (width[i] + width[j])/2 < clearance - antDrc.c_tolerance:
+            bad.append((i, j))
+    return bad
+
+def test_candidate_pairs():
+    for turns, length, width, condWidth, condSpace, condSpaceMin, style in _designs():
+        geom = antGeom.antGeometry(turns, length, width, condWidth, condSpace, condSpaceMin, style)
+        start, end, w = antDrc.copperItems(geom)
+        for clearance in (0.01, condSpace, 3*condSpace):
+            pairs = antDrc.candidatePairs(start, end, w + clearance)
+            found = set(map(tuple, pairs.tolist()))
+            assert len(found) == len(pairs)
+            assert found == _pairsReference(start, end, w + clearance)
+
+def test_candidate_pairs_stay_linear():
+    # style 2 with a clearance much smaller than the pitch: the slopes are stacked at the same x and must not
+    # all be active at once. 4 times the turns take about 4 times as long, quadratic would be 16 times
+    def seconds(turns):
+        start, end, w = antDrc.copperItems(antGeom.antGeometry(turns, 20000, 20000, 0.2, 2, -1, 2))
+        best = float("inf")
+        for i in range(3):
+            t0 = time.perf_counter()
+            pairs = antDrc.candidatePairs(start, end, w + 0.05)
+            best = min(best, time.perf_counter() - t0)
+        assert len(pairs) < 10*len(start)
+        return best
+    assert seconds(4000) < 8*seconds(1000)
+
+def test_check_geometry():
+    crossed = tooClose = 0
+    for turns, length, width, condWidth, condSpace, condSpaceMin, style in _designs():
+        geom = antGeom.antGeometry(turns, length, width, condWidth, condSpace, condSpaceMin, style)
+        for clearance in (antDrc.defaultClearance(condSpace, condSpaceMin, style), 1.5*condSpace):
+            violations = antDrc.checkGeometry(geom, clearance)
+            if not antGeom.segmentsOk(geom).all():
+                assert violations and all("against its direction" in v for v in violations)
+                crossed += 1
+                continue
+            n = len(geom.width) + 2
+            expected = ["clearance between %s and %s" % (antDrc.itemName(i, n), antDrc.itemName(j, n))
+                        for i, j in _violationsReference(geom, clearance)]
+            assert [v.split(" is ")[0] for v in violations] == expected
+            tooClose += bool(violations)
+    assert crossed > 0 and tooClose > 0
+
+def test_designed_clearance_passes():
+    for style in (1, 2, 3):
+        assert antDrc.checkAnt(3, 75.4, 33.5, 2.7, 1.7, -1, style) == []
+    assert antDrc.checkAnt(4, 40, 30, 0.5, 0.3, 0.29, 2, clearance=0.3) != []
@@ -0,0 +1,36 @@
+# electrical characterization of antElectric.py. run with: python3 -m pytest tests
+
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import antElectric
+
+def test_designs_which_can_not_be_drawn_are_nan():
+    # 30 turns do not fit into 20x15 mm, style 2 with minimalConductorSpace > conductorSpace can not be drawn
+    args = ([3, 30, 3], [40, 20, 40], [30, 15, 30], 0.5, 0.3, [-1, -1, 0.5], [1, 1, 2])
+    for model in ("wheeler", "currentsheet", "segments"):
+        res = antElectric.characterize(*args, model=model)
+        for name, _ in antElectric.c_results:
+            assert np.isfinite(res[name][0]), (model, name)
+            assert np.isnan(res[name][1:]).all(), (model, name)
+
+def test_workers_give_the_same_values():
+    n = antElectric.c_chunk + 10
+    turns = np.arange(n) % 9 + 1
+    one = antElectric.characterize(turns, 60, 40, 0.5, 0.3, -1, 3)
+    two = antElectric.characterize(turns, 60, 40, 0.5, 0.3, -1, 3, workers=2)
+    for name, _ in antElectric.c_results:
+        # the blocks are padded differently, the sums differ in the last bit
+        np.testing.assert_allclose(one[name], two[name], rtol=1e-12)
+
+def test_proximity_depends_on_spacing_and_turns():
+    # rac/rdc without the skin effect: 1 for a single turn, more for more turns, less for more space between them
+    skin = antElectric.resistanceAc(1.0, 1, 0.5, 0.3, 0.035)
+    proximity = antElectric.resistanceAc(1.0, np.array([ [2], [4], [8] ]), 0.5, np.array([ 0.15, 0.3, 1.0 ]), 0.035)/skin
+    assert (proximity > 1).all()
+    assert (np.diff(proximity, axis=0) > 0).all() and (np.diff(proximity, axis=1) < 0).all()
+    # both limits of the eddy loss are joined without a step
+    v = np.sqrt(3)*np.array([ 1 - 1e-9, 1 + 1e-9 ])
+    np.testing.assert_allclose(*antElectric._stripEddy(v), rtol=1e-8)
+    np.testing.assert_allclose(antElectric.windingField([ 1, 2, 3 ]), [ 0, 1, 1.5 ])
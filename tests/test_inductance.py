@@ -0,0 +1,55 @@
+# segment model of antInductance.py. run with: python3 -m pytest tests
+
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import antGeom
+import antInductance
+
+def _batch(geom):
+    n = len(geom.start)
+    return antGeom.AntGeometryBatch(geom.start[None], geom.end[None], geom.width[None], geom.pad[None],
+                                    geom.kind[None], geom.padPos[None], np.array([n]), np.ones((1, n), dtype=bool))
+
+def test_square_loop():
+    # Grover: square loop of side a, L = 2*mu0*a/pi*(ln(a/R) - 0.774), R = 0.2235*(w+t) is the geometric mean
+    # distance of the rectangular cross section
+    w, t = 0.5, 0.035
+    for a in (10.0, 30.0, 80.0):
+        corners = np.array([ (0, 0), (a, 0), (a, a), (0, a) ])
+        geom = antGeom.AntGeometry(corners, np.roll(corners, -1, axis=0), np.full(4, w), np.zeros(4, dtype=int),
+                                   np.array([ antGeom.KIND_RIGHT, antGeom.KIND_DOWN, antGeom.KIND_LEFT, antGeom.KIND_UP ]),
+                                   np.zeros((2, 2)))
+        grover = 2*antInductance.MU0*a*1e-3/np.pi*(np.log(a/(0.2235*(w+t))) - 0.774)
+        L = antInductance.inductanceSegments(geom, t)
+        assert abs(L/grover - 1) < 0.01, (a, L, grover)
+
+def _neumann(start, end, nodes=16, panels=20):
+    # mutual inductance of two straight filaments by numerical integration of the Neumann formula, the panels
+    # get smaller towards the ends (a segment may touch the other one there)
+    x, w = np.polynomial.legendre.leggauss(nodes)
+    h = 0.5*np.geomspace(1e-6, 1, panels)
+    bounds = np.unique(np.concatenate([ [0], h, 1-h ]))
+    x = np.concatenate([ a + (x+1)/2*(b-a) for a, b in zip(bounds[:-1], bounds[1:]) ])
+    w = np.concatenate([ w/2*(b-a) for a, b in zip(bounds[:-1], bounds[1:]) ])
+    (p, q), (u, v) = start, end - start
+    P = p + x[:, None]*u
+    Q = q + x[:, None]*v
+    r = np.hypot(P[:, None, 0]-Q[None, :, 0], P[:, None, 1]-Q[None, :, 1])
+    return antInductance.MU0/(4*np.pi)*np.dot(u, v)*(w[:, None]*w[None, :]/r).sum()
+
+def test_slopes_against_the_other_segments():
+    # style 2 and 3: the mutual inductance of the slopes with the horizontal and vertical segments
+    for args in ((8, 30, 20, 0.3, 0.3, -1, 2), (3, 75.4, 33.5, 2.7, 1.7, -1, 3)):
+        geom = antGeom.antGeometry(*args)
+        start, end = antGeom.pathSegments(_batch(geom))
+        start, end = start[0]*1e-3, end[0]*1e-3
+        slope = geom.kind == antGeom.KIND_SLOPE
+        reference = sum(2*_neumann(np.array([ start[i], start[j] ]), np.array([ end[i], end[j] ]))
+                        for i in np.nonzero(slope)[0] for j in np.nonzero(~slope)[0])
+        total = antInductance.inductanceSegments(geom)
+        withoutSlopes = total - antInductance._crossMutual(start[None, slope], end[None, slope], np.ones((1, slope.sum()), dtype=bool),
+                                                           start[None, ~slope], end[None, ~slope], np.ones((1, (~slope).sum()), dtype=bool))[0]
+        assert abs(reference) > 0.01*total
+        assert abs(total - withoutSlopes - reference) < 1e-6*total
@@ -0,0 +1,56 @@
+# antOptimize.optimize() may only rank candidates which pass the design rule check of antGen.py
+
+import os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import antDrc
+import antOptimize
+
+def _failing(ranked, antLength, antWidth):
+    return [ c for c in ranked if antDrc.checkAnt(c["turns"], antLength, antWidth, c["conductorWidth"], c["conductorSpace"], -1, c["style"]) ]
+
+def test_optimum_on_the_clearance_edge():
+    # 8 turns in 30x20 mm: without the check, the pareto front holds style 3 designs whose
+    # innermost slopes come closer than conductorSpace
+    unchecked = antOptimize.optimize(1.0e-6, 30, 20, model="wheeler", workers=1, drc=False)
+    assert any(c["rank"] == 0 for c in _failing(unchecked, 30, 20))
+    ranked = antOptimize.optimize(1.0e-6, 30, 20, model="wheeler", workers=1)
+    assert ranked
+    assert not _failing(ranked, 30, 20)
+    assert len(ranked) < len(unchecked)
+
+def test_clearance_of_the_check():
+    ranked = antOptimize.optimize(1.2e-6, 75.4, 33.5, model="wheeler", workers=1, drcClearance=0.4, maxTurns=6)
+    assert ranked
+    for c in ranked:
+        assert not antDrc.checkAnt(c["turns"], 75.4, 33.5, c["conductorWidth"], c["conductorSpace"], -1, c["style"], 0.4)
+
+def _paretoRankReference(objectives):
+    # plain O(n^2) non dominated sorting
+    rank = [ None ]*len(objectives)
+    remaining = list(range(len(objectives)))
+    r = 0
+    while remaining:
+        front = [ i for i in remaining if not any(all(a <= b for a, b in zip(objectives[j], objectives[i])) and
+                                                  tuple(objectives[j]) != tuple(objectives[i]) for j in remaining) ]
+        for i in front:
+            rank[i] = r
+        remaining = [ i for i in remaining if rank[i] is None ]
+        r += 1
+    return rank
+
+def test_pareto_rank():
+    import random
+    rnd = random.Random(5)
+    for i in range(200):
+        n = rnd.randint(1, 120)
+        values = 4 if i % 2 else 1000      # few values: many ties and equal points
+        objectives = [ [ rnd.randrange(values) for k in range(3) ] for j in range(n) ]
+        assert antOptimize.paretoRank(objectives).tolist() == _paretoRankReference(objectives)
+
+def test_pareto_rank_of_many_candidates():
+    # 60k candidates used to need an (n,n,3) array
+    import numpy as np
+    o = np.random.default_rng(2).random((60000, 3))
+    rank = antOptimize.paretoRank(o)
+    assert rank.min() == 0 and len(rank) == 60000
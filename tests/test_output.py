@@ -0,0 +1,79 @@
+# output of antGen.genAnt() has to stay byte identical to the generator of version 1.1 (tests/antGen_v1.py),
+# apart from the time stamp. run with: python3 -m pytest tests
+
+import os, re, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import antGen
+import antGen_v1
+
+_tedit = re.compile(r"\(tedit [0-9A-F]+\)")
+_negativeZero = re.compile(r"(?<!coil)-0\.0+(?![0-9])")
+
+def _same(args):
+    new = _tedit.sub("(tedit X)", antGen.genAnt(*args))
+    old = _tedit.sub("(tedit X)", antGen_v1.genAnt(*args))
+    assert new == old, "output differs for %r" % (args,)
+
+def test_grid():
+    for style in (1, 2, 3):
+        for turns in (1, 2, 3, 5, 8):
+            for drill in (-1, 0, 0.8):
+                for silk in (-1, 0, 1.0):
+                    _same((turns, 75.4, 33.5, 2.7, 1.7, drill, -1, silk, "nfc_ant", style))
+
+def test_small_conductors():
+    for style in (1, 2, 3):
+        for turns in (1, 4, 10):
+            _same((turns, 40, 30, 0.5, 0.3, -1, -1, 0, "small", style))
+            _same((turns, 52.25, 41.1, 0.15, 0.2, 0, 0.1, 0.5, "fine", style))
+
+def test_minimal_conductor_space():
+    for condSpaceMin in (-1, 0.25, 0.3):
+        _same((3, 40, 30, 0.5, 0.3, -1, condSpaceMin, 0, "slope", 2))
+
+def test_lines_stream_the_same_text():
+    args = (3, 75.4, 33.5, 2.7, 1.7, -1, -1, 1.0, "nfc_ant", 3)
+    assert "".join(antGen.genAntLines(*args, deterministic=True)) == antGen.genAnt(*args, deterministic=True)
+
+def test_random_designs():
+    # also outlines which are too small for the number of turns, the coil crosses itself then
+    import random
+    rnd = random.Random(3)
+    for i in range(500):
+        args = (rnd.randint(1, 15), round(rnd.uniform(5, 120), 2), round(rnd.uniform(5, 80), 2), round(rnd.uniform(0.1, 3), 2),
+                round(rnd.uniform(0.1, 2), 2), rnd.choice([-1, 0, 0.5]), rnd.choice([-1, 0.1, 0.3, 0.5]), rnd.choice([-1, 0, 1.5]),
+                "random", rnd.choice([1, 2, 3]))
+        try:
+            antGen_v1.genAnt(*args)
+        except ValueError:
+            continue        # style 2 with minimalConductorSpace > conductorSpace can not be drawn
+        _same(args)
+
+def test_profiled_export_writes_the_same_text():
+    # with a profile the lines are written in chunks, the text must not change
+    import io
+    import antExport
+    antExport.c_block, block = 7, antExport.c_block
+    try:
+        for polygon in (None, "miter"):
+            items = list(antGen.antItems(12, 40, 30, 0.5, 0.3, -1, -1, 0.5, "chunks", 3, 0, polygon=polygon))
+            for fmt in antExport.FORMATS:
+                timed = io.StringIO()
+                with antGen.Profile():
+                    antExport.export(items, [ (antExport.exporter(fmt), timed) ], phase=antGen.phase)
+                assert timed.getvalue() == "".join(antExport.render(antExport.exporter(fmt), items)), fmt
+    finally:
+        antExport.c_block = block
+
+def test_deterministic_numbers_have_no_negative_zero():
+    # rounding noise is written as -0.000000 without -D (as version 1.1 does), as 0.000000 with -D. the name is kept
+    args = (4, 40, 30, 0.5, 0.3, -1, -1, 0.5, "coil-0.000000", 2)
+    for fmt in ("kicad5", "kicad8", "svg", "dxf"):
+        plain = "".join(antGen.genAntLines(*args, fmt=fmt))
+        text = "".join(antGen.genAntLines(*args, deterministic=True, fmt=fmt))
+        assert text.count("coil-0.000000") == plain.count("coil-0.000000") > 0
+        if fmt.startswith("kicad"):
+            assert _negativeZero.search(plain)
+        assert not _negativeZero.search(text)
@@ -0,0 +1,91 @@
+# copper outlines of antGeom.traceOutline() / antGeom.padPolygons() and their export. run with: python3 -m pytest tests
+
+import os, re, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import antDrc
+import antExport
+import antGen
+import antGeom
+
+def _cleanDesigns():
+    # designs which pass the design rule check, fixed ones and random ones
+    designs = [ (turns, length, width, condWidth, condSpace, -1, style)
+                for style in (1, 2, 3) for turns in (1, 2, 4, 7)
+                for length, width, condWidth, condSpace in ((40, 30, 0.5, 0.3), (75.4, 33.5, 2.7, 1.7), (20, 60, 0.15, 0.2)) ]
+    rng = np.random.default_rng(7)
+    for i in range(60):
+        designs.append((int(rng.integers(1, 12)), float(rng.uniform(15, 90)), float(rng.uniform(15, 90)), float(rng.uniform(0.15, 3)),
+                        float(rng.uniform(0.15, 2)), -1, int(rng.integers(1, 4))))
+    for args in designs:
+        geom = antGeom.antGeometry(*args)
+        if antGeom.segmentsOk(geom).all() and not antDrc.checkGeometry(geom, antDrc.defaultClearance(args[4], args[5], args[6])):
+            yield args, geom
+
+def _edges(polygon):
+    return polygon, np.roll(polygon, -1, axis=0)
+
+def _selfIntersections(polygon):
+    # pairs of edges which are not neighbours but touch or cross
+    a0, a1 = _edges(polygon)
+    n = len(polygon)
+    i, j = np.triu_indices(n, 2)
+    keep = (j - i) % n != n - 1            # the last and the first edge are neighbours as well
+    i, j = i[keep], j[keep]
+    d = antDrc.segmentDistance(a0[i], a1[i], a0[j], a1[j])
+    return [ (int(a), int(b)) for a, b in zip(i[d < 1e-9], j[d < 1e-9]) ]
+
+def _inside(points, polygon):
+    # even-odd rule, the points must not lie on the outline
+    a0, a1 = _edges(polygon)
+    x, y = points[:, 0, None], points[:, 1, None]
+    crosses = (a0[:, 1] > y) != (a1[:, 1] > y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xs = a0[:, 0] + (y - a0[:, 1])*(a1[:, 0] - a0[:, 0])/(a1[:, 1] - a0[:, 1])
+    return (crosses & (x < xs)).sum(axis=1) % 2 == 1
+
+def test_outlines_do_not_intersect_themselves():
+    count = 0
+    for args, geom in _cleanDesigns():
+        for join in ("miter", "chamfer"):
+            for pad, polygon in enumerate(antGeom.padPolygons(geom, join)):
+                assert _selfIntersections(polygon) == [], (args, join, pad)
+        count += 1
+    assert count > 50
+
+def test_outlines_cover_the_segments():
+    # points along every segment, over 90 % of its width. the chain starts in the pad, it is cut square there
+    along = np.linspace(0, 1, 11)
+    across = np.linspace(-0.45, 0.45, 5)
+    for args, geom in _cleanDesigns():
+        for join in ("miter", "chamfer"):
+            for pad, polygon in enumerate(antGeom.padPolygons(geom, join)):
+                sel = geom.pad == pad
+                for i, (start, end, width) in enumerate(zip(geom.start[sel], geom.end[sel], geom.width[sel])):
+                    d = end - start
+                    n = np.array([ -d[1], d[0] ])/np.hypot(*d)
+                    a = along if i else along[1:]
+                    points = (start + a[:, None, None]*d + across[None, :, None]*width*n).reshape(-1, 2)
+                    assert _inside(points, polygon).all(), (args, join, pad, start, end)
+
+def test_every_format_writes_the_polygons():
+    args = (4, 40, 30, 0.5, 0.3, -1, 2)
+    geom = antGeom.antGeometry(*args)
+    polygons = antGeom.padPolygons(geom, "miter")
+    corners = np.concatenate(polygons)
+    for fmt in antExport.FORMATS:
+        text = antGen.genAnt(args[0], args[1], args[2], args[3], args[4], -1, args[5], 0.5, "poly", args[6], fmt=fmt, polygon="miter")
+        if fmt.startswith("kicad"):
+            # gr_poly in the primitives of both pads, relative to the pad
+            assert text.count("(gr_poly") == 2 and "(gr_line" not in text, fmt
+            xy = np.array(re.findall(r"\(xy ([-0-9.]+) ([-0-9.]+)\)", text), dtype=float)
+            np.testing.assert_allclose(xy, corners, atol=1e-6)
+        elif fmt == "svg":
+            points = re.findall(r'<polygon class="F_Cu_pad" points="([^"]*)"', text)
+            assert len(points) == 2 and sum(len(p.split()) for p in points) == len(corners)
+        elif fmt == "dxf":
+            assert text.count("VERTEX\n") == len(corners)
+        else:
+            # region, closed by the first corner
+            assert text.count("G36*") == 2 and text.count("D01*") == len(corners)
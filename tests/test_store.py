@@ -0,0 +1,84 @@
+# columnar store of antStore.py. run with: python3 -m pytest tests
+
+import json, os, sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import antBatch
+import antStore
+
+c_sweep = { "turns": { "start": 1, "stop": 6 }, "antennaLength": [12, 40, 75.4], "antennaWidth": [10, 30],
+            "conductorWidth": { "start": 0.5, "stop": 1.5, "step": 0.5 }, "conductorSpace": [0.3, 1.7], "style": [1, 2, 3] }
+
+def _build(tmpdir, spec, store):
+    # antStore.py build of a sweep specification (dict) or a table (csv text)
+    table = tmpdir.join("table.json" if isinstance(spec, dict) else "table.csv")
+    table.write(json.dumps(spec) if isinstance(spec, dict) else spec)
+    path = str(tmpdir.join(store))
+    assert antStore.main([ "build", str(table), path ]) == 0
+    return antStore.loadStore(path)
+
+def _sorted(store):
+    order = np.argsort(store["modulename"])
+    return { name: np.asarray(store[name])[order] for name in store.columns }
+
+def test_sweep_and_table_give_the_same_columns(tmpdir, capsys):
+    sweep = _build(tmpdir, c_sweep, "sweep.store")
+    assert sweep.rows == 6*3*2*3*2*3 and sweep.columns == antStore.c_names
+    # the same designs as rows of a table
+    variants = antBatch.makeVariants(c_sweep)
+    rows = [ ",".join(antStore.c_parameters) ] + [ ",".join(str(v[k]) for k in antStore.c_parameters) for v in variants ]
+    table = _build(tmpdir, "\n".join(rows) + "\n", "table.store")
+    assert table.rows == sweep.rows
+    a, b = _sorted(sweep), _sorted(table)
+    for name in antStore.c_names:
+        assert a[name].dtype == b[name].dtype, name
+        np.testing.assert_array_equal(a[name], b[name], err_msg=name)
+    # both small outlines and impossible turns are in the sweep
+    assert 0 < sweep["drawable"].sum() < sweep.rows
+
+def test_query_is_a_numpy_filter(tmpdir, monkeypatch, capsys):
+    store = _build(tmpdir, c_sweep, "sweep.store")
+    monkeypatch.setattr(antStore, "c_queryBlock", 37)     # many blocks
+    columns = { name: np.asarray(store[name]) for name in store.columns }
+    cases = [ ([ "turns==3" ], columns["turns"] == 3),
+              ([ "style!=2", "antennaLength<40", "traceLength>=100" ],
+               (columns["style"] != 2) & (columns["antennaLength"] < 40) & (columns["traceLength"] >= 100)),
+              ([ "drawable==false", "conductorWidth<=1" ], ~columns["drawable"] & (columns["conductorWidth"] <= 1)),
+              ([ "modulename=='%s'" % (columns["modulename"][5]) ], columns["modulename"] == columns["modulename"][5]),
+              ([ ("windowWidth", ">", 10.0), ("pad2X", "<", 5) ], (columns["windowWidth"] > 10) & (columns["pad2X"] < 5)),
+              ([], np.ones(store.rows, dtype=bool)) ]
+    for conditions, mask in cases:
+        expected = np.flatnonzero(mask)
+        np.testing.assert_array_equal(antStore.query(store, conditions), expected, err_msg=str(conditions))
+        np.testing.assert_array_equal(antStore.query(store, conditions, limit=10), expected[:10], err_msg=str(conditions))
+        data = antStore.select(store, expected, [ "modulename", "traceLength" ])
+        np.testing.assert_array_equal(data["traceLength"], columns["traceLength"][expected])
+    assert 0 < len(antStore.query(store, cases[1][0])) < store.rows
+
+def test_npz_and_directory_give_the_same_results(tmpdir, capsys):
+    directory = _build(tmpdir, c_sweep, "sweep.store")
+    npz = _build(tmpdir, c_sweep, "sweep.npz")
+    assert isinstance(directory["traceLength"], np.memmap)
+    assert npz.columns == directory.columns and npz.rows == directory.rows
+    for name in directory.columns:
+        np.testing.assert_array_equal(npz[name], directory[name], err_msg=name)
+    conditions = [ "style==3", "turns>2", "drawable==true" ]
+    rows = antStore.query(directory, conditions)
+    np.testing.assert_array_equal(antStore.query(npz, conditions), rows)
+    a, b = antStore.select(directory, rows), antStore.select(npz, rows)
+    for name in directory.columns:
+        np.testing.assert_array_equal(a[name], b[name], err_msg=name)
+
+def test_generated_after_a_batch_with_failures(tmpdir, capsys):
+    table = tmpdir.join("table.csv")
+    table.write("modulename,turns,antennaLength,antennaWidth,conductorWidth,conductorSpace,style\n"
+                "ok,3,40,30,0.5,0.3,1\n" "crossed,30,12,10,0.5,0.3,1\n" "broken,x,40,30,0.5,0.3,1\n" "ok3,4,40,30,0.5,0.3,3\n")
+    path = str(tmpdir.join("batch.npz"))
+    assert antBatch.main([ str(table), "-o", str(tmpdir.join("out")), "-j", "1", "-S", path ]) == 1
+    store = antStore.loadStore(path)
+    # rows which can not be read are not in the store, the one which failed the check is not generated
+    assert store["modulename"].tolist() == [ "ok", "crossed", "ok3" ]
+    assert store["generated"].tolist() == [ True, False, True ]
+    assert store["drawable"].tolist() == [ True, False, True ]
+    np.testing.assert_array_equal(antStore.query(store, [ "generated==false" ]), [1])